@@ -0,0 +1,278 @@
+# Native modules
+import itertools
+
+# Third-party modules
+import numpy as np
+
+# Project modules
+import allocation_calculator.calc as calc
+import allocation_calculator.profiler as profiler
+
+DEFAULT_CHUNK_SIZE = 4096
+PERMUTATIONS_CACHE = {}
+
+
+def gen_batch_model(data):
+    """Generate the matrices used to score chunks of combinations.
+
+    Each funghi is a row of the funghi-by-stat and funghi-by-skill matrices,
+    the missing specs are negative infinity. Each requirement has its own
+    funghi-by-stat matrices with the boosts and the reduce boosts applied.
+    The last row of every matrix is the empty funghi.
+    """
+    adventures = data['adventures']
+    funghis = data['funghis']
+    rewards = data['rewards']
+    funghi_ids = list(funghis)
+    funghi_idxs = {funghi_id: idx for idx, funghi_id in enumerate(funghi_ids)}
+    funghi_idxs[calc.EMPTY_ID] = len(funghi_ids)
+    stat_names = gen_spec_names(data, 'stats')
+    skill_names = gen_spec_names(data, 'skills')
+    skills = gen_spec_matrix(
+        [funghi['skills'] for funghi in funghis.values()], skill_names)
+    augmented_cache = calc.gen_augmented_funghis_cache(data)
+    adventure_models = {}
+    for adventure_id, adventure in adventures.items():
+        requirement_models = []
+        requirements = adventure['requirements']
+        for requirement_id, requirement in requirements.items():
+            entries = [augmented_cache[(adventure_id, requirement_id,
+                                        funghi_id)]
+                       for funghi_id in funghi_ids]
+            reduce_targets = requirement.get('reduce_stats', {})
+            requirement_models.append({
+                'stats': gen_spec_matrix(
+                    [entry['funghi']['stats'] for entry in entries],
+                    stat_names),
+                'reduce_stats': gen_spec_matrix(
+                    [entry['reduce_funghi']['stats'] for entry in entries],
+                    stat_names),
+                'can_reduce_boost': np.array(
+                    [entry['can_reduce_boost'] for entry in entries] +
+                    [False], dtype=bool),
+                'stat_slots': gen_spec_slots(
+                    requirement['stats'], stat_names),
+                'skill_slots': gen_spec_slots(
+                    requirement['skills'], skill_names),
+                'reduce_targets': [(stat_names.index(stat_name), target)
+                                   for stat_name, target
+                                   in reduce_targets.items()],
+                'score': calc.calc_weighted_score(
+                    rewards, requirement['rewards']),
+            })
+        adventure_models[adventure_id] = {
+            'requirement_ids': list(requirements),
+            'requirements': requirement_models,
+            'perfect_score': calc.calc_weighted_score(
+                rewards, adventure['perfect_rewards']),
+        }
+    return {
+        'funghi_idxs': funghi_idxs,
+        'skills': skills,
+        'adventures': adventure_models,
+    }
+
+
+def gen_spec_names(data, spec):
+    spec_names = set()
+    for funghi in data['funghis'].values():
+        spec_names.update(funghi[spec])
+    for adventure in data['adventures'].values():
+        for requirement in adventure['requirements'].values():
+            for req_spec_obj in requirement[spec]:
+                spec_names.update(req_spec_obj)
+            if spec == 'stats':
+                spec_names.update(requirement.get('reduce_stats', {}))
+    return sorted(spec_names)
+
+
+def gen_spec_matrix(funghi_specs_list, spec_names):
+    # The last row is the empty funghi which has no specs
+    matrix = np.full((len(funghi_specs_list) + 1, len(spec_names)), -np.inf)
+    for funghi_idx, funghi_specs in enumerate(funghi_specs_list):
+        for spec_idx, spec_name in enumerate(spec_names):
+            if spec_name in funghi_specs:
+                matrix[funghi_idx, spec_idx] = funghi_specs[spec_name]
+    return matrix
+
+
+def gen_spec_slots(req_specs, spec_names):
+    slots = []
+    for req_spec_obj in req_specs:
+        spec_idxs = [spec_names.index(spec_name) for spec_name in req_spec_obj]
+        spec_values = list(req_spec_obj.values())
+        slots.append((np.array(spec_idxs, dtype=np.intp),
+                      np.array(spec_values, dtype=float)))
+    return slots
+
+
+def calc_allocations_results(data, funghi_combinations,
+                             chunk_size=DEFAULT_CHUNK_SIZE):
+    results = []
+    model = gen_batch_model(data)
+    for chunk in gen_chunks(funghi_combinations, chunk_size):
+        scores, met_reports = calc_chunk_scores(model, chunk)
+        for combination_idx in range(len(chunk)):
+            results.append(gen_result(
+                model, scores, met_reports, combination_idx))
+    return results
+
+
+def gen_scored_combinations(data, funghi_combinations,
+                            chunk_size=DEFAULT_CHUNK_SIZE):
+    """Generate the combinations with their results chunk by chunk.
+
+    Only the combinations with the max score of each chunk are generated, the
+    others can not be the best combinations.
+    """
+    model = gen_batch_model(data)
+    for chunk in gen_chunks(funghi_combinations, chunk_size):
+        if profiler.ENABLED:
+            profiler.count('scored_combinations', len(chunk))
+        scores, met_reports = calc_chunk_scores(model, chunk)
+        chunk_max_score = scores.max()
+        for combination_idx in np.flatnonzero(scores >= chunk_max_score):
+            result = gen_result(model, scores, met_reports, combination_idx)
+            yield chunk[combination_idx], result
+
+
+def gen_chunks(funghi_combinations, chunk_size):
+    iterator = iter(funghi_combinations)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if len(chunk) <= 0:
+            return
+        yield chunk
+
+
+def calc_chunk_scores(model, chunk):
+    funghi_idxs = model['funghi_idxs']
+    empty_idx = funghi_idxs[calc.EMPTY_ID]
+    scores = np.zeros(len(chunk))
+    met_reports = {}
+    # Add the scores in the same order as calc.calc_allocation_result, so
+    # that the scores are exactly the same
+    for adventure_id in chunk[0]:
+        adventure_model = model['adventures'][adventure_id]
+        allocation_idxs = np.array(
+            [[funghi_idxs[funghi_id]
+              for funghi_id in combination[adventure_id]]
+             for combination in chunk], dtype=np.intp)
+        # If an empty funghi is in the allocation, the adventure fails
+        has_empty = (allocation_idxs == empty_idx).any(axis=1)
+        skills = model['skills'][allocation_idxs]
+        requirement_models = adventure_model['requirements']
+        met_matrix = np.zeros((len(chunk), len(requirement_models)),
+                              dtype=bool)
+        for req_idx, req_model in enumerate(requirement_models):
+            # The reduce boosts are applied only if all funghis have the skills
+            can_reduce_boost = req_model['can_reduce_boost'][
+                allocation_idxs].all(axis=1)
+            stats = np.where(can_reduce_boost[:, np.newaxis, np.newaxis],
+                             req_model['reduce_stats'][allocation_idxs],
+                             req_model['stats'][allocation_idxs])
+            is_met = ~has_empty
+            is_met &= is_slots_met(stats, req_model['stat_slots'])
+            is_met &= is_slots_met(skills, req_model['skill_slots'])
+            is_met &= is_reduce_targets_met(
+                stats, req_model['reduce_targets'])
+            met_matrix[:, req_idx] = is_met
+            scores += np.where(is_met, req_model['score'], 0.0)
+        # Add score of perfect reward if all requirements are met
+        all_met = met_matrix.all(axis=1) & ~has_empty
+        scores += np.where(all_met, adventure_model['perfect_score'], 0.0)
+        met_reports[adventure_id] = (met_matrix, has_empty)
+    return scores, met_reports
+
+
+def is_slots_met(specs, slots):
+    combination_size, capacity, _ = specs.shape
+    slot_size = len(slots)
+    # Like calc.is_non_reduce_requirement_met, the requirement is met if there
+    # are more slots than funghis
+    if slot_size <= 0 or slot_size > capacity:
+        return np.ones(combination_size, dtype=bool)
+    # Check whether each funghi passes each slot
+    feasibility = np.stack(
+        [(specs[:, :, spec_idxs] >= spec_values).all(axis=2)
+         for spec_idxs, spec_values in slots], axis=2)
+    # Try all pairings between the slots and the funghis at once
+    permutations = gen_permutations(capacity, slot_size)
+    paired_feasibility = feasibility[:, permutations, np.arange(slot_size)]
+    return paired_feasibility.all(axis=2).any(axis=1)
+
+
+def gen_permutations(capacity, slot_size):
+    key = (capacity, slot_size)
+    if key not in PERMUTATIONS_CACHE:
+        PERMUTATIONS_CACHE[key] = np.array(
+            list(itertools.permutations(range(capacity), slot_size)),
+            dtype=np.intp)
+    return PERMUTATIONS_CACHE[key]
+
+
+def is_reduce_targets_met(stats, reduce_targets):
+    is_met = np.ones(stats.shape[0], dtype=bool)
+    if len(reduce_targets) <= 0:
+        return is_met
+    # The missing stats are not added to the reduced sums
+    reduced_sums = np.where(np.isneginf(stats), 0.0, stats).sum(axis=1)
+    for stat_idx, reduce_target in reduce_targets:
+        is_met &= reduced_sums[:, stat_idx] >= reduce_target
+    return is_met
+
+
+def gen_result(model, scores, met_reports, combination_idx):
+    requirement_report = {}
+    for adventure_id, (met_matrix, has_empty) in met_reports.items():
+        if has_empty[combination_idx]:
+            continue
+        requirement_ids = model['adventures'][adventure_id]['requirement_ids']
+        requirement_report[adventure_id] = [
+            requirement_ids[req_idx]
+            for req_idx in np.flatnonzero(met_matrix[combination_idx])]
+    return {
+        'score': float(scores[combination_idx]),
+        'requirement_report': requirement_report,
+    }
+
+
+def calc_bitmaps_scores(data, funghi_combinations, bitmaps_list):
+    """Calculate the scores of the met requirement bitmaps at once.
+
+    The bitmaps are encoded by incremental.encode_requirement_report. The
+    weighted score of each requirement is added to the combinations which
+    meet it, in the same order as calc.calc_allocation_result, so that the
+    scores are exactly the same.
+    """
+    adventures = data['adventures']
+    rewards = data['rewards']
+    scores = np.zeros(len(bitmaps_list))
+    if len(bitmaps_list) <= 0:
+        return scores
+    for adventure_idx, adventure_id in enumerate(funghi_combinations[0]):
+        adventure = adventures[adventure_id]
+        requirements = adventure['requirements']
+        if len(requirements) > 64:
+            raise ValueError(
+                'The "numpy" engine supports at most 64 requirements, but'
+                ' adventure "{}" has {}'.format(adventure_id,
+                                                len(requirements)))
+        # If an empty funghi is in the allocation, the bitmap is None and the
+        # adventure fails
+        has_empty = np.array([bitmaps[adventure_idx] is None
+                              for bitmaps in bitmaps_list], dtype=bool)
+        bitmap_array = np.array([bitmaps[adventure_idx] or 0
+                                 for bitmaps in bitmaps_list],
+                                dtype=np.uint64)
+        for req_idx, requirement in enumerate(requirements.values()):
+            is_met = ((bitmap_array >> np.uint64(req_idx)) &
+                      np.uint64(1)) > 0
+            scores += np.where(is_met, calc.calc_weighted_score(
+                rewards, requirement['rewards']), 0.0)
+        # Add score of perfect reward if all requirements are met
+        all_met = (bitmap_array == np.uint64((1 << len(requirements)) - 1)) \
+            & ~has_empty
+        scores += np.where(all_met, calc.calc_weighted_score(
+            rewards, adventure['perfect_rewards']), 0.0)
+    return scores
@@ -0,0 +1,327 @@
+# Project modules
+import allocation_calculator.calc as calc
+import allocation_calculator.model as model
+
+
+def calc_best_results(data, adventure_capacity, funghi_capacity,
+                      max_results=0):
+    """Calculate the best results with branch and bound.
+
+    It searches the same allocations as calc.gen_funghi_combinations, but the
+    funghis are tried from the strongest one, and the subtrees whose optimistic
+    score is lower than the best score found so far are pruned. The subtrees
+    with the same optimistic score are kept, so the output is the same as
+    calc.calc_best_results.
+    """
+    state = gen_search_state(data, adventure_capacity, funghi_capacity)
+    search_adventure(state, 0, state['pool'], [], 0.0)
+    # Restore the order of calc.gen_funghi_combinations
+    leaves = sorted(state['leaves'], key=lambda leaf: leaf[0])
+    scored_combinations = ((combination, result)
+                           for _, combination, result in leaves)
+    return calc.select_best_results(data, scored_combinations, max_results)
+
+
+def calc_max_score(data, adventure_capacity, funghi_capacity, min_score=None):
+    """Calculate the max score with branch and bound.
+
+    Unlike calc_best_results, the subtrees whose optimistic score is not
+    higher than the best score found so far are pruned as well, so the
+    allocations with the same score are not searched. If min_score is
+    specified, only the scores higher than it are searched, and min_score is
+    returned if there are no such scores.
+    """
+    state = gen_search_state(data, adventure_capacity, funghi_capacity)
+    state['best_score'] = min_score
+    state['keep_ties'] = False
+    search_adventure(state, 0, state['pool'], [], 0.0)
+    if state['best_score'] is None:
+        return 0.0
+    return state['best_score']
+
+
+def gen_search_state(data, adventure_capacity, funghi_capacity):
+    adventures = data['adventures']
+    funghis = data['funghis']
+    rewards = data['rewards']
+    # Count the funghis like the candidates in calc.gen_funghi_combinations
+    pool = {}
+    for funghi_id, funghi in funghis.items():
+        if funghi['capacity'] > 0:
+            pool[funghi_id] = funghi['capacity']
+    if funghi_capacity < adventure_capacity:
+        pool[calc.EMPTY_ID] = adventure_capacity - funghi_capacity
+    # The first adventure uses the candidates in the original order, the
+    # following adventures use the sorted candidates
+    first_ranks = {funghi_id: rank for rank, funghi_id in enumerate(pool)}
+    augmented_cache = calc.gen_augmented_funghis_cache(data)
+    adventure_states = []
+    for adventure_id, adventure in adventures.items():
+        requirement_states = []
+        for requirement_id, requirement in \
+                adventure['requirements'].items():
+            optimistic_funghis = {}
+            for funghi_id in funghis:
+                entry = augmented_cache[(adventure_id, requirement_id,
+                                         funghi_id)]
+                optimistic_funghis[funghi_id] = merge_optimistic_funghis(
+                    [entry['funghi'], entry['reduce_funghi']])
+            requirement_states.append({
+                'id': requirement_id,
+                'requirement': requirement,
+                'score': calc.calc_weighted_score(
+                    rewards, requirement['rewards']),
+                'optimistic_funghis': optimistic_funghis,
+            })
+        adventure_state = {
+            'id': adventure_id,
+            'adventure': adventure,
+            'capacity': adventure['capacity'],
+            'requirements': requirement_states,
+            'perfect_score': calc.calc_weighted_score(
+                rewards, adventure['perfect_rewards']),
+        }
+        adventure_state['strengths'] = calc_funghi_strengths(
+            adventure_state, funghis)
+        adventure_state['max_scores'] = calc_optimistic_scores(
+            adventure_state, [], adventure_state['capacity'],
+            gen_ideal_funghis(adventure_state, [
+                funghi_id for funghi_id in funghis
+                if calc.check_allowed_funghis(adventure, [(funghi_id,)])]))
+        adventure_states.append(adventure_state)
+    return {
+        'allocation_model': calc.gen_allocation_model(data),
+        'adventures': adventure_states,
+        'pool': pool,
+        'first_ranks': first_ranks,
+        'best_score': None,
+        'keep_ties': True,
+        'leaves': [],
+    }
+
+
+def merge_optimistic_funghis(funghis):
+    # Take the max value of each spec, so the merged funghi is at least as
+    # strong as every given funghi
+    merged_funghi = {
+        'stats': {},
+        'skills': {},
+    }
+    for funghi in funghis:
+        for spec in ['stats', 'skills']:
+            merged_specs = merged_funghi[spec]
+            # The normalized specs are empty lists if they are not specified
+            funghi_specs = funghi[spec]
+            for spec_name in funghi_specs:
+                spec_value = funghi_specs[spec_name]
+                if spec_name not in merged_specs or \
+                        merged_specs[spec_name] < spec_value:
+                    merged_specs[spec_name] = spec_value
+    return merged_funghi
+
+
+def calc_funghi_strengths(adventure_state, funghis):
+    # The strength of a funghi is the score which can be achieved when all
+    # slots are filled with the funghi
+    strengths = {}
+    capacity = adventure_state['capacity']
+    for funghi_id in funghis:
+        strength = 0.0
+        for requirement_state in adventure_state['requirements']:
+            funghi = requirement_state['optimistic_funghis'][funghi_id]
+            if calc.is_requirement_met(requirement_state['requirement'],
+                                       [funghi] * capacity):
+                strength += requirement_state['score']
+        strengths[funghi_id] = strength
+    # The empty funghi is always the weakest one
+    strengths[calc.EMPTY_ID] = float('-inf')
+    return strengths
+
+
+def gen_ideal_funghis(adventure_state, funghi_ids):
+    # The ideal funghi of each requirement is stronger than all given funghis
+    ideal_funghis = []
+    for requirement_state in adventure_state['requirements']:
+        optimistic_funghis = requirement_state['optimistic_funghis']
+        ideal_funghis.append(merge_optimistic_funghis(
+            [optimistic_funghis[funghi_id] for funghi_id in funghi_ids
+             if funghi_id != calc.EMPTY_ID]))
+    return ideal_funghis
+
+
+def calc_optimistic_scores(adventure_state, partial_ids, slot_size,
+                           ideal_funghis):
+    """Calculate the scores to be added if the remaining slots are filled.
+
+    A requirement is regarded as reachable if it is met when the remaining
+    slots are filled with the ideal funghis. The scores are returned in the
+    same order as they are added in calc.calc_allocation_result, so that the
+    optimistic score is exactly the same as the real score when all
+    requirements are reachable.
+    """
+    scores = []
+    all_reachable = True
+    for requirement_state, ideal_funghi in \
+            zip(adventure_state['requirements'], ideal_funghis):
+        optimistic_funghis = requirement_state['optimistic_funghis']
+        funghis = [optimistic_funghis[funghi_id] for funghi_id in partial_ids]
+        funghis.extend([ideal_funghi] * slot_size)
+        if calc.is_requirement_met(requirement_state['requirement'], funghis):
+            scores.append(max(requirement_state['score'], 0.0))
+        else:
+            all_reachable = False
+    if all_reachable:
+        scores.append(max(adventure_state['perfect_score'], 0.0))
+    return scores
+
+
+def search_adventure(state, adventure_idx, pool, allocations, base_score):
+    adventure_state = state['adventures'][adventure_idx]
+    adventure = adventure_state['adventure']
+    strengths = adventure_state['strengths']
+    # Try the strongest funghis first
+    order = [funghi_id for funghi_id in pool
+             if calc.check_allowed_funghis(adventure, [(funghi_id,)])]
+    order.sort(key=lambda funghi_id: strengths[funghi_id], reverse=True)
+    # Generate the ideal funghis and the number of real funghis of each
+    # suffix of the order, from the shortest suffix
+    ideal_funghis = gen_ideal_funghis(adventure_state, [])
+    real_count = 0
+    suffix_ideal_funghis = [ideal_funghis]
+    suffix_real_counts = [real_count]
+    for funghi_id in reversed(order):
+        if funghi_id != calc.EMPTY_ID:
+            ideal_funghis = [
+                merge_optimistic_funghis([
+                    ideal_funghi,
+                    requirement_state['optimistic_funghis'][funghi_id]])
+                for ideal_funghi, requirement_state
+                in zip(ideal_funghis, adventure_state['requirements'])]
+            real_count += pool[funghi_id]
+        suffix_ideal_funghis.append(ideal_funghis)
+        suffix_real_counts.append(real_count)
+    suffix_ideal_funghis.reverse()
+    suffix_real_counts.reverse()
+    search_context = {
+        'adventure_idx': adventure_idx,
+        'pool': pool,
+        'order': order,
+        'suffix_ideal_funghis': suffix_ideal_funghis,
+        'suffix_real_counts': suffix_real_counts,
+        'allocations': allocations,
+        'base_score': base_score,
+    }
+    fill_slots(state, search_context, 0, [])
+
+
+def fill_slots(state, search_context, start, partial_ids):
+    adventure_idx = search_context['adventure_idx']
+    adventure_state = state['adventures'][adventure_idx]
+    slot_size = adventure_state['capacity'] - len(partial_ids)
+    if slot_size <= 0:
+        complete_adventure(state, search_context, partial_ids)
+        return
+    pool = search_context['pool']
+    order = search_context['order']
+    for order_idx in range(start, len(order)):
+        funghi_id = order[order_idx]
+        if partial_ids.count(funghi_id) >= pool[funghi_id]:
+            continue
+        # The following funghis are weaker, so they can be pruned as well
+        bound = calc_bound(state, search_context, partial_ids, slot_size,
+                           order_idx)
+        best_score = state['best_score']
+        if best_score is not None and (bound < best_score or (
+                not state['keep_ties'] and bound <= best_score)):
+            break
+        partial_ids.append(funghi_id)
+        fill_slots(state, search_context, order_idx, partial_ids)
+        partial_ids.pop()
+
+
+def calc_bound(state, search_context, partial_ids, slot_size, order_idx):
+    adventure_idx = search_context['adventure_idx']
+    adventure_states = state['adventures']
+    adventure_state = adventure_states[adventure_idx]
+    bound = search_context['base_score']
+    # If an empty funghi has to be used, the adventure fails
+    if calc.EMPTY_ID not in partial_ids and \
+            search_context['suffix_real_counts'][order_idx] >= slot_size:
+        ideal_funghis = search_context['suffix_ideal_funghis'][order_idx]
+        for score in calc_optimistic_scores(adventure_state, partial_ids,
+                                            slot_size, ideal_funghis):
+            bound += score
+    # Add the max scores of the following adventures
+    for next_adventure_state in adventure_states[adventure_idx + 1:]:
+        for score in next_adventure_state['max_scores']:
+            bound += score
+    return bound
+
+
+def complete_adventure(state, search_context, partial_ids):
+    adventure_idx = search_context['adventure_idx']
+    adventure_states = state['adventures']
+    adventure_state = adventure_states[adventure_idx]
+    pool = dict(search_context['pool'])
+    for funghi_id in partial_ids:
+        pool[funghi_id] -= 1
+        if pool[funghi_id] <= 0:
+            del pool[funghi_id]
+    # Sort the funghis in the order of calc.gen_funghi_combinations
+    if adventure_idx == 0:
+        first_ranks = state['first_ranks']
+        ranks = [first_ranks[funghi_id] for funghi_id in partial_ids]
+    else:
+        ranks = list(partial_ids)
+    allocation = [funghi_id for _, funghi_id in
+                  sorted(zip(ranks, partial_ids), key=lambda t: t[0])]
+    allocations = search_context['allocations']
+    allocations.append((adventure_state['id'], allocation, sorted(ranks)))
+    if len(pool) <= 0 or adventure_idx + 1 >= len(adventure_states):
+        add_leaf(state, allocations)
+    else:
+        # Add the real score of the adventure
+        base_score = search_context['base_score']
+        for score in calc_real_scores(state, adventure_state, allocation):
+            base_score += score
+        search_adventure(state, adventure_idx + 1, pool, allocations,
+                         base_score)
+    allocations.pop()
+
+
+def calc_real_scores(state, adventure_state, allocation):
+    # If an empty funghi is in the allocation, the adventure fails
+    if calc.EMPTY_ID in allocation:
+        return []
+    scores = []
+    all_met = True
+    requirement_records, perfect_score = \
+        state['allocation_model']['adventures'][adventure_state['id']]
+    for _, requirement_record, requirement_score, funghi_records in \
+            requirement_records:
+        augmented_funghi_records = calc.gen_augmented_funghi_records(
+            funghi_records, allocation)
+        if model.is_requirement_met(requirement_record,
+                                    augmented_funghi_records):
+            scores.append(requirement_score)
+        else:
+            all_met = False
+    if all_met:
+        scores.append(perfect_score)
+    return scores
+
+
+def add_leaf(state, allocations):
+    combination = {}
+    for adventure_id, allocation, _ in allocations:
+        combination[adventure_id] = allocation
+    result = calc.calc_allocation_result(state['allocation_model'],
+                                         combination)
+    score = result['score']
+    if state['best_score'] is None or score > state['best_score']:
+        state['best_score'] = score
+        state['leaves'] = []
+    elif score < state['best_score'] or not state['keep_ties']:
+        return
+    key = tuple(tuple(ranks) for _, _, ranks in allocations)
+    state['leaves'].append((key, combination, result))
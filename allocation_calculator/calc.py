@@ -1,5 +1,9 @@
 import copy
-import itertools
+import heapq
+
+import allocation_calculator.model as model
+import allocation_calculator.profiler as profiler
+import allocation_calculator.progress as progress
 
 REQUIRED_ADVENTURE_SPEC_NAMES = ['stats', 'skills']
 REQUIRED_FUNGHI_SPEC_NAMES = ['stats', 'skills']
@@ -34,67 +38,69 @@ def normalize_funghis(funghis):
 
 
 def filter_out_subset_funghis(data):
-    adventures = data['adventures']
+    """Filter out the funghis which are dominated by other funghis.
+
+    A funghi is dominated if another funghi meets all the requirements it
+    meets when allocated alone, and has stats at least as high. The funghis
+    are checked once in order, each one against the funghis which have not
+    been removed, until there are only enough funghis for all adventures.
+    """
     funghis = data['funghis']
     adventure_capacity = calc_total_adventure_capacity(data)
     funghi_capacity = calc_total_funghi_capacity(data)
-    remove = True
-    # We need to have enough funghis for all adventures
-    while remove and funghi_capacity > adventure_capacity:
-        remove = False
-        # Try each base funghi
-        for funghi_id in funghis:
-            signature = gen_adventure_requirement_met_signature(
-                data, funghi_id, adventures)
-            # For each other funghi, check whether the passing requirement list
-            # is a superset of the base funghi
-            for other_funghi_id in funghis:
-                if other_funghi_id == funghi_id:
-                    continue
-                other_signature = gen_adventure_requirement_met_signature(
-                    data, other_funghi_id, adventures)
-                if check_super_signature(signature, other_signature) and \
-                        check_super_stats(funghis, funghi_id, other_funghi_id):
-                    remove = True
-                    break
-            if remove:
+    signatures = gen_requirement_met_signatures(data)
+    # Try each base funghi
+    for funghi_id in list(funghis):
+        # We need to have enough funghis for all adventures
+        if funghi_capacity <= adventure_capacity:
+            break
+        signature = signatures[funghi_id]
+        # For each other funghi, check whether the passing requirements are a
+        # superset of the base funghi
+        for other_funghi_id in funghis:
+            if other_funghi_id == funghi_id:
+                continue
+            other_signature = signatures[other_funghi_id]
+            if signature & ~other_signature == 0 and \
+                    check_super_stats(funghis, funghi_id, other_funghi_id):
                 del funghis[funghi_id]
                 funghi_capacity -= 1
                 break
 
 
-def gen_adventure_requirement_met_signature(data, funghi_id, adventures):
-    signature = {}
-    adventure_allocation = [funghi_id]
-    for adventure_id, adventure in adventures.items():
-        met_list = []
-        allocated_funghis = gen_allocated_funghis(
-            data, adventure_allocation)
-        requirements = adventure['requirements']
-        # Look through each requirement
-        for requirement in requirements.values():
-            augmented_funghis = gen_augmented_funghis(
-                requirement, allocated_funghis)
-            is_met = is_requirement_met(requirement, augmented_funghis)
-            met_list.append(is_met)
-        signature[adventure_id] = met_list
-    return signature
+def gen_requirement_met_signatures(data):
+    """Generate the bitmask of met requirements of each funghi.
+
+    Each bit is a requirement of an adventure, it is set if the requirement is
+    met when the funghi is allocated alone.
+    """
+    signatures = {}
+    adventures = data['adventures']
+    augmented_cache = gen_augmented_funghis_cache(data)
+    for funghi_id in data['funghis']:
+        signature = 0
+        bit = 1
+        adventure_allocation = [funghi_id]
+        for adventure_id, adventure in adventures.items():
+            requirements = adventure['requirements']
+            # Look through each requirement
+            for requirement_id, requirement in requirements.items():
+                augmented_funghis = gen_cached_augmented_funghis(
+                    augmented_cache, adventure_id, requirement_id,
+                    adventure_allocation)
+                if is_requirement_met(requirement, augmented_funghis):
+                    signature |= bit
+                bit <<= 1
+        signatures[funghi_id] = signature
+    return signatures
 
 
 def check_super_stats(funghis, funghi_id, super_funghi_id):
     stats = funghis[funghi_id]['stats']
     super_stats = funghis[super_funghi_id]['stats']
-    for stat_name, stat_value in stats.items():
+    for stat_name in stats:
         if stat_name in super_stats:
-            if stat_value > super_stats[stat_name]:
-                return False
-    return True
-
-
-def check_super_signature(sig, super_sig):
-    for met_list, super_met_list in zip(sig.values(), super_sig.values()):
-        for met, super_met in zip(met_list, super_met_list):
-            if met and not super_met:
+            if stats[stat_name] > super_stats[stat_name]:
                 return False
     return True
 
@@ -115,23 +121,17 @@ def calc_total_funghi_capacity(data):
     return count
 
 
-def gen_funghi_combinations(data, adventure_capacity, funghi_capacity):
+def gen_funghi_combinations(data, adventure_capacity, funghi_capacity,
+                            first_pointer=None):
     """Generate funghi combinations.
 
     Empty funghis will be generated if there are not enough funghis for
-    allocations.
+    allocations. If first_pointer is specified, only the combinations whose
+    first funghi of the first adventure is the candidate at first_pointer are
+    generated.
     """
-    candidates = []
-    # Generate funghi candidates
-    funghis = data['funghis']
-    for funghi_id, funghi in funghis.items():
-        for funghi_idx in range(funghi['capacity']):
-            candidates.append((funghi_id, funghi_idx))
-    # If there are not enough funghis, generate negative IDs as empty funghis
-    if funghi_capacity < adventure_capacity:
-        empty_size = adventure_capacity - funghi_capacity
-        for empty_idx in range(empty_size):
-            candidates.append((EMPTY_ID, empty_idx))
+    candidates = gen_funghi_candidates(
+        data, adventure_capacity, funghi_capacity)
     # Generate combinations of funghis in each adventure, then proceed with the
     # remaining unused funghis
     adventures = data['adventures']
@@ -143,7 +143,8 @@ def gen_funghi_combinations(data, adventure_capacity, funghi_capacity):
     # Add the generator for the first adventure
     first_adventure = adventures_values[0]
     local_capacity = first_adventure['capacity']
-    local_comb = gen_combinations_primary_jumpy(candidates, local_capacity)
+    local_comb = gen_combinations_primary_jumpy(
+        candidates, local_capacity, first_pointer)
     generators.append(local_comb)
     # Add dummy candidates
     candidates_list.append([])
@@ -156,6 +157,8 @@ def gen_funghi_combinations(data, adventure_capacity, funghi_capacity):
         local_candidates = next(generators[-1], None)
         # Check whether the local candidates are in the allowed list
         while not check_allowed_funghis(adventure, local_candidates):
+            if profiler.ENABLED:
+                profiler.count('rejected_combinations')
             local_candidates = next(generators[-1], None)
         if local_candidates is None:
             generators.pop()
@@ -172,6 +175,8 @@ def gen_funghi_combinations(data, adventure_capacity, funghi_capacity):
                         zip(adventures_keys, candidates_list[1:]):
                     output[adventure_id] = [pair[0]
                                             for pair in candidates_item]
+                if profiler.ENABLED:
+                    profiler.count('combinations')
                 yield output
                 candidates_list.pop()
             else:
@@ -186,14 +191,51 @@ def gen_funghi_combinations(data, adventure_capacity, funghi_capacity):
                 remaining_list.append(remaining_candidates)
 
 
-def gen_combinations_primary_jumpy(candidates, n):
+def gen_funghi_candidates(data, adventure_capacity, funghi_capacity):
+    candidates = []
+    # Generate funghi candidates
+    funghis = data['funghis']
+    for funghi_id, funghi in funghis.items():
+        for funghi_idx in range(funghi['capacity']):
+            candidates.append((funghi_id, funghi_idx))
+    # If there are not enough funghis, generate negative IDs as empty funghis
+    if funghi_capacity < adventure_capacity:
+        empty_size = adventure_capacity - funghi_capacity
+        for empty_idx in range(empty_size):
+            candidates.append((EMPTY_ID, empty_idx))
+    return candidates
+
+
+def gen_first_pointers(candidates, n):
+    """Generate the first pointers used by gen_combinations_primary_jumpy.
+
+    The combinations generated with different first pointers are disjoint,
+    and all combinations are generated by trying each first pointer in order.
+    """
+    first_pointers = []
+    for pointer in range(len(candidates) - n + 1):
+        # The first pointer always jumps to a different primary number
+        if pointer == 0 or \
+                candidates[pointer][0] != candidates[pointer - 1][0]:
+            first_pointers.append(pointer)
+    return first_pointers
+
+
+def gen_combinations_primary_jumpy(candidates, n, first_pointer=None):
     candidate_size = len(candidates)
-    # Create pointers
-    pointers = list(range(n))
-    # If the index is negative, the pointer can not move anymore, so that we can
-    # stop the generation
-    idx = 0
-    while idx >= 0:
+    # Create pointers, the first pointer can not move if it is specified
+    if first_pointer is None:
+        pointers = list(range(n))
+        min_idx = 0
+    else:
+        pointers = list(range(first_pointer, first_pointer + n))
+        min_idx = 1
+    if n > 0 and pointers[-1] >= candidate_size:
+        return
+    # If the index is less than the min index, the pointer can not move
+    # anymore, so that we can stop the generation
+    idx = min_idx
+    while idx >= min_idx:
         # Output the combination
         output = []
         for idx in range(n):
@@ -202,7 +244,7 @@ def gen_combinations_primary_jumpy(candidates, n):
         yield output
         # Go to the next pointer combination
         idx = n - 1
-        while idx >= 0:
+        while idx >= min_idx:
             # Find the new pointer with a different primary number
             pointer = pointers[idx]
             prev_primary_num = candidates[pointer][0]
@@ -240,48 +282,144 @@ def check_allowed_funghis(adventure, candidates):
     return True
 
 
-def calc_allocations_results(data, funghi_combinations):
+def calc_allocations_results(data, funghi_combinations, engine='python'):
+    if engine != 'python':
+        engine_module = import_engine(engine)
+        return engine_module.calc_allocations_results(data,
+                                                      funghi_combinations)
     results = []
-    adventures = data['adventures']
-    rewards = data['rewards']
+    allocation_model = gen_allocation_model(data)
     # Calculate score for each allocation
     for funghi_combination in funghi_combinations:
-        score = 0.0
-        requirement_report = {}
-        # Look through each adventure
-        for adventure_id, adventure_allocation in funghi_combination.items():
-            # If an empty funghi is in the allocation, the adventure fails
-            if EMPTY_ID in adventure_allocation:
-                continue
-            allocated_funghis = gen_allocated_funghis(
-                data, adventure_allocation)
-            adventure = adventures[adventure_id]
-            requirements = adventure['requirements']
-            # Look through each requirement
-            all_requirements_met = True
-            met_requirements = []
-            for requirement_id, requirement in requirements.items():
-                augmented_funghis = gen_augmented_funghis(
-                    requirement, allocated_funghis)
-                if is_requirement_met(requirement, augmented_funghis):
-                    req_rewards = requirement['rewards']
-                    score += calc_weighted_score(rewards, req_rewards)
-                    met_requirements.append(requirement_id)
-                else:
-                    all_requirements_met = False
-            # Add score of perfect reward if all requirements are met
-            if all_requirements_met:
-                req_rewards = adventure['perfect_rewards']
-                score += calc_weighted_score(rewards, req_rewards)
-            # Add met requirement IDs to requirement report
-            requirement_report[adventure_id] = met_requirements
-        results.append({
-            'score': score,
-            'requirement_report': requirement_report,
-        })
+        results.append(calc_allocation_result(
+            allocation_model, funghi_combination))
     return results
 
 
+def import_engine(engine):
+    if engine == 'table':
+        # The score tables are built by this module, so they are imported
+        # only when they are used
+        import allocation_calculator.score_table as score_table
+        return score_table
+    return import_batch_engine()
+
+
+def import_batch_engine():
+    try:
+        import allocation_calculator.batch as batch
+    except ImportError:
+        raise ValueError('The "numpy" engine requires the "numpy" package')
+    return batch
+
+
+def gen_scored_combinations(data, funghi_combinations, engine='python'):
+    if engine != 'python':
+        engine_module = import_engine(engine)
+        yield from engine_module.gen_scored_combinations(data,
+                                                         funghi_combinations)
+        return
+    allocation_model = gen_allocation_model(data)
+    for funghi_combination in funghi_combinations:
+        if profiler.ENABLED:
+            profiler.count('scored_combinations')
+        yield funghi_combination, calc_allocation_result(
+            allocation_model, funghi_combination)
+
+
+def gen_allocation_model(data):
+    """Generate the compiled model used to score the allocations.
+
+    The specs are compiled once per run by the model module, so that no
+    spec names are looked up when a combination is scored. Each adventure
+    is (requirement records, perfect score), and each requirement record is
+    (requirement ID, compiled requirement, score, augmented funghi records of
+    each funghi ID). The augmented funghi records are (boosted funghi,
+    reduce boosted funghi, whether the funghi has the reduce boost skills)
+    like the entries of gen_augmented_funghis_cache.
+    """
+    rewards = data['rewards']
+    stat_idxs = model.gen_spec_idxs(data, 'stats')
+    skill_idxs = model.gen_spec_idxs(data, 'skills')
+    augmented_cache = gen_augmented_funghis_cache(data)
+    adventure_records = {}
+    for adventure_id, adventure in data['adventures'].items():
+        requirement_records = []
+        requirements = adventure['requirements']
+        for requirement_id, requirement in requirements.items():
+            funghi_records = {}
+            for funghi_id in data['funghis']:
+                entry = augmented_cache[(adventure_id, requirement_id,
+                                         funghi_id)]
+                funghi_record = model.compile_funghi(
+                    entry['funghi'], stat_idxs, skill_idxs)
+                if entry['reduce_funghi'] is entry['funghi']:
+                    reduce_funghi_record = funghi_record
+                else:
+                    reduce_funghi_record = model.compile_funghi(
+                        entry['reduce_funghi'], stat_idxs, skill_idxs)
+                funghi_records[funghi_id] = (
+                    funghi_record, reduce_funghi_record,
+                    entry['can_reduce_boost'])
+            requirement_records.append((
+                requirement_id,
+                model.compile_requirement(requirement, stat_idxs, skill_idxs),
+                calc_weighted_score(rewards, requirement['rewards']),
+                funghi_records,
+            ))
+        adventure_records[adventure_id] = (
+            requirement_records,
+            calc_weighted_score(rewards, adventure['perfect_rewards']))
+    return {
+        'stat_idxs': stat_idxs,
+        'skill_idxs': skill_idxs,
+        'adventures': adventure_records,
+    }
+
+
+def calc_allocation_result(allocation_model, funghi_combination):
+    adventure_records = allocation_model['adventures']
+    score = 0.0
+    requirement_report = {}
+    # Look through each adventure
+    for adventure_id, adventure_allocation in funghi_combination.items():
+        # If an empty funghi is in the allocation, the adventure fails
+        if EMPTY_ID in adventure_allocation:
+            continue
+        requirement_records, perfect_score = adventure_records[adventure_id]
+        # Look through each requirement
+        all_requirements_met = True
+        met_requirements = []
+        for requirement_id, requirement_record, requirement_score, \
+                funghi_records in requirement_records:
+            augmented_funghi_records = gen_augmented_funghi_records(
+                funghi_records, adventure_allocation)
+            if model.is_requirement_met(requirement_record,
+                                        augmented_funghi_records):
+                score += requirement_score
+                met_requirements.append(requirement_id)
+            else:
+                all_requirements_met = False
+        # Add score of perfect reward if all requirements are met
+        if all_requirements_met:
+            score += perfect_score
+        # Add met requirement IDs to requirement report
+        requirement_report[adventure_id] = met_requirements
+    return {
+        'score': score,
+        'requirement_report': requirement_report,
+    }
+
+
+def gen_augmented_funghi_records(funghi_records, adventure_allocation):
+    records = [funghi_records[funghi_id] for funghi_id in adventure_allocation]
+    # The reduce boosts are applied only if all funghis have the skills
+    for _, _, can_reduce_boost in records:
+        if not can_reduce_boost:
+            return [record[0] for record in records]
+    return [record[1] for record in records]
+
+
 def gen_allocated_funghis(data, adventure_allocation):
     allocated_funghis = []
     funghis = data['funghis']
@@ -314,6 +452,8 @@ def gen_augmented_funghis_logic(requirement, allocated_funghis, is_reduce):
             return allocated_funghis
     # Check each funghi to see if it can be augmented
     for funghi in allocated_funghis:
+        if profiler.ENABLED:
+            profiler.count('deepcopies')
         final_augmented_funghi = copy.deepcopy(funghi)
         # Check each boost
         for req_boost in req_boosts:
@@ -324,6 +464,8 @@ def gen_augmented_funghis_logic(requirement, allocated_funghis, is_reduce):
                 if skill_name in funghi_skills and \
                         funghi_skills[skill_name] > 0:
                     if augmented_funghi is None:
+                        if profiler.ENABLED:
+                            profiler.count('deepcopies')
                         augmented_funghi = copy.deepcopy(
                             final_augmented_funghi)
                     augmented_funghi_stats = augmented_funghi['stats']
@@ -347,7 +489,71 @@ def gen_augmented_funghis_logic(requirement, allocated_funghis, is_reduce):
     return augmented_funghis
 
 
+def gen_augmented_funghis_cache(data):
+    """Generate the augmented funghis of each requirement and funghi.
+
+    The boosts of a requirement only depend on the funghi itself, so they are
+    applied once per run instead of once per combination. The reduce boosts
+    are applied only when all allocated funghis have the skills, so both
+    versions of the augmented funghi are saved along with whether the funghi
+    has the skills of the reduce boosts.
+    """
+    augmented_cache = {}
+    adventures = data['adventures']
+    funghis = data['funghis']
+    for adventure_id, adventure in adventures.items():
+        requirements = adventure['requirements']
+        for requirement_id, requirement in requirements.items():
+            for funghi_id, funghi in funghis.items():
+                key = (adventure_id, requirement_id, funghi_id)
+                augmented_cache[key] = gen_augmented_funghi_entry(
+                    requirement, funghi)
+    return augmented_cache
+
+
+def gen_augmented_funghi_entry(requirement, funghi):
+    augmented_funghi = gen_augmented_funghis_logic(
+        requirement, [funghi], False)[0]
+    can_reduce_boost = is_reduce_boost_available(requirement, funghi)
+    if can_reduce_boost:
+        reduce_augmented_funghi = gen_augmented_funghis_logic(
+            requirement, [augmented_funghi], True)[0]
+    else:
+        reduce_augmented_funghi = augmented_funghi
+    return {
+        'funghi': augmented_funghi,
+        'reduce_funghi': reduce_augmented_funghi,
+        'can_reduce_boost': can_reduce_boost,
+    }
+
+
+def is_reduce_boost_available(requirement, funghi):
+    if 'reduce_boosts' not in requirement:
+        return True
+    funghi_skills = funghi['skills']
+    # The funghi has to pass all the skills in all reduce boosts
+    for req_boost in requirement['reduce_boosts']:
+        for skill_name in req_boost:
+            if skill_name not in funghi_skills or \
+                    funghi_skills[skill_name] <= 0:
+                return False
+    return True
+
+
+def gen_cached_augmented_funghis(augmented_cache, adventure_id,
+                                 requirement_id, adventure_allocation):
+    entries = [augmented_cache[(adventure_id, requirement_id, funghi_id)]
+               for funghi_id in adventure_allocation]
+    # The reduce boosts are applied only if all funghis have the skills
+    for entry in entries:
+        if not entry['can_reduce_boost']:
+            return [entry['funghi'] for entry in entries]
+    return [entry['reduce_funghi'] for entry in entries]
+
+
 def is_requirement_met(requirement, augmented_funghis):
+    if profiler.ENABLED:
+        profiler.count('requirement_checks')
     return is_non_reduce_requirement_met(
         requirement, augmented_funghis, 'stats') and \
         is_non_reduce_requirement_met(
@@ -356,31 +562,37 @@ def is_requirement_met(requirement, augmented_funghis):
 
 
 def is_non_reduce_requirement_met(requirement, augmented_funghis, spec):
-    # Generate permutations such that each spec is paired to a funghis
+    # Each spec object has to be paired to a different funghi which passes all
+    # the specs in it, so it is a bipartite matching between the spec objects
+    # and the funghis
     req_specs = requirement[spec]
-    is_met = True
-    specs_permutations = itertools.permutations(
-        augmented_funghis, len(req_specs))
-    # Try each permutation
-    for permutated_funghis in specs_permutations:
-        # Specify each spec object to a funghi
-        for req_spec_obj, funghi in zip(req_specs, permutated_funghis):
+    # There are no pairings if there are more spec objects than funghis, such
+    # requirement is regarded as met as it has always been
+    if len(req_specs) > len(augmented_funghis):
+        return True
+    feasibility_matrix = gen_spec_feasibility_matrix(
+        req_specs, augmented_funghis, spec)
+    return model.is_spec_matching_found(feasibility_matrix,
+                                        len(augmented_funghis))
+
+
+def gen_spec_feasibility_matrix(req_specs, augmented_funghis, spec):
+    feasibility_matrix = []
+    # Check whether each funghi passes all the specs in each spec object
+    for req_spec_obj in req_specs:
+        feasible_funghi_idxs = []
+        for funghi_idx, funghi in enumerate(augmented_funghis):
             funghi_specs = funghi[spec]
-            # The funghi has to pass all the specs
+            is_feasible = True
             for spec_name, spec_value in req_spec_obj.items():
-                if spec_name in funghi_specs and \
-                        funghi_specs[spec_name] >= spec_value:
-                    is_met = True
-                else:
-                    is_met = False
+                if spec_name not in funghi_specs or \
+                        funghi_specs[spec_name] < spec_value:
+                    is_feasible = False
                     break
-                # If any check fails, it should try the next permutation
-            if not is_met:
-                break
-        # If any check succeeds, it should stop trying
-        if is_met:
-            break
-    return is_met
+            if is_feasible:
+                feasible_funghi_idxs.append(funghi_idx)
+        feasibility_matrix.append(feasible_funghi_idxs)
+    return feasibility_matrix
 
 
 def is_reduce_requirement_met(requirement, augmented_funghis):
@@ -439,6 +651,78 @@ def filter_best_results(data, funghi_combinations, results):
     }
 
 
+def calc_best_results(data, funghi_combinations, max_results=0,
+                      engine='python', reporter=None):
+    """Calculate the best results in a single pass over the combinations.
+
+    It gives the same output as calling calc_allocations_results and then
+    filter_best_results, but only the combinations with the max score are
+    kept. If max_results is positive, only the first max_results of them (in
+    the order of filter_best_results) are kept in a bounded heap. The total
+    number of the best combinations is stored in "result_count". If the
+    reporter of progress.gen_reporter is specified, the progress is reported
+    while the combinations are scored.
+    """
+    # Time the enumeration and the scoring separately, the remaining time is
+    # spent on ranking
+    funghi_combinations = profiler.gen_timed_items(
+        funghi_combinations, 'enumerate')
+    # The numpy engine does not generate all scored combinations, so the
+    # progress is counted on the generated combinations
+    if reporter is not None:
+        funghi_combinations = progress.gen_reported_combinations(
+            funghi_combinations, reporter)
+    scored_combinations = profiler.gen_timed_items(gen_scored_combinations(
+        data, funghi_combinations, engine), 'score')
+    if reporter is not None:
+        scored_combinations = progress.gen_best_scored_combinations(
+            scored_combinations, reporter)
+    with profiler.phase('rank'):
+        return select_best_results(data, scored_combinations, max_results)
+
+
+def select_best_results(data, scored_combinations, max_results=0):
+    max_score = None
+    heap = []
+    result_count = 0
+    for seq, (funghi_combination, result) in enumerate(scored_combinations):
+        score = result['score']
+        # Drop the kept combinations if a higher score is found
+        if max_score is None or score > max_score:
+            max_score = score
+            heap = []
+            result_count = 0
+        elif score < max_score:
+            continue
+        result_count += 1
+        success_rate = calc_success_rate(data, result)
+        # The negative sequence number keeps the earlier combinations first
+        # when the success rates are the same, and it is unique so that the
+        # combinations are never compared
+        item = (success_rate, -seq, funghi_combination,
+                result['requirement_report'])
+        if max_results <= 0:
+            heap.append(item)
+        elif len(heap) < max_results:
+            heapq.heappush(heap, item)
+        else:
+            heapq.heappushpop(heap, item)
+    if max_score is None:
+        return {
+            'max_score': 0.0,
+            'results': [],
+            'result_count': 0,
+        }
+    # Sort the combinations by success rate
+    heap.sort(key=lambda t: (t[0], t[1]), reverse=True)
+    return {
+        'max_score': max_score,
+        'results': [(combination, success_rate, req_report)
+                    for success_rate, _, combination, req_report in heap],
+        'result_count': result_count,
+    }
+
+
 def calc_success_rate(data, result):
     adventures = data['adventures']
     req_report = result['requirement_report']
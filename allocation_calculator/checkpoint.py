@@ -0,0 +1,78 @@
+# Native modules
+import os
+import pickle
+import time
+
+# Increase the version if the format of the checkpoint files is changed
+CHECKPOINT_VERSION = 2
+
+
+def gen_checkpoint(path, key, interval=60.0):
+    """Generate the state of a checkpoint file.
+
+    The key identifies the search, the checkpoint file saved with another key
+    can not be resumed. The state is saved at most once in each interval of
+    seconds.
+    """
+    return {
+        'path': path,
+        'key': key,
+        'interval': interval,
+        'last_save': time.perf_counter(),
+        'state': None,
+    }
+
+
+def load_checkpoint(checkpoint):
+    """Load the saved state of the checkpoint file.
+
+    False is returned if the file does not exist. ValueError is raised if the
+    file is broken or saved by another search.
+    """
+    path = checkpoint['path']
+    if not os.path.exists(path):
+        return False
+    try:
+        with open(path, 'rb') as stream:
+            saved = pickle.load(stream)
+    except Exception as e:
+        raise ValueError('Can not read the checkpoint "{}": {}'.format(
+            path, e))
+    if not isinstance(saved, dict) or \
+            saved.get('version') != CHECKPOINT_VERSION:
+        raise ValueError('The checkpoint "{}" has a different version'.format(
+            path))
+    if saved.get('key') != checkpoint['key']:
+        raise ValueError('The checkpoint "{}" is saved by another search or'
+                         ' the spec files are changed'.format(path))
+    checkpoint['state'] = saved['state']
+    return True
+
+
+def save_checkpoint(checkpoint, state, force=False):
+    now = time.perf_counter()
+    if not force and now - checkpoint['last_save'] < checkpoint['interval']:
+        return False
+    saved = {
+        'version': CHECKPOINT_VERSION,
+        'key': checkpoint['key'],
+        'state': state,
+    }
+    # Write to a temporary file first, so that an interrupted save never
+    # breaks the last checkpoint
+    path = checkpoint['path']
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        with open(tmp_path, 'wb') as stream:
+            pickle.dump(saved, stream, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    checkpoint['last_save'] = now
+    return True
+
+
+def remove_checkpoint(checkpoint):
+    if os.path.exists(checkpoint['path']):
+        os.remove(checkpoint['path'])
@@ -0,0 +1,182 @@
+# Native modules
+import math
+
+# Project modules
+import allocation_calculator.branch_bound as branch_bound
+import allocation_calculator.calc as calc
+
+
+def gen_compatible_combinations(data, combinations):
+    """Generate the combinations compatible with the best allocations.
+
+    The data has a single adventure. The output is the same as converting all
+    best results of the adventure into funghi sets and passing them to
+    gen_compatible_combinations of calc_compatible, but only the allocations
+    which can be compatible with the given combinations are scored. Then
+    branch and bound only checks whether any other allocation has a higher
+    score.
+    """
+    state = gen_search_state(data)
+    # Every best allocation is compatible with no combinations
+    if len(combinations) <= 0:
+        combinations = [set()]
+    first_combination = next(iter(combinations))
+    # Check whether the current capacity is larger
+    if len(first_combination) > state['capacity']:
+        subset_keys_list = [gen_subset_keys(state, combination)
+                            for combination in combinations]
+        calc_max_score(state)
+        return [combination for combination, subset_keys
+                in zip(combinations, subset_keys_list)
+                if any(is_best_allocation(state, key) for key in subset_keys)]
+    superset_keys = gen_superset_keys(state, combinations)
+    calc_max_score(state)
+    # Restore the order of calc.gen_funghi_combinations, then sort the best
+    # allocations by success rate like calc.select_best_results
+    scored_allocations = state['scored_allocations']
+    best_results = calc.select_best_results(
+        state['data'], (scored_allocations[key]
+                        for key in sorted(superset_keys)
+                        if is_best_allocation(state, key)))
+    adventure_id = state['adventure_id']
+    return [set(combination[adventure_id])
+            for combination, _, _ in best_results['results']]
+
+
+def is_narrowed(data, combinations):
+    """Check whether fewer allocations are scored than the whole space.
+
+    The numbers of allocations are estimated without the capacities of the
+    funghis.
+    """
+    if len(combinations) <= 0:
+        return False
+    pool = gen_pool(data)
+    capacity = next(iter(data['adventures'].values()))['capacity']
+    total_count = calc_multiset_count(len(pool), capacity)
+    first_combination = next(iter(combinations))
+    narrowed_count = 0
+    for combination in combinations:
+        if len(first_combination) > capacity:
+            # Only the funghis in the combination can be allocated
+            funghi_size = len([funghi_id for funghi_id in combination
+                               if funghi_id in pool])
+            narrowed_count += calc_multiset_count(funghi_size, capacity)
+        elif len(combination) <= capacity:
+            # Only the remaining slots can be filled
+            narrowed_count += calc_multiset_count(
+                len(pool), capacity - len(combination))
+        if narrowed_count >= total_count:
+            return False
+    return True
+
+
+def calc_multiset_count(funghi_size, size):
+    if funghi_size <= 0:
+        return 1 if size <= 0 else 0
+    return math.comb(funghi_size + size - 1, size)
+
+
+def gen_pool(data):
+    adventure = next(iter(data['adventures'].values()))
+    adventure_capacity = calc.calc_total_adventure_capacity(data)
+    funghi_capacity = calc.calc_total_funghi_capacity(data)
+    # Count the funghis like the candidates in calc.gen_funghi_combinations
+    pool = {}
+    for funghi_id, _ in calc.gen_funghi_candidates(
+            data, adventure_capacity, funghi_capacity):
+        if calc.check_allowed_funghis(adventure, [(funghi_id,)]):
+            pool[funghi_id] = pool.get(funghi_id, 0) + 1
+    return pool
+
+
+def gen_search_state(data):
+    adventure_id, adventure = next(iter(data['adventures'].items()))
+    pool = gen_pool(data)
+    return {
+        'data': data,
+        'adventure_id': adventure_id,
+        'capacity': adventure['capacity'],
+        'max_score': None,
+        'pool': pool,
+        'funghi_ids': list(pool),
+        'ranks': {funghi_id: rank for rank, funghi_id in enumerate(pool)},
+        'allocation_model': calc.gen_allocation_model(data),
+        'scored_allocations': {},
+    }
+
+
+def gen_multisets(funghi_ids, counts, size, start=0):
+    # Each funghi is used at most as many times as its count
+    if size <= 0:
+        yield []
+        return
+    for idx in range(start, len(funghi_ids)):
+        funghi_id = funghi_ids[idx]
+        for count in range(min(counts.get(funghi_id, 0), size), 0, -1):
+            for rest in gen_multisets(funghi_ids, counts, size - count,
+                                      idx + 1):
+                yield [funghi_id] * count + rest
+
+
+def score_allocation(state, funghi_ids):
+    # Sort the funghis in the order of calc.gen_funghi_combinations, so that
+    # the allocation is the same as the one scored by the other search modes
+    ranks = state['ranks']
+    key = tuple(sorted(ranks[funghi_id] for funghi_id in funghi_ids))
+    scored_allocations = state['scored_allocations']
+    if key not in scored_allocations:
+        funghi_ids_by_rank = state['funghi_ids']
+        combination = {
+            state['adventure_id']: [funghi_ids_by_rank[rank] for rank in key],
+        }
+        result = calc.calc_allocation_result(
+            state['allocation_model'], combination)
+        scored_allocations[key] = (combination, result)
+    return key
+
+
+def gen_subset_keys(state, combination):
+    # Only the funghis in the combination can be allocated
+    funghi_ids = [funghi_id for funghi_id in state['funghi_ids']
+                  if funghi_id in combination]
+    return [score_allocation(state, subset_ids) for subset_ids
+            in gen_multisets(funghi_ids, state['pool'], state['capacity'])]
+
+
+def gen_superset_keys(state, combinations):
+    pool = state['pool']
+    capacity = state['capacity']
+    superset_keys = set()
+    for combination in combinations:
+        if len(combination) > capacity or \
+                any(funghi_id not in pool for funghi_id in combination):
+            continue
+        # Fill the remaining slots with the remaining funghis
+        counts = dict(pool)
+        for funghi_id in combination:
+            counts[funghi_id] -= 1
+        for extra_ids in gen_multisets(state['funghi_ids'], counts,
+                                       capacity - len(combination)):
+            superset_keys.add(score_allocation(
+                state, list(combination) + extra_ids))
+    return superset_keys
+
+
+def calc_max_score(state):
+    scored_allocations = state['scored_allocations']
+    # None of the scored allocations can be the best ones
+    if len(scored_allocations) <= 0:
+        return
+    data = state['data']
+    # The best scored allocation is the lower bound of the max score
+    min_score = max(result['score']
+                    for _, result in scored_allocations.values())
+    state['max_score'] = branch_bound.calc_max_score(
+        data, calc.calc_total_adventure_capacity(data),
+        calc.calc_total_funghi_capacity(data), min_score)
+
+
+def is_best_allocation(state, key):
+    _, result = state['scored_allocations'][key]
+    return result['score'] >= state['max_score']
@@ -0,0 +1,150 @@
+# Native modules
+import itertools
+import math
+import sys
+import time
+
+# Project modules
+import allocation_calculator.calc as calc
+import allocation_calculator.progress as progress
+
+
+def count_funghi_combinations(data, adventure_capacity, funghi_capacity):
+    """Count the combinations generated by calc.gen_funghi_combinations.
+
+    The count is exact without generating the combinations. The funghis with
+    the same capacity and the same allowed adventures are counted together,
+    then the ways to fill the adventures are counted with dynamic programming
+    over the numbers of allocated funghis in each adventure.
+    """
+    adventures_values = list(data['adventures'].values())
+    capacities = tuple(adventure['capacity']
+                       for adventure in adventures_values)
+    candidates = calc.gen_funghi_candidates(
+        data, adventure_capacity, funghi_capacity)
+    funghi_counts = {}
+    for funghi_id, _ in candidates:
+        funghi_counts[funghi_id] = funghi_counts.get(funghi_id, 0) + 1
+    # Group the funghis which can be allocated in the same way
+    groups = {}
+    for funghi_id, count in funghi_counts.items():
+        allowed_idxs = tuple(
+            adventure_idx
+            for adventure_idx, adventure in enumerate(adventures_values)
+            if calc.check_allowed_funghis(adventure, [(funghi_id, 0)]))
+        key = (count, allowed_idxs)
+        groups[key] = groups.get(key, 0) + 1
+    ways = {tuple(0 for _ in capacities): 1}
+    for (count, allowed_idxs), group_size in groups.items():
+        if count == 1:
+            # Each funghi is allocated to at most one adventure, so the ways
+            # are counted for the whole group at once
+            ways = add_funghis(ways, capacities, allowed_idxs, group_size,
+                               group_size)
+        else:
+            for _ in range(group_size):
+                ways = add_funghis(ways, capacities, allowed_idxs, count)
+    return ways.get(capacities, 0)
+
+
+def add_funghis(ways, capacities, allowed_idxs, count, group_size=None):
+    """Add the allocations of the funghis to the ways of each fill state.
+
+    If group_size is specified, there are group_size funghis with one
+    capacity, otherwise there is one funghi with the capacity count.
+    """
+    new_ways = {}
+    for state, state_ways in ways.items():
+        rooms = [capacities[idx] - state[idx] for idx in allowed_idxs]
+        for additions in gen_additions(rooms, count):
+            if group_size is None:
+                addition_ways = state_ways
+            else:
+                addition_ways = state_ways * calc_multinomial(
+                    group_size, additions)
+            new_state = list(state)
+            for idx, addition in zip(allowed_idxs, additions):
+                new_state[idx] += addition
+            new_state = tuple(new_state)
+            new_ways[new_state] = new_ways.get(new_state, 0) + addition_ways
+    return new_ways
+
+
+def gen_additions(rooms, limit):
+    """Generate the numbers of funghis added to each room.
+
+    Each number is not larger than the room, and the sum is not larger than
+    the limit.
+    """
+    if len(rooms) <= 0:
+        yield ()
+        return
+    for addition in range(min(rooms[0], limit) + 1):
+        for following in gen_additions(rooms[1:], limit - addition):
+            yield (addition,) + following
+
+
+def calc_multinomial(group_size, additions):
+    # Choose the funghis of each room in order, the rest are not allocated
+    ways = 1
+    remaining = group_size
+    for addition in additions:
+        ways *= math.comb(remaining, addition)
+        remaining -= addition
+    return ways
+
+
+def measure_throughput(data, adventure_capacity, funghi_capacity,
+                       engine='python', sample_size=2000):
+    """Measure the combinations enumerated and scored per second.
+
+    Only the first sample_size combinations are scored. None is returned if
+    there are no combinations.
+    """
+    funghi_combinations = itertools.islice(calc.gen_funghi_combinations(
+        data, adventure_capacity, funghi_capacity), sample_size)
+    start = time.perf_counter()
+    combination_count = 0
+    for _ in calc.gen_scored_combinations(data, funghi_combinations, engine):
+        combination_count += 1
+    seconds = time.perf_counter() - start
+    if combination_count <= 0 or seconds <= 0.0:
+        return None
+    return combination_count / seconds
+
+
+def print_estimate(combination_count, throughput, file=sys.stdout):
+    seconds = None
+    if throughput is not None:
+        seconds = combination_count / throughput
+    print('Combinations: {}'.format(combination_count), file=file)
+    if throughput is None:
+        print('Throughput: unknown', file=file)
+    else:
+        print('Throughput: {:.0f} combinations/s'.format(throughput),
+              file=file)
+    print('ETA: {}'.format(progress.format_duration(seconds)), file=file)
+
+
+def check_budget(args, combination_count, switchable=True):
+    """Check whether the combinations can be scored within the budget.
+
+    If the budget is exceeded and args.over_budget is "branch_bound", the
+    search of args is switched to branch and bound when switchable, and True
+    is returned. Otherwise False is returned and the run should be refused.
+    """
+    if args.budget <= 0 or combination_count <= args.budget:
+        return True
+    message = 'The {} combinations exceed the budget of {}'.format(
+        combination_count, args.budget)
+    if args.over_budget == 'branch_bound' and switchable and \
+            args.search != 'branch_bound':
+        print('{}, switching to the "branch_bound" search'.format(message),
+              file=sys.stderr)
+        args.search = 'branch_bound'
+        return True
+    if args.over_budget == 'branch_bound' and not switchable:
+        message = '{}, and the search can not be switched to the' \
+            ' "branch_bound" search with these options'.format(message)
+    print('{}, refusing to run'.format(message), file=sys.stderr)
+    return False
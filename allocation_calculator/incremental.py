@@ -0,0 +1,162 @@
+# Native modules
+import copy
+import os
+import pickle
+
+# Project modules
+import allocation_calculator.calc as calc
+
+# Increase the version if the format of the store files is changed
+STORE_VERSION = 1
+
+
+def load_store(path):
+    """Load the store of the requirement results of the last run.
+
+    None is returned if the store file is missing, broken or has a different
+    version, then all combinations are scored.
+    """
+    try:
+        with open(path, 'rb') as stream:
+            store = pickle.load(stream)
+    except Exception:
+        return None
+    if not isinstance(store, dict) or store.get('version') != STORE_VERSION:
+        return None
+    return store
+
+
+def save_store(path, store):
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        with open(tmp_path, 'wb') as stream:
+            pickle.dump(store, stream, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def calc_best_results(data, funghi_combinations, store=None, max_results=0,
+                      engine='python'):
+    """Calculate the best results, reusing the requirement results of a store.
+
+    The store keeps the met requirements of every combination of the last run
+    as bitmaps. Only the combinations which are not in the store or have any
+    added or changed funghis are scored, the others are scored from the
+    bitmaps. The best results are the same as calc.calc_best_results. The new
+    store of this run and the number of scored combinations are returned too.
+    """
+    funghi_combinations = list(funghi_combinations)
+    bitmaps_list = [None] * len(funghi_combinations)
+    if store is not None and store['adventures'] == data['adventures']:
+        changed_funghi_ids = find_changed_funghis(store['funghis'],
+                                                  data['funghis'])
+        stored_bitmaps = store['bitmaps']
+        for combination_idx, combination in enumerate(funghi_combinations):
+            if is_combination_changed(combination, changed_funghi_ids):
+                continue
+            bitmaps_list[combination_idx] = stored_bitmaps.get(
+                gen_combination_key(combination))
+    # Score the combinations without bitmaps
+    scored_idxs = [combination_idx
+                   for combination_idx, bitmaps in enumerate(bitmaps_list)
+                   if bitmaps is None]
+    results = calc.calc_allocations_results(
+        data, [funghi_combinations[combination_idx]
+               for combination_idx in scored_idxs], engine)
+    for combination_idx, result in zip(scored_idxs, results):
+        bitmaps_list[combination_idx] = encode_requirement_report(
+            data, funghi_combinations[combination_idx],
+            result['requirement_report'])
+    scored_combinations = (
+        (combination, calc_bitmaps_result(data, combination, bitmaps))
+        for combination, bitmaps in zip(funghi_combinations, bitmaps_list))
+    best_results = calc.select_best_results(data, scored_combinations,
+                                            max_results)
+    new_store = {
+        'version': STORE_VERSION,
+        'adventures': copy.deepcopy(data['adventures']),
+        'funghis': copy.deepcopy(data['funghis']),
+        'bitmaps': {gen_combination_key(combination): bitmaps
+                    for combination, bitmaps
+                    in zip(funghi_combinations, bitmaps_list)},
+    }
+    return best_results, new_store, len(scored_idxs)
+
+
+def find_changed_funghis(old_funghis, new_funghis):
+    # The removed funghis are not in any new combinations
+    return {funghi_id for funghi_id, funghi in new_funghis.items()
+            if old_funghis.get(funghi_id) != funghi}
+
+
+def is_combination_changed(funghi_combination, changed_funghi_ids):
+    for adventure_allocation in funghi_combination.values():
+        for funghi_id in adventure_allocation:
+            if funghi_id in changed_funghi_ids:
+                return True
+    return False
+
+
+def gen_combination_key(funghi_combination):
+    # The met requirements do not depend on the order of the funghis
+    return tuple((adventure_id, tuple(sorted(adventure_allocation)))
+                 for adventure_id, adventure_allocation
+                 in funghi_combination.items())
+
+
+def encode_requirement_report(data, funghi_combination, requirement_report):
+    """Encode the met requirements of each adventure into a bitmap.
+
+    Each bit is a requirement in the order of the adventure spec. The bitmap
+    is None if the adventure is not in the requirement report, which means
+    an empty funghi is allocated.
+    """
+    adventures = data['adventures']
+    bitmaps = []
+    for adventure_id in funghi_combination:
+        if adventure_id not in requirement_report:
+            bitmaps.append(None)
+            continue
+        met_requirements = set(requirement_report[adventure_id])
+        bitmap = 0
+        requirements = adventures[adventure_id]['requirements']
+        for requirement_idx, requirement_id in enumerate(requirements):
+            if requirement_id in met_requirements:
+                bitmap |= 1 << requirement_idx
+        bitmaps.append(bitmap)
+    return tuple(bitmaps)
+
+
+def calc_bitmaps_result(data, funghi_combination, bitmaps):
+    """Calculate the result of the met requirement bitmaps.
+
+    The score is summed in the same order as calc.calc_allocation_result, so
+    it is exactly the same.
+    """
+    adventures = data['adventures']
+    rewards = data['rewards']
+    score = 0.0
+    requirement_report = {}
+    for adventure_id, bitmap in zip(funghi_combination, bitmaps):
+        if bitmap is None:
+            continue
+        adventure = adventures[adventure_id]
+        requirements = adventure['requirements']
+        met_requirements = []
+        for requirement_idx, (requirement_id, requirement) in \
+                enumerate(requirements.items()):
+            if bitmap >> requirement_idx & 1:
+                score += calc.calc_weighted_score(
+                    rewards, requirement['rewards'])
+                met_requirements.append(requirement_id)
+        # Add score of perfect reward if all requirements are met
+        if len(met_requirements) >= len(requirements):
+            score += calc.calc_weighted_score(
+                rewards, adventure['perfect_rewards'])
+        requirement_report[adventure_id] = met_requirements
+    return {
+        'score': score,
+        'requirement_report': requirement_report,
+    }
@@ -0,0 +1,168 @@
+# Project modules
+import allocation_calculator.calc as calc
+import allocation_calculator.progress as progress
+
+
+def gen_joint_best_results(all_data, engine='python', reporter=None):
+    """Generate the allocations with the max total score of all adventures.
+
+    Each data has a single adventure, and the funghis can not be used by more
+    than one adventure at the same time. All allocations of each adventure
+    are scored first, then the allocations of all adventures are chosen
+    jointly with branch and bound. Each output is a list of best results in
+    the same format as calc.calc_best_results. If the reporter of
+    progress.gen_reporter is specified, the progress is reported while the
+    allocations are scored.
+    """
+    candidate_lists = []
+    for data in all_data:
+        candidate_lists.append(gen_adventure_candidates(
+            data, engine, reporter))
+    funghis = all_data[0]['funghis']
+    state = {
+        'candidate_lists': candidate_lists,
+        'capacities': {funghi_id: funghi['capacity']
+                       for funghi_id, funghi in funghis.items()},
+        'used_counts': {},
+        'max_scores': [candidates[0]['score']
+                       for candidates in candidate_lists],
+        'best_score': None,
+        'chosen': [],
+    }
+    # Find the max total score first, then generate all allocations which
+    # achieve it
+    search_max_total_score(state, 0, 0.0)
+    yield from gen_max_total_allocations(state, 0, 0.0)
+
+
+def gen_adventure_candidates(data, engine='python', reporter=None):
+    adventure_id, adventure = next(iter(data['adventures'].items()))
+    total_adventure_capacity = calc.calc_total_adventure_capacity(data)
+    total_funghi_capacity = calc.calc_total_funghi_capacity(data)
+    funghi_combinations = calc.gen_funghi_combinations(
+        data, total_adventure_capacity, total_funghi_capacity)
+    # The progress is reported while the combinations are scored
+    if reporter is not None:
+        funghi_combinations = progress.gen_reported_combinations(
+            funghi_combinations, reporter)
+    # The combinations are streamed, so only the candidates are kept
+    candidates = []
+    for combination, result in calc.gen_scored_combinations(
+            data, funghi_combinations, engine):
+        # The allocations without any score are never better than the empty
+        # allocation, which does not use any funghis
+        if result['score'] <= 0.0:
+            continue
+        candidates.append(gen_candidate(data, combination, result))
+    # Sort the candidates by score, then by success rate
+    candidates.sort(key=lambda c: (c['score'], c['success_rate']),
+                    reverse=True)
+    # Add the empty allocation so that every adventure can be allocated
+    empty_combination = {adventure_id: [calc.EMPTY_ID] * adventure['capacity']}
+    empty_result = {
+        'score': 0.0,
+        'requirement_report': {adventure_id: []},
+    }
+    candidates.append(gen_candidate(data, empty_combination, empty_result))
+    return candidates
+
+
+def gen_candidate(data, combination, result):
+    used_counts = {}
+    for funghi_ids in combination.values():
+        for funghi_id in funghi_ids:
+            if funghi_id == calc.EMPTY_ID:
+                continue
+            used_counts[funghi_id] = used_counts.get(funghi_id, 0) + 1
+    return {
+        'score': result['score'],
+        'success_rate': calc.calc_success_rate(data, result),
+        'combination': combination,
+        'requirement_report': result['requirement_report'],
+        'used_counts': used_counts,
+    }
+
+
+def is_candidate_available(state, candidate):
+    capacities = state['capacities']
+    used_counts = state['used_counts']
+    for funghi_id, count in candidate['used_counts'].items():
+        if used_counts.get(funghi_id, 0) + count > capacities[funghi_id]:
+            return False
+    return True
+
+
+def add_used_counts(state, candidate, sign):
+    used_counts = state['used_counts']
+    for funghi_id, count in candidate['used_counts'].items():
+        used_counts[funghi_id] = used_counts.get(funghi_id, 0) + sign * count
+
+
+def calc_static_bound(state, depth, total_score):
+    # Add the max score of each following adventure
+    bound = total_score
+    for max_score in state['max_scores'][depth:]:
+        bound += max_score
+    return bound
+
+
+def calc_bound(state, depth, total_score):
+    # Add the score of the best available allocation of each following
+    # adventure, ignoring the funghis shared between them
+    bound = total_score
+    for candidates in state['candidate_lists'][depth:]:
+        for candidate in candidates:
+            if is_candidate_available(state, candidate):
+                bound += candidate['score']
+                break
+    return bound
+
+
+def search_max_total_score(state, depth, total_score):
+    candidate_lists = state['candidate_lists']
+    if depth >= len(candidate_lists):
+        if state['best_score'] is None or total_score > state['best_score']:
+            state['best_score'] = total_score
+        return
+    for candidate in candidate_lists[depth]:
+        next_total_score = total_score + candidate['score']
+        best_score = state['best_score']
+        # The following candidates have lower scores, so they can be pruned
+        # as well
+        if best_score is not None and calc_static_bound(
+                state, depth + 1, next_total_score) <= best_score:
+            break
+        if not is_candidate_available(state, candidate):
+            continue
+        add_used_counts(state, candidate, 1)
+        if best_score is None or calc_bound(
+                state, depth + 1, next_total_score) > best_score:
+            search_max_total_score(state, depth + 1, next_total_score)
+        add_used_counts(state, candidate, -1)
+
+
+def gen_max_total_allocations(state, depth, total_score):
+    candidate_lists = state['candidate_lists']
+    best_score = state['best_score']
+    if depth >= len(candidate_lists):
+        if total_score >= best_score:
+            yield [{
+                'max_score': candidate['score'],
+                'results': [(candidate['combination'],
+                             candidate['success_rate'],
+                             candidate['requirement_report'])],
+            } for candidate in state['chosen']]
+        return
+    for candidate in candidate_lists[depth]:
+        next_total_score = total_score + candidate['score']
+        if calc_static_bound(state, depth + 1, next_total_score) < best_score:
+            break
+        if not is_candidate_available(state, candidate):
+            continue
+        add_used_counts(state, candidate, 1)
+        if calc_bound(state, depth + 1, next_total_score) >= best_score:
+            state['chosen'].append(candidate)
+            yield from gen_max_total_allocations(
+                state, depth + 1, next_total_score)
+            state['chosen'].pop()
+        add_used_counts(state, candidate, -1)
@@ -0,0 +1,137 @@
+# Native modules
+import hashlib
+import os
+import pickle
+
+# Third-party modules
+import yaml
+
+# Project modules
+import allocation_calculator.calc as calc
+import allocation_calculator.profiler as profiler
+
+# Increase the version if the format of the compiled specs is changed
+CACHE_VERSION = 1
+CACHE_SUFFIX = '.cache'
+# Use the C loader if pyyaml is built with libyaml
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+SPEC_NORMALIZERS = {
+    'adventures': calc.normalize_adventures,
+    'funghis': calc.normalize_funghis,
+}
+# The compiled specs which have been loaded in this process, keyed by path
+LOADED_SPECS = {}
+
+
+def parse_yaml(stream):
+    return yaml.load(stream, Loader=YAML_LOADER)
+
+
+def load_data(adventures_path, funghis_path, rewards_path, use_cache=True):
+    return {
+        'adventures': load_spec(adventures_path, 'adventures', use_cache),
+        'funghis': load_spec(funghis_path, 'funghis', use_cache),
+        'rewards': load_spec(rewards_path, 'rewards', use_cache),
+    }
+
+
+def load_data_dir(data_dir, funghis_path, use_cache=True):
+    adventures_path = os.path.join(data_dir, 'adventures.yaml')
+    rewards_path = os.path.join(data_dir, 'rewards.yaml')
+    return load_data(adventures_path, funghis_path, rewards_path, use_cache)
+
+
+def calc_data_dir_hash(data_dir, funghis_path):
+    """Calculate the content hash of the spec files of the data directory."""
+    content_hash = hashlib.sha256()
+    for path in [os.path.join(data_dir, 'adventures.yaml'), funghis_path,
+                 os.path.join(data_dir, 'rewards.yaml')]:
+        with open(path, 'rb') as stream:
+            content_hash.update(hashlib.sha256(stream.read()).digest())
+    return content_hash.hexdigest()
+
+
+def load_spec(path, spec_name, use_cache=True):
+    """Load a normalized spec, a new copy is returned every time.
+
+    The normalized spec is compiled into a cache file next to the spec file,
+    so that the following runs can skip parsing YAML. The cache file is
+    invalidated if the cache version or the content hash of the spec file is
+    changed, the content hash is only calculated if the modified time is
+    changed.
+    """
+    if not use_cache:
+        with open(path, 'rb') as stream:
+            return parse_spec(stream.read(), spec_name)
+    stat = os.stat(path)
+    key = (os.path.abspath(path), spec_name)
+    compiled = LOADED_SPECS.get(key)
+    if compiled is None or not is_compiled_spec_fresh(compiled, stat):
+        compiled = load_compiled_spec(path, spec_name, stat)
+        LOADED_SPECS[key] = compiled
+    return pickle.loads(compiled['spec'])
+
+
+def parse_spec(content, spec_name):
+    spec = parse_yaml(content)
+    # The spec is None if the file only contains comments
+    if isinstance(spec, dict) and spec_name in SPEC_NORMALIZERS:
+        with profiler.phase('normalize'):
+            SPEC_NORMALIZERS[spec_name](spec)
+    return spec
+
+
+def is_compiled_spec_fresh(compiled, stat):
+    return compiled['mtime'] == stat.st_mtime_ns and \
+        compiled['size'] == stat.st_size
+
+
+def load_compiled_spec(path, spec_name, stat):
+    cache_path = path + CACHE_SUFFIX
+    compiled = read_compiled_spec(cache_path, spec_name)
+    if compiled is not None and is_compiled_spec_fresh(compiled, stat):
+        return compiled
+    with open(path, 'rb') as stream:
+        content = stream.read()
+    content_hash = hashlib.sha256(content).hexdigest()
+    # Parse the spec file again only if the content is changed
+    if compiled is None or compiled['hash'] != content_hash:
+        spec = parse_spec(content, spec_name)
+        compiled = {
+            'version': CACHE_VERSION,
+            'spec_name': spec_name,
+            'hash': content_hash,
+            'spec': pickle.dumps(spec, protocol=pickle.HIGHEST_PROTOCOL),
+        }
+    compiled['mtime'] = stat.st_mtime_ns
+    compiled['size'] = stat.st_size
+    write_compiled_spec(cache_path, compiled)
+    return compiled
+
+
+def read_compiled_spec(cache_path, spec_name):
+    try:
+        with open(cache_path, 'rb') as stream:
+            compiled = pickle.load(stream)
+    except Exception:
+        # The cache file is missing or broken
+        return None
+    if not isinstance(compiled, dict) or \
+            compiled.get('version') != CACHE_VERSION or \
+            compiled.get('spec_name') != spec_name:
+        return None
+    return compiled
+
+
+def write_compiled_spec(cache_path, compiled):
+    # Write to a temporary file first, so that other processes never read a
+    # partially written cache file
+    tmp_path = '{}.{}.tmp'.format(cache_path, os.getpid())
+    try:
+        with open(tmp_path, 'wb') as stream:
+            pickle.dump(compiled, stream, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # The cache is optional, e.g. the directory may be read-only
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,141 @@
+# Project modules
+import allocation_calculator.profiler as profiler
+
+# The positions of the specs in a funghi record
+STATS_IDX = 0
+SKILLS_IDX = 1
+
+
+def gen_spec_idxs(data, spec):
+    """Intern the spec names of the funghis and the requirements.
+
+    Each name is mapped to a small index, so that the specs of a funghi can
+    be kept in a tuple instead of a dict.
+    """
+    spec_names = set()
+    for funghi in data['funghis'].values():
+        spec_names.update(funghi[spec])
+    for adventure in data['adventures'].values():
+        for requirement in adventure['requirements'].values():
+            for req_spec_obj in requirement[spec]:
+                spec_names.update(req_spec_obj)
+            if spec == 'stats':
+                spec_names.update(requirement.get('reduce_stats', {}))
+    return {spec_name: idx
+            for idx, spec_name in enumerate(sorted(spec_names))}
+
+
+def compile_funghi(funghi, stat_idxs, skill_idxs):
+    """Compile a funghi into a record of its stat values and skill values.
+
+    The values are in the order of the spec indices, and the missing specs
+    are None so that they fail any threshold.
+    """
+    return (compile_specs(funghi['stats'], stat_idxs),
+            compile_specs(funghi['skills'], skill_idxs))
+
+
+def compile_specs(funghi_specs, spec_idxs):
+    spec_values = [None] * len(spec_idxs)
+    # The normalized specs are empty lists if they are not specified
+    for spec_name in funghi_specs:
+        spec_values[spec_idxs[spec_name]] = funghi_specs[spec_name]
+    return tuple(spec_values)
+
+
+def compile_requirement(requirement, stat_idxs, skill_idxs):
+    """Compile a requirement into tuples of spec indices and thresholds.
+
+    The record is (stat spec objects, skill spec objects, reduce targets),
+    each spec object is a tuple of (index, threshold) pairs, and each reduce
+    target is a (index, target) pair.
+    """
+    reduce_stats = requirement.get('reduce_stats', {})
+    return (
+        compile_spec_objs(requirement['stats'], stat_idxs),
+        compile_spec_objs(requirement['skills'], skill_idxs),
+        tuple((stat_idxs[stat_name], reduce_target)
+              for stat_name, reduce_target in reduce_stats.items()),
+    )
+
+
+def compile_spec_objs(req_specs, spec_idxs):
+    return tuple(
+        tuple((spec_idxs[spec_name], spec_value)
+              for spec_name, spec_value in req_spec_obj.items())
+        for req_spec_obj in req_specs)
+
+
+def is_requirement_met(requirement_record, funghi_records):
+    if profiler.ENABLED:
+        profiler.count('requirement_checks')
+    stat_spec_objs, skill_spec_objs, reduce_targets = requirement_record
+    return is_spec_objs_met(stat_spec_objs, funghi_records, STATS_IDX) and \
+        is_spec_objs_met(skill_spec_objs, funghi_records, SKILLS_IDX) and \
+        is_reduce_targets_met(reduce_targets, funghi_records)
+
+
+def is_spec_objs_met(spec_objs, funghi_records, spec_idx):
+    # Like calc.is_non_reduce_requirement_met, each spec object has to be
+    # paired to a different funghi which passes all the specs in it
+    if len(spec_objs) > len(funghi_records):
+        return True
+    feasibility_matrix = []
+    for spec_obj in spec_objs:
+        feasible_funghi_idxs = []
+        for funghi_idx, funghi_record in enumerate(funghi_records):
+            spec_values = funghi_record[spec_idx]
+            is_feasible = True
+            for idx, threshold in spec_obj:
+                spec_value = spec_values[idx]
+                if spec_value is None or spec_value < threshold:
+                    is_feasible = False
+                    break
+            if is_feasible:
+                feasible_funghi_idxs.append(funghi_idx)
+        feasibility_matrix.append(feasible_funghi_idxs)
+    return is_spec_matching_found(feasibility_matrix, len(funghi_records))
+
+
+def is_spec_matching_found(feasibility_matrix, funghi_size):
+    # Pair each spec object to a funghi, or fail if no augmenting path can be
+    # found (Kuhn's algorithm)
+    matched_spec_idxs = [None] * funghi_size
+    for spec_idx in range(len(feasibility_matrix)):
+        visited_funghi_idxs = set()
+        if not find_augmenting_path(feasibility_matrix, spec_idx,
+                                    matched_spec_idxs, visited_funghi_idxs):
+            return False
+    return True
+
+
+def find_augmenting_path(feasibility_matrix, spec_idx, matched_spec_idxs,
+                         visited_funghi_idxs):
+    for funghi_idx in feasibility_matrix[spec_idx]:
+        if funghi_idx in visited_funghi_idxs:
+            continue
+        visited_funghi_idxs.add(funghi_idx)
+        if profiler.ENABLED:
+            profiler.count('matching_steps')
+        # Use the funghi if it is free or its spec object can be paired to
+        # another funghi
+        matched_spec_idx = matched_spec_idxs[funghi_idx]
+        if matched_spec_idx is None or \
+                find_augmenting_path(feasibility_matrix, matched_spec_idx,
+                                     matched_spec_idxs, visited_funghi_idxs):
+            matched_spec_idxs[funghi_idx] = spec_idx
+            return True
+    return False
+
+
+def is_reduce_targets_met(reduce_targets, funghi_records):
+    # Check whether the sum of each stat over all funghis passes the target
+    for stat_idx, reduce_target in reduce_targets:
+        reduced_sum = 0
+        for funghi_record in funghi_records:
+            stat_value = funghi_record[STATS_IDX][stat_idx]
+            if stat_value is not None:
+                reduced_sum += stat_value
+        if reduced_sum < reduce_target:
+            return False
+    return True
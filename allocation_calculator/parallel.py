@@ -0,0 +1,106 @@
+# Native modules
+import concurrent.futures
+import contextlib
+import itertools
+import pickle
+
+# Project modules
+import allocation_calculator.calc as calc
+
+# The search which is being scored by the worker process, it is unpickled
+# again only when another search is sent
+WORKER_STATE = {}
+# The shards sent to each worker at once
+CHUNKS_PER_WORKER = 4
+
+
+@contextlib.contextmanager
+def open_pool(workers):
+    """Open a process pool to be shared by the searches of a run.
+
+    None is given if there is only one worker, so the searches are scored in
+    this process.
+    """
+    if workers <= 1:
+        yield None
+        return
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers) as executor:
+        yield executor
+
+
+def calc_best_results(data, adventure_capacity, funghi_capacity,
+                      max_results=0, engine='python', workers=1,
+                      executor=None):
+    """Calculate the best results with a process pool.
+
+    The combinations are split into disjoint shards by the first pointer of
+    the first adventure. Each shard is scored in a worker process, and the
+    best results of the shards are merged in the order of the shards, so the
+    output is the same as calc.calc_best_results. The pool of open_pool is
+    reused if the executor is specified, otherwise a pool is opened for this
+    search only.
+    """
+    if executor is None:
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers) as executor:
+            return calc_best_results(
+                data, adventure_capacity, funghi_capacity, max_results,
+                engine, workers, executor)
+    first_adventure = next(iter(data['adventures'].values()))
+    candidates = calc.gen_funghi_candidates(
+        data, adventure_capacity, funghi_capacity)
+    first_pointers = calc.gen_first_pointers(
+        candidates, first_adventure['capacity'])
+    # The search is pickled once, and the shards are sent in chunks, so it is
+    # only copied once in each chunk
+    search_dump = pickle.dumps(
+        (data, adventure_capacity, funghi_capacity, max_results, engine),
+        protocol=pickle.HIGHEST_PROTOCOL)
+    chunk_size = max(1, len(first_pointers) // (workers * CHUNKS_PER_WORKER))
+    shard_best_results = list(executor.map(
+        calc_shard_best_results, itertools.repeat(search_dump),
+        first_pointers, chunksize=chunk_size))
+    return merge_best_results(shard_best_results, max_results)
+
+
+def calc_shard_best_results(search_dump, first_pointer):
+    if WORKER_STATE.get('search_dump') != search_dump:
+        WORKER_STATE['search_dump'] = search_dump
+        WORKER_STATE['search'] = pickle.loads(search_dump)
+    data, adventure_capacity, funghi_capacity, max_results, engine = \
+        WORKER_STATE['search']
+    funghi_combinations = calc.gen_funghi_combinations(
+        data, adventure_capacity, funghi_capacity, first_pointer)
+    return calc.calc_best_results(data, funghi_combinations, max_results,
+                                  engine)
+
+
+def merge_best_results(shard_best_results, max_results=0):
+    # Only the shards which have results can have the max score
+    shard_best_results = [best_results for best_results in shard_best_results
+                          if best_results['result_count'] > 0]
+    if len(shard_best_results) <= 0:
+        return {
+            'max_score': 0.0,
+            'results': [],
+            'result_count': 0,
+        }
+    max_score = max(best_results['max_score']
+                    for best_results in shard_best_results)
+    results = []
+    result_count = 0
+    for best_results in shard_best_results:
+        if best_results['max_score'] >= max_score:
+            results.extend(best_results['results'])
+            result_count += best_results['result_count']
+    # The sort is stable, so the results with the same success rate are kept
+    # in the order of the shards, which is the order of the combinations
+    results.sort(key=lambda t: t[1], reverse=True)
+    if max_results > 0:
+        results = results[:max_results]
+    return {
+        'max_score': max_score,
+        'results': results,
+        'result_count': result_count,
+    }
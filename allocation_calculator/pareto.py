@@ -0,0 +1,162 @@
+# Native modules
+import heapq
+import itertools
+
+# Project modules
+import allocation_calculator.calc as calc
+
+# The number of combinations scored at once, the results of a chunk are
+# dropped once their reward totals are added
+DEFAULT_CHUNK_SIZE = 4096
+
+
+def calc_frontier(data, funghi_combinations, max_results=0, engine='python',
+                  chunk_size=DEFAULT_CHUNK_SIZE):
+    """Calculate the Pareto frontier of the reward totals of the combinations.
+
+    The combinations are grouped by how many of each reward they get, and a
+    group is on the frontier if no other group gets at least as many of
+    every reward and more of any reward. The frontier does not depend on the
+    importance values of the rewards, so it is calculated once and the
+    values can be chosen afterwards. Each point of the frontier keeps its
+    combinations like calc.select_best_results, and the points are sorted by
+    the score with the current importance values. The points are pruned as
+    soon as they are dominated, so only the combinations of the frontier
+    found so far are kept.
+    """
+    reward_names = list(data['rewards'])
+    reward_idxs = {reward_name: idx
+                   for idx, reward_name in enumerate(reward_names)}
+    points = {}
+    dominated_totals = set()
+    seq = 0
+    iterator = iter(funghi_combinations)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if len(chunk) <= 0:
+            break
+        results = calc.calc_allocations_results(data, chunk, engine)
+        for funghi_combination, result in zip(chunk, results):
+            requirement_report = result['requirement_report']
+            totals = calc_reward_totals(data, reward_idxs, requirement_report)
+            seq += 1
+            if totals not in points:
+                if not update_frontier(points, dominated_totals, totals):
+                    continue
+                points[totals] = {
+                    'totals': totals,
+                    'score': result['score'],
+                    'heap': [],
+                    'result_count': 0,
+                }
+            add_point_result(points[totals], (
+                calc.calc_success_rate(data, result), -seq,
+                funghi_combination, requirement_report), max_results)
+    frontier_points = list(points.values())
+    frontier_points.sort(key=lambda point: (point['score'], point['totals']),
+                         reverse=True)
+    return {
+        'reward_names': reward_names,
+        'points': [gen_frontier_point(point) for point in frontier_points],
+    }
+
+
+def calc_reward_totals(data, reward_idxs, requirement_report):
+    adventures = data['adventures']
+    totals = [0] * len(reward_idxs)
+    for adventure_id, met_requirements in requirement_report.items():
+        adventure = adventures[adventure_id]
+        requirements = adventure['requirements']
+        reward_specs = [requirements[requirement_id]['rewards']
+                        for requirement_id in met_requirements]
+        # Add the perfect rewards if all requirements are met
+        if len(met_requirements) >= len(requirements):
+            reward_specs.append(adventure['perfect_rewards'])
+        for req_rewards in reward_specs:
+            for reward_name, reward_value in req_rewards.items():
+                if reward_name not in reward_idxs:
+                    raise ValueError(
+                        'Could not find "{}" in rewards'.format(reward_name))
+                totals[reward_idxs[reward_name]] += reward_value
+    return tuple(totals)
+
+
+def add_point_result(point, item, max_results):
+    # Keep the combinations of the point like calc.select_best_results
+    point['result_count'] += 1
+    heap = point['heap']
+    if max_results <= 0:
+        heap.append(item)
+    elif len(heap) < max_results:
+        heapq.heappush(heap, item)
+    else:
+        heapq.heappushpop(heap, item)
+
+
+def update_frontier(points, dominated_totals, totals):
+    """Check whether the new totals are on the frontier found so far.
+
+    The totals are only compared with the points on the frontier. The
+    points dominated by the new totals are removed with their combinations,
+    and the dominated totals are remembered, so the later combinations with
+    them are skipped without comparing them again.
+    """
+    if totals in dominated_totals:
+        return False
+    for frontier_totals in points:
+        if is_dominated(totals, frontier_totals):
+            dominated_totals.add(totals)
+            return False
+    for frontier_totals in list(points):
+        if is_dominated(frontier_totals, totals):
+            dominated_totals.add(frontier_totals)
+            del points[frontier_totals]
+    return True
+
+
+def is_dominated(point, other_point):
+    # The other point is at least as good in every value, and the points are
+    # distinct
+    for value, other_value in zip(point, other_point):
+        if value > other_value:
+            return False
+    return point != other_point
+
+
+def gen_frontier_point(point):
+    heap = point['heap']
+    # Sort the combinations by success rate
+    heap.sort(key=lambda t: (t[0], t[1]), reverse=True)
+    return {
+        'totals': point['totals'],
+        'score': point['score'],
+        'results': [(combination, success_rate, req_report)
+                    for success_rate, _, combination, req_report in heap],
+        'result_count': point['result_count'],
+    }
+
+
+def print_frontier(data, frontier, report_score=True,
+                   report_success_rate=True, report_failed_requirement=True):
+    reward_names = frontier['reward_names']
+    points = frontier['points']
+    print('Pareto frontier ({}):'.format(len(points)))
+    for idx, point in enumerate(points):
+        print('#{}'.format(idx + 1))
+        rewards = ['{} x {}'.format(reward_name, total)
+                   for reward_name, total in zip(reward_names, point['totals'])
+                   if total != 0]
+        if len(rewards) <= 0:
+            rewards = ['<NONE>']
+        print('Rewards: {}'.format(', '.join(rewards)))
+        if report_score:
+            print('Score: {}'.format(point['score']))
+        results = point['results']
+        print('Allocations ({} of {}):'.format(len(results),
+                                               point['result_count']))
+        for combination, success_rate, req_report in results:
+            if report_success_rate:
+                print('Success rate: {:.2f}%'.format(success_rate))
+            calc.print_best_allocation(data, combination, req_report,
+                                       report_failed_requirement)
+        print()
@@ -0,0 +1,114 @@
+# Native modules
+import contextlib
+import sys
+import time
+
+# The hot paths only check this flag when the profiler is disabled
+ENABLED = False
+COUNTERS = {}
+PHASE_TIMES = {}
+# Each item is [phase, start time], only the top phase is running
+PHASE_STACK = []
+COUNTER_DESCRIPTIONS = {
+    'combinations': 'combinations generated',
+    'rejected_combinations': 'combinations rejected by allowed funghis',
+    'scored_combinations': 'combinations scored',
+    'requirement_checks': 'requirement checks',
+    'matching_steps': 'augmenting path steps of spec matching',
+    'deepcopies': 'deepcopies of augmented funghis',
+}
+
+
+def enable():
+    global ENABLED
+    ENABLED = True
+    reset()
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def reset():
+    COUNTERS.clear()
+    PHASE_TIMES.clear()
+    del PHASE_STACK[:]
+
+
+def count(name, value=1):
+    COUNTERS[name] = COUNTERS.get(name, 0) + value
+
+
+def start_phase(phase):
+    now = time.perf_counter()
+    # Pause the outer phase, so that the time of each phase is exclusive
+    if len(PHASE_STACK) > 0:
+        pause_top_phase(now)
+    PHASE_STACK.append([phase, now])
+
+
+def end_phase():
+    now = time.perf_counter()
+    pause_top_phase(now)
+    PHASE_STACK.pop()
+    # Resume the outer phase
+    if len(PHASE_STACK) > 0:
+        PHASE_STACK[-1][1] = now
+
+
+def pause_top_phase(now):
+    phase, start = PHASE_STACK[-1]
+    PHASE_TIMES[phase] = PHASE_TIMES.get(phase, 0.0) + now - start
+    PHASE_STACK[-1][1] = now
+
+
+@contextlib.contextmanager
+def phase(name):
+    if not ENABLED:
+        yield
+        return
+    start_phase(name)
+    try:
+        yield
+    finally:
+        end_phase()
+
+
+def gen_timed_items(items, phase):
+    """Time the generation of each item in the phase.
+
+    The items are returned as they are if the profiler is disabled.
+    """
+    if not ENABLED:
+        return items
+    return gen_timed_items_logic(iter(items), phase)
+
+
+def gen_timed_items_logic(iterator, phase):
+    while True:
+        start_phase(phase)
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            end_phase()
+        yield item
+
+
+def gen_report():
+    return {
+        'counters': dict(COUNTERS),
+        'phases': dict(PHASE_TIMES),
+    }
+
+
+def print_report(file=sys.stderr):
+    report = gen_report()
+    print('Profile:', file=file)
+    for phase, seconds in report['phases'].items():
+        print('  {}: {:.3f}s'.format(phase, seconds), file=file)
+    for name, value in report['counters'].items():
+        description = COUNTER_DESCRIPTIONS.get(name, name)
+        print('  {}: {}'.format(description, value), file=file)
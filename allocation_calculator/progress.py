@@ -0,0 +1,115 @@
+# Native modules
+import sys
+import time
+
+# The time is only checked once in this number of combinations
+CHECK_STEP = 256
+
+
+def gen_reporter(total=None, interval=1.0, file=sys.stderr):
+    """Generate the state of a progress reporter.
+
+    If the total number of combinations is known, the percentage and the ETA
+    are reported too. The progress is reported at most once in each interval
+    of seconds. On a terminal the same line is updated, otherwise each report
+    is a new line.
+    """
+    now = time.perf_counter()
+    return {
+        'total': total,
+        'interval': interval,
+        'file': file,
+        'is_tty': file.isatty(),
+        'start': now,
+        'last_report': now,
+        'count': 0,
+        'next_check': CHECK_STEP,
+        'best_score': None,
+        'label': None,
+    }
+
+
+def gen_reported_combinations(funghi_combinations, reporter):
+    """Report the progress while the combinations are generated.
+
+    The combinations are yielded as they are.
+    """
+    for funghi_combination in funghi_combinations:
+        reporter['count'] += 1
+        if reporter['count'] >= reporter['next_check']:
+            reporter['next_check'] += CHECK_STEP
+            report(reporter)
+        yield funghi_combination
+
+
+def gen_best_scored_combinations(scored_combinations, reporter):
+    """Keep the best score of the scored combinations in the reporter.
+
+    The scored combinations are yielded as they are. The best score is reset
+    so that it is the best score of the current search.
+    """
+    reporter['best_score'] = None
+    for funghi_combination, result in scored_combinations:
+        score = result['score']
+        if reporter['best_score'] is None or score > reporter['best_score']:
+            reporter['best_score'] = score
+        yield funghi_combination, result
+
+
+def report(reporter, force=False):
+    now = time.perf_counter()
+    if not force and now - reporter['last_report'] < reporter['interval']:
+        return
+    reporter['last_report'] = now
+    line = gen_report_line(reporter, now)
+    if reporter['is_tty']:
+        print('\r\033[K' + line, end='', file=reporter['file'], flush=True)
+    else:
+        print(line, file=reporter['file'], flush=True)
+
+
+def gen_report_line(reporter, now):
+    count = reporter['count']
+    total = reporter['total']
+    elapsed = now - reporter['start']
+    throughput = None
+    if elapsed > 0.0:
+        throughput = count / elapsed
+    parts = []
+    if reporter['label'] is not None:
+        parts.append(reporter['label'])
+    if total is None:
+        parts.append('{} combinations'.format(count))
+    else:
+        percentage = 100.0
+        if total > 0:
+            percentage = min(count / total * 100.0, 100.0)
+        parts.append('{}/{} combinations ({:.1f}%)'.format(
+            count, total, percentage))
+    if throughput is not None:
+        parts.append('{:.0f} combinations/s'.format(throughput))
+    if reporter['best_score'] is not None:
+        parts.append('best score {}'.format(reporter['best_score']))
+    if total is not None and throughput is not None and throughput > 0.0:
+        seconds = max(total - count, 0) / throughput
+        parts.append('ETA {}'.format(format_duration(seconds)))
+    return 'Progress: {}'.format(', '.join(parts))
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return 'unknown'
+    if seconds < 60.0:
+        return '{:.1f}s'.format(seconds)
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours <= 0:
+        return '{}m{:02d}s'.format(minutes, seconds)
+    return '{}h{:02d}m{:02d}s'.format(hours, minutes, seconds)
+
+
+def finish(reporter):
+    # Always report the last progress, and end the line on a terminal
+    report(reporter, force=True)
+    if reporter['is_tty']:
+        print(file=reporter['file'], flush=True)
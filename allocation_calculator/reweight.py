@@ -0,0 +1,71 @@
+# Project modules
+import allocation_calculator.calc as calc
+import allocation_calculator.incremental as incremental
+
+
+def gen_store_data(store, rewards):
+    # The adventures and the funghis are the ones of the stored run
+    return {
+        'adventures': store['adventures'],
+        'funghis': store['funghis'],
+        'rewards': rewards,
+    }
+
+
+def calc_best_results(data, store, max_results=0, engine='python'):
+    """Calculate the best results of new rewards from a store.
+
+    Whether a requirement is met does not depend on the rewards, so no
+    requirements are checked. The met requirement bitmaps of the last run
+    are scored with the new rewards instead, and only the combinations with
+    the max score are reported. The best results are the same as
+    calc.calc_best_results with the new rewards.
+    """
+    funghi_combinations, bitmaps_list = gen_stored_bitmaps(data, store)
+    scores = calc_bitmaps_scores(data, funghi_combinations, bitmaps_list,
+                                 engine)
+    if len(scores) <= 0:
+        return calc.select_best_results(data, [], max_results)
+    max_score = max(scores)
+    scored_combinations = (
+        (combination, incremental.calc_bitmaps_result(data, combination,
+                                                      bitmaps))
+        for combination, bitmaps, score
+        in zip(funghi_combinations, bitmaps_list, scores)
+        if score >= max_score)
+    return calc.select_best_results(data, scored_combinations, max_results)
+
+
+def gen_stored_bitmaps(data, store):
+    # The stored combinations are generated again, so that the funghis in
+    # each allocation are in the same order as the last run
+    funghi_combinations = list(calc.gen_funghi_combinations(
+        data, calc.calc_total_adventure_capacity(data),
+        calc.calc_total_funghi_capacity(data)))
+    stored_bitmaps = store['bitmaps']
+    bitmaps_list = []
+    for combination in funghi_combinations:
+        key = incremental.gen_combination_key(combination)
+        if key not in stored_bitmaps:
+            raise ValueError('The store does not have all combinations of'
+                             ' its funghis, please run again to update it')
+        bitmaps_list.append(stored_bitmaps[key])
+    return funghi_combinations, bitmaps_list
+
+
+def calc_bitmaps_scores(data, funghi_combinations, bitmaps_list,
+                        engine='python'):
+    if engine == 'numpy':
+        batch = calc.import_batch_engine()
+        return batch.calc_bitmaps_scores(data, funghi_combinations,
+                                         bitmaps_list)
+    # Many combinations meet the same requirements, so each set of bitmaps
+    # is scored once
+    scores = []
+    bitmaps_scores = {}
+    for combination, bitmaps in zip(funghi_combinations, bitmaps_list):
+        if bitmaps not in bitmaps_scores:
+            bitmaps_scores[bitmaps] = incremental.calc_bitmaps_result(
+                data, combination, bitmaps)['score']
+        scores.append(bitmaps_scores[bitmaps])
+    return scores
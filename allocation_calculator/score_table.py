@@ -0,0 +1,302 @@
+# Native modules
+import hashlib
+import itertools
+import math
+import mmap
+import os
+import pickle
+import struct
+
+# Project modules
+import allocation_calculator.calc as calc
+import allocation_calculator.incremental as incremental
+import allocation_calculator.profiler as profiler
+
+# Increase the version if the format of the table files is changed
+TABLE_VERSION = 3
+TABLE_MAGIC = b'FGST'
+# The tables are named by the hashes of the adventure specs, so they are
+# shared by all data directories
+TABLE_DIR = 'score_tables'
+# Magic, version, adventure hash, capacity, roster size and record count,
+# followed by the pickled roster and funghi IDs, and the records
+HEADER_STRUCT = struct.Struct('<4sI32sIII')
+# The met requirements are kept in a 64-bit bitmap
+MAX_REQUIREMENT_SIZE = 64
+# Each record has about 32 bytes, so a table is at most about 64 MB
+MAX_RECORD_SIZE = 2000000
+# The tables which have been mapped by this process
+LOADED_TABLES = {}
+
+
+def calc_allocations_results(data, funghi_combinations):
+    return [result for _, result
+            in gen_scored_combinations(data, funghi_combinations)]
+
+
+def gen_scored_combinations(data, funghi_combinations):
+    """Generate the results of the combinations from the score tables.
+
+    The requirements are not checked, the met requirements of each adventure
+    allocation are looked up in the score table of the adventure, which is
+    built first if it is missing or out of date.
+    """
+    tables = {adventure_id: gen_table(data, adventure_id)
+              for adventure_id in data['adventures']}
+    for funghi_combination in funghi_combinations:
+        if profiler.ENABLED:
+            profiler.count('scored_combinations')
+        yield funghi_combination, calc_table_result(data, tables,
+                                                    funghi_combination)
+
+
+def calc_table_result(data, tables, funghi_combination):
+    if len(funghi_combination) == 1:
+        # The stored score is exactly the score of a single adventure
+        adventure_id, adventure_allocation = \
+            next(iter(funghi_combination.items()))
+        if calc.EMPTY_ID in adventure_allocation:
+            return {
+                'score': 0.0,
+                'requirement_report': {},
+            }
+        table = tables[adventure_id]
+        score, _, bitmap = lookup_record(table, adventure_allocation)
+        return {
+            'score': score,
+            'requirement_report': {
+                adventure_id: [
+                    requirement_id for requirement_idx, requirement_id
+                    in enumerate(table['requirement_ids'])
+                    if bitmap >> requirement_idx & 1],
+            },
+        }
+    # The scores of several adventures are summed from the bitmaps, so they
+    # are added in the same order as calc.calc_allocation_result
+    bitmaps = []
+    for adventure_id, adventure_allocation in funghi_combination.items():
+        if calc.EMPTY_ID in adventure_allocation:
+            bitmaps.append(None)
+        else:
+            bitmaps.append(lookup_record(tables[adventure_id],
+                                         adventure_allocation)[2])
+    return incremental.calc_bitmaps_result(data, funghi_combination,
+                                           tuple(bitmaps))
+
+
+def lookup_record(table, adventure_allocation):
+    # The records are (funghi IDs..., score, met count, met bitmap)
+    record_struct = table['record_struct']
+    record = record_struct.unpack_from(
+        table['buffer'], calc_record_offset(table, adventure_allocation))
+    return record[-3:]
+
+
+def calc_record_offset(table, allocation):
+    """Calculate the offset of the record of the allocation.
+
+    The records are the multisets of the funghi IDs in lexicographic order,
+    so the index of a record is the number of multisets before it, which is
+    counted from the positions of its funghi IDs without reading the table.
+    The multisets before it with the first i positions equal and a smaller
+    position at i are summed up with the hockey-stick identity.
+    """
+    positions = table['positions']
+    funghi_size = len(positions)
+    capacity = len(allocation)
+    record_idx = 0
+    prev_position = 0
+    for idx, position in enumerate(sorted(positions[funghi_id]
+                                          for funghi_id in allocation)):
+        rest_size = capacity - idx - 1
+        record_idx += math.comb(funghi_size - prev_position + rest_size,
+                                rest_size + 1) - \
+            math.comb(funghi_size - position + rest_size, rest_size + 1)
+        prev_position = position
+    return table['records_offset'] + record_idx * table['record_struct'].size
+
+
+def gen_table(data, adventure_id):
+    """Generate the score table of the adventure.
+
+    The table is mapped from its file if the file has the same adventure
+    hash, and every funghi in the roster is in the roster of the table with
+    the same spec. The funghis which are not in the roster are not checked,
+    so the table of a roster is also used by the rosters with fewer funghis.
+    Otherwise the table is built again with the funghis of both rosters.
+    """
+    adventure = data['adventures'][adventure_id]
+    adventure_hash = calc_adventure_hash(adventure, data['rewards'])
+    roster = gen_roster(data['funghis'])
+    path = os.path.join(TABLE_DIR, '{}.table'.format(adventure_hash.hex()))
+    table = LOADED_TABLES.get(path)
+    if table is None or not is_table_fresh(table, roster):
+        table = load_table(path, adventure_hash)
+        if table is None or not is_table_fresh(table, roster):
+            os.makedirs(TABLE_DIR, exist_ok=True)
+            save_table(path, build_table(data, adventure_id, adventure_hash,
+                                         roster, table))
+            table = load_table(path, adventure_hash)
+        LOADED_TABLES[path] = table
+    table['requirement_ids'] = list(adventure['requirements'])
+    return table
+
+
+def calc_adventure_hash(adventure, rewards):
+    # The scores depend on the rewards too
+    return hashlib.sha256(pickle.dumps(
+        (adventure, rewards), protocol=pickle.HIGHEST_PROTOCOL)).digest()
+
+
+def gen_roster(funghis):
+    # The capacity only limits how many times the funghi can be allocated,
+    # so it does not change any record
+    return {funghi_id: {spec_name: spec_value
+                        for spec_name, spec_value in funghi.items()
+                        if spec_name != 'capacity'}
+            for funghi_id, funghi in funghis.items()}
+
+
+def is_table_fresh(table, roster):
+    table_roster = table['roster']
+    for funghi_id, funghi in roster.items():
+        if table_roster.get(funghi_id) != funghi:
+            return False
+    return True
+
+
+def gen_record_struct(capacity):
+    # Funghi IDs, score, met requirement count and met requirement bitmap
+    return struct.Struct('<{}idiQ'.format(capacity))
+
+
+def calc_record_size(funghi_size, capacity):
+    # The number of multisets of the funghis with the size of the capacity
+    if funghi_size <= 0:
+        return 1 if capacity <= 0 else 0
+    return math.comb(funghi_size + capacity - 1, capacity)
+
+
+def build_table(data, adventure_id, adventure_hash, roster, old_table=None):
+    """Build the score table of every allocation of the adventure.
+
+    Each allocation is a multiset of the allowed funghis, no matter how many
+    times each funghi can be allocated, and it is scored alone. The roster
+    of the table has the funghis of the old table which are not changed, so
+    the funghis filtered out of a roster do not build the table again when
+    they are added back. Only the allocations with new or changed funghis
+    are scored, the records of the others are copied from the old table.
+    The records are sorted by the funghi IDs.
+    """
+    adventure = data['adventures'][adventure_id]
+    requirements = adventure['requirements']
+    if len(requirements) > MAX_REQUIREMENT_SIZE:
+        raise ValueError(
+            'The score table supports at most {} requirements, but adventure'
+            ' "{}" has {}'.format(MAX_REQUIREMENT_SIZE, adventure_id,
+                                  len(requirements)))
+    capacity = adventure['capacity']
+    table_roster = {}
+    reused_funghi_ids = set()
+    if old_table is not None:
+        for funghi_id, funghi in old_table['roster'].items():
+            if roster.get(funghi_id, funghi) == funghi:
+                table_roster[funghi_id] = funghi
+                reused_funghi_ids.add(funghi_id)
+    table_roster.update(roster)
+    funghi_ids = sorted(
+        funghi_id for funghi_id in table_roster
+        if calc.check_allowed_funghis(adventure, [(funghi_id,)]))
+    record_size = calc_record_size(len(funghi_ids), capacity)
+    if record_size > MAX_RECORD_SIZE:
+        raise ValueError(
+            'The score table of adventure "{}" would have {} records, which'
+            ' is more than {}, please use another engine'.format(
+                adventure_id, record_size, MAX_RECORD_SIZE))
+    adventure_data = {
+        'adventures': {adventure_id: adventure},
+        'funghis': table_roster,
+        'rewards': data['rewards'],
+    }
+    allocation_model = calc.gen_allocation_model(adventure_data)
+    roster_dump = pickle.dumps((table_roster, funghi_ids),
+                               protocol=pickle.HIGHEST_PROTOCOL)
+    chunks = [
+        HEADER_STRUCT.pack(TABLE_MAGIC, TABLE_VERSION, adventure_hash,
+                           capacity, len(roster_dump), record_size),
+        roster_dump,
+    ]
+    record_struct = gen_record_struct(capacity)
+    for allocation in itertools.combinations_with_replacement(funghi_ids,
+                                                              capacity):
+        if old_table is not None and \
+                reused_funghi_ids.issuperset(allocation):
+            chunks.append(read_record(old_table, allocation))
+            continue
+        if profiler.ENABLED:
+            profiler.count('scored_combinations')
+        combination = {adventure_id: list(allocation)}
+        result = calc.calc_allocation_result(allocation_model, combination)
+        requirement_report = result['requirement_report']
+        bitmap = incremental.encode_requirement_report(
+            adventure_data, combination, requirement_report)[0]
+        chunks.append(record_struct.pack(
+            *allocation, result['score'],
+            len(requirement_report[adventure_id]), bitmap))
+    return b''.join(chunks)
+
+
+def read_record(table, allocation):
+    offset = calc_record_offset(table, allocation)
+    return table['buffer'][offset:offset + table['record_struct'].size]
+
+
+def save_table(path, content):
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        with open(tmp_path, 'wb') as stream:
+            stream.write(content)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_table(path, adventure_hash):
+    """Map the score table file into memory.
+
+    None is returned if the table file is missing, broken, or has a different
+    version or adventure hash. The records are not read until they are looked
+    up, their offsets are calculated from the positions of the funghi IDs.
+    """
+    try:
+        with open(path, 'rb') as stream:
+            buffer = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(buffer) < HEADER_STRUCT.size:
+        return None
+    magic, version, table_hash, capacity, roster_size, record_size = \
+        HEADER_STRUCT.unpack_from(buffer)
+    if magic != TABLE_MAGIC or version != TABLE_VERSION or \
+            table_hash != adventure_hash:
+        return None
+    record_struct = gen_record_struct(capacity)
+    records_offset = HEADER_STRUCT.size + roster_size
+    if len(buffer) != records_offset + record_size * record_struct.size:
+        return None
+    try:
+        roster, funghi_ids = pickle.loads(
+            buffer[HEADER_STRUCT.size:records_offset])
+    except Exception:
+        return None
+    if record_size != calc_record_size(len(funghi_ids), capacity):
+        return None
+    return {
+        'buffer': buffer,
+        'roster': roster,
+        'positions': {funghi_id: position
+                      for position, funghi_id in enumerate(funghi_ids)},
+        'record_struct': record_struct,
+        'records_offset': records_offset,
+    }
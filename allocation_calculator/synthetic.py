@@ -0,0 +1,159 @@
+# Native modules
+import os
+import random
+
+# Third-party modules
+import yaml
+
+STAT_NAMES = ['vitality', 'intelligence', 'speed']
+SKILL_NAMES = [
+    'swimmer', 'submerge', 'hard_head', 'agile', 'cute', 'luck', 'flight',
+    'night_eyes', 'luminescent', 'short_range_attack', 'stealth',
+    'insensitive', 'horn', 'big_eater', 'food', 'cold_resist', 'weaponry',
+    'photosynthesis', 'motivated', 'long_range_attack',
+]
+DEFAULT_OPTIONS = {
+    'funghi_size': 51,
+    # The ratio of funghis with more than one capacity
+    'duplicate_ratio': 0.0,
+    'max_duplicates': 3,
+    'adventure_size': 1,
+    'capacity': 3,
+    'requirement_size': 12,
+    'reward_size': 6,
+    # The ratios of requirements with each kind of specs
+    'multi_slot_ratio': 0.2,
+    'skill_ratio': 0.3,
+    'boost_ratio': 0.3,
+    'reduce_ratio': 0.2,
+    'reduce_boost_ratio': 0.5,
+    # The ratio of funghis allowed in each adventure (set 1 to allow all)
+    'allowed_ratio': 1.0,
+    'seed': 0,
+}
+
+
+def gen_specs(**options):
+    """Generate the adventures, funghis and rewards specs.
+
+    The specs are in the same format as the spec files, and the same options
+    always generate the same specs. See DEFAULT_OPTIONS for the options.
+    """
+    unknown_options = set(options) - set(DEFAULT_OPTIONS)
+    if len(unknown_options) > 0:
+        raise ValueError('Unknown options: {}'.format(
+            ', '.join(sorted(unknown_options))))
+    options = dict(DEFAULT_OPTIONS, **options)
+    rand = random.Random(options['seed'])
+    reward_names = ['item{}'.format(reward_idx + 1)
+                    for reward_idx in range(options['reward_size'])]
+    funghis = gen_funghis(rand, options)
+    adventures = gen_adventures(rand, options, list(funghis), reward_names)
+    rewards = {reward_name: float(rand.randint(1, 6)) / 2.0
+               for reward_name in reward_names}
+    return {
+        'adventures': adventures,
+        'funghis': funghis,
+        'rewards': rewards,
+    }
+
+
+def gen_funghis(rand, options):
+    funghis = {}
+    for funghi_id in range(1, options['funghi_size'] + 1):
+        capacity = 1
+        if rand.random() < options['duplicate_ratio']:
+            capacity = rand.randint(2, max(options['max_duplicates'], 2))
+        funghi = {
+            'name': 'Funghi {}'.format(funghi_id),
+            'capacity': capacity,
+            'stats': {stat_name: rand.randrange(50, 210, 10)
+                      for stat_name in STAT_NAMES},
+        }
+        skill_names = rand.sample(SKILL_NAMES, rand.randint(0, 3))
+        # The funghis without skills do not have the skills key
+        if len(skill_names) > 0:
+            funghi['skills'] = {skill_name: 1 for skill_name in skill_names}
+        funghis[funghi_id] = funghi
+    return funghis
+
+
+def gen_adventures(rand, options, funghi_ids, reward_names):
+    adventures = {}
+    for adventure_id in range(1, options['adventure_size'] + 1):
+        adventure = {
+            'name': 'Adventure {}'.format(adventure_id),
+            'capacity': options['capacity'],
+        }
+        if options['allowed_ratio'] < 1.0:
+            allowed_size = max(int(len(funghi_ids) * options['allowed_ratio']),
+                               1)
+            adventure['allowed_funghis'] = sorted(
+                rand.sample(funghi_ids, allowed_size))
+        adventure['requirements'] = {
+            requirement_id: gen_requirement(
+                rand, options, requirement_id, reward_names)
+            for requirement_id in range(1, options['requirement_size'] + 1)
+        }
+        adventure['perfect_rewards'] = {rand.choice(reward_names): 2}
+        adventures[adventure_id] = adventure
+    return adventures
+
+
+def gen_requirement(rand, options, requirement_id, reward_names):
+    capacity = options['capacity']
+    requirement = {
+        'name': 'Path {}'.format(requirement_id),
+    }
+    if rand.random() < options['reduce_ratio']:
+        # The sum of the stats of all funghis is checked
+        stat_name = rand.choice(STAT_NAMES)
+        requirement['reduce_stats'] = {
+            stat_name: rand.randrange(100, 160, 10) * capacity,
+        }
+        if rand.random() < options['reduce_boost_ratio']:
+            requirement['reduce_boosts'] = [
+                {rand.choice(SKILL_NAMES): {stat_name: 10 * capacity}}]
+    else:
+        slot_size = 1
+        if capacity > 1 and rand.random() < options['multi_slot_ratio']:
+            slot_size = rand.randint(2, capacity)
+        requirement['stats'] = [gen_stat_slot(rand)
+                                for _ in range(slot_size)]
+        if rand.random() < options['skill_ratio']:
+            requirement['skills'] = [{rand.choice(SKILL_NAMES): 1}]
+    if rand.random() < options['boost_ratio']:
+        requirement['boosts'] = [
+            {rand.choice(SKILL_NAMES): {rand.choice(STAT_NAMES): 20}}]
+    requirement['rewards'] = {rand.choice(reward_names): rand.randint(1, 3)}
+    return requirement
+
+
+def gen_stat_slot(rand):
+    stat_names = rand.sample(STAT_NAMES, rand.randint(1, 2))
+    return {stat_name: rand.randrange(80, 220, 10)
+            for stat_name in stat_names}
+
+
+def write_specs(specs, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    for spec_name, spec in specs.items():
+        spec_path = os.path.join(output_dir, '{}.yaml'.format(spec_name))
+        with open(spec_path, 'w', encoding='utf8') as stream:
+            yaml.safe_dump(spec, stream, allow_unicode=True,
+                           default_flow_style=False, sort_keys=False)
+
+
+def write_data_dirs(output_root, seeds, name_format='{}', **options):
+    """Write the specs generated with each seed to its own data directory.
+
+    The data directories are named by name_format with the seeds, and they
+    are returned in the order of the seeds. The other options are passed to
+    gen_specs.
+    """
+    data_dirs = []
+    for seed in seeds:
+        data_dir = os.path.join(output_root, name_format.format(seed))
+        write_specs(gen_specs(seed=seed, **options), data_dir)
+        data_dirs.append(data_dir)
+    return data_dirs
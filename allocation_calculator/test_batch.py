@@ -0,0 +1,64 @@
+# Native modules
+import copy
+import unittest
+
+# Third-party modules
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Project modules
+import allocation_calculator.calc as calc
+import allocation_calculator.loader as loader
+import allocation_calculator.test_calc as test_calc
+if numpy is not None:
+    import allocation_calculator.batch as batch
+
+
+@unittest.skipIf(numpy is None, 'requires the "numpy" package')
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        stub = test_calc.TestMain
+        self.data = {
+            'adventures': loader.parse_yaml(stub.STUB_ADVENTURES),
+            'funghis': loader.parse_yaml(stub.STUB_FUNGHIS),
+            'rewards': loader.parse_yaml(stub.STUB_REWARDS),
+        }
+        calc.normalize_data(self.data)
+
+    def test_allocations_results_1(self):
+        funghi_combinations = list(calc.gen_funghi_combinations(
+            self.data, 3, 3))
+        expected_results = calc.calc_allocations_results(
+            self.data, funghi_combinations)
+        results = batch.calc_allocations_results(
+            self.data, funghi_combinations)
+        self.assertEqual(results, expected_results)
+
+    def test_allocations_results_empty_1(self):
+        data = copy.deepcopy(self.data)
+        del data['funghis'][3]
+        funghi_combinations = list(calc.gen_funghi_combinations(data, 3, 2))
+        expected_results = calc.calc_allocations_results(
+            data, funghi_combinations)
+        results = batch.calc_allocations_results(data, funghi_combinations)
+        self.assertEqual(results, expected_results)
+
+    def test_best_results_1(self):
+        # Make all allocations have the same score, and split them into
+        # multiple chunks
+        self.data['rewards'] = {name: 0.0 for name in self.data['rewards']}
+        funghi_combinations = list(calc.gen_funghi_combinations(
+            self.data, 3, 3))
+        expected_best_results = calc.calc_best_results(
+            self.data, funghi_combinations, 2)
+        scored_combinations = batch.gen_scored_combinations(
+            self.data, funghi_combinations, chunk_size=2)
+        best_results = calc.select_best_results(
+            self.data, scored_combinations, 2)
+        self.assertEqual(best_results, expected_best_results)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,41 @@
+# Native modules
+import argparse
+import contextlib
+import io
+import unittest
+
+# Project modules
+import benchmark
+
+
+class TestGenCases(unittest.TestCase):
+    def test_table_synthetic_1(self):
+        # The synthetic cases are too large for the score tables
+        args = argparse.Namespace(suites=['synthetic'], engine='python',
+                                  filter=None)
+        self.assertGreater(len(benchmark.gen_cases(args)), 0)
+        args.engine = 'table'
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(benchmark.gen_cases(args), [])
+
+
+class TestCompareResults(unittest.TestCase):
+    def gen_results(self, totals):
+        return {
+            'cases': {name: {'total': total}
+                      for name, total in totals.items()},
+        }
+
+    def test_regression_1(self):
+        baseline = self.gen_results({'a': 1.0, 'b': 1.0, 'c': 1.0})
+        results = self.gen_results({'a': 1.1, 'b': 1.5, 'd': 9.0})
+        regressions = benchmark.compare_results(results, baseline, 0.2)
+        self.assertEqual(regressions, [{
+            'name': 'b',
+            'baseline': 1.0,
+            'total': 1.5,
+        }])
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
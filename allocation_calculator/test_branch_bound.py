@@ -0,0 +1,68 @@
+# Native modules
+import copy
+import unittest
+
+# Project modules
+import allocation_calculator.branch_bound as branch_bound
+import allocation_calculator.calc as calc
+import allocation_calculator.loader as loader
+import allocation_calculator.test_calc as test_calc
+
+
+class TestBranchBound(unittest.TestCase):
+    def setUp(self):
+        stub = test_calc.TestMain
+        self.data = {
+            'adventures': loader.parse_yaml(stub.STUB_ADVENTURES),
+            'funghis': loader.parse_yaml(stub.STUB_FUNGHIS),
+            'rewards': loader.parse_yaml(stub.STUB_REWARDS),
+        }
+        calc.normalize_data(self.data)
+
+    def assert_same_best_results(self, data, adventure_capacity,
+                                 funghi_capacity, max_results=0):
+        funghi_combinations = calc.gen_funghi_combinations(
+            data, adventure_capacity, funghi_capacity)
+        expected_best_results = calc.calc_best_results(
+            data, funghi_combinations, max_results)
+        best_results = branch_bound.calc_best_results(
+            data, adventure_capacity, funghi_capacity, max_results)
+        self.assertEqual(best_results, expected_best_results)
+
+    def test_simple_1(self):
+        self.assert_same_best_results(self.data, 3, 3)
+
+    def test_ties_1(self):
+        self.data['rewards'] = {name: 0.0 for name in self.data['rewards']}
+        self.assert_same_best_results(self.data, 3, 3)
+        self.assert_same_best_results(self.data, 3, 3, 2)
+
+    def test_multi_secondary_1(self):
+        data = copy.deepcopy(self.data)
+        data['funghis'][3]['capacity'] = 2
+        data['funghis'][4] = copy.deepcopy(data['funghis'][2])
+        self.assert_same_best_results(data, 3, 5)
+
+    def test_empty_1(self):
+        data = copy.deepcopy(self.data)
+        del data['funghis'][3]
+        self.assert_same_best_results(data, 3, 2)
+
+    def test_allowed_funghis_1(self):
+        self.data['adventures'][2]['allowed_funghis'] = [1, 3]
+        self.assert_same_best_results(self.data, 3, 3)
+
+    def test_max_score_1(self):
+        best_results = branch_bound.calc_best_results(self.data, 3, 3)
+        max_score = best_results['max_score']
+        self.assertEqual(branch_bound.calc_max_score(self.data, 3, 3),
+                         max_score)
+        # No scores are higher than the min score
+        self.assertEqual(branch_bound.calc_max_score(
+            self.data, 3, 3, max_score + 1.0), max_score + 1.0)
+        self.assertEqual(branch_bound.calc_max_score(
+            self.data, 3, 3, max_score - 1.0), max_score)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -2,11 +2,9 @@
 import copy
 import unittest
 
-# Third-party modules
-import yaml
-
 # Project modules
 import allocation_calculator.calc as calc
+import allocation_calculator.loader as loader
 
 
 class TestMain(unittest.TestCase):
@@ -166,10 +164,44 @@ item11: 100.0
         self.assertAlmostEqual(scores, EXPECTED_SCORES)
         self.assertEqual(requirement_reports, EXPECTED_REQUIREMENT_REPORTS)
 
+    def test_best_results_1(self):
+        data = self.load_data(self.STUB_ADVENTURES,
+                              self.STUB_FUNGHIS, self.STUB_REWARDS)
+        calc.normalize_data(data)
+        funghi_combinations = calc.gen_funghi_combinations(data, 3, 3)
+        results = calc.calc_allocations_results(data, funghi_combinations)
+        funghi_combinations = calc.gen_funghi_combinations(data, 3, 3)
+        expected_best_results = calc.filter_best_results(
+            data, funghi_combinations, results)
+        funghi_combinations = calc.gen_funghi_combinations(data, 3, 3)
+        best_results = calc.calc_best_results(data, funghi_combinations)
+        self.assertEqual(best_results['max_score'],
+                         expected_best_results['max_score'])
+        self.assertEqual(best_results['results'],
+                         expected_best_results['results'])
+        self.assertEqual(best_results['result_count'], 1)
+
+    def test_best_results_limit_1(self):
+        data = self.load_data(self.STUB_ADVENTURES,
+                              self.STUB_FUNGHIS, self.STUB_REWARDS)
+        calc.normalize_data(data)
+        # Make all allocations have the same score
+        data['rewards'] = {name: 0.0 for name in data['rewards']}
+        funghi_combinations = calc.gen_funghi_combinations(data, 3, 3)
+        results = calc.calc_allocations_results(data, funghi_combinations)
+        funghi_combinations = calc.gen_funghi_combinations(data, 3, 3)
+        expected_best_results = calc.filter_best_results(
+            data, funghi_combinations, results)
+        funghi_combinations = calc.gen_funghi_combinations(data, 3, 3)
+        best_results = calc.calc_best_results(data, funghi_combinations, 2)
+        self.assertEqual(best_results['results'],
+                         expected_best_results['results'][:2])
+        self.assertEqual(best_results['result_count'], 3)
+
     def load_data(self, adventures, funghis, rewards):
-        adventures_data = yaml.load(adventures)
-        funghis_data = yaml.load(funghis)
-        rewards_data = yaml.load(rewards)
+        adventures_data = loader.parse_yaml(adventures)
+        funghis_data = loader.parse_yaml(funghis)
+        rewards_data = loader.parse_yaml(rewards)
         return {
             'adventures': adventures_data,
             'funghis': funghis_data,
@@ -177,6 +209,83 @@ item11: 100.0
         }
 
 
+class TestFilterOutSubsetFunghis(unittest.TestCase):
+    STUB_DATA = {
+        'adventures': {
+            1: {
+                'capacity': 1,
+                'requirements': {
+                    1: {
+                        'stats': [{
+                            'vitality': 20,
+                        }],
+                        'skills': [],
+                    },
+                    2: {
+                        'stats': [],
+                        'skills': [{
+                            'skill1': 1,
+                        }],
+                    },
+                },
+            },
+        },
+        'funghis': {
+            1: {
+                'capacity': 1,
+                'stats': {
+                    'vitality': 10,
+                },
+                'skills': {
+                    'skill1': 1,
+                },
+            },
+            2: {
+                'capacity': 1,
+                'stats': {
+                    'vitality': 20,
+                },
+                'skills': {
+                    'skill1': 1,
+                },
+            },
+            3: {
+                'capacity': 1,
+                'stats': {
+                    'vitality': 20,
+                },
+                'skills': {
+                    'skill1': 1,
+                },
+            },
+            4: {
+                'capacity': 1,
+                'stats': {
+                    'vitality': 30,
+                },
+                'skills': {},
+            },
+        },
+    }
+
+    def test_simple_1(self):
+        data = copy.deepcopy(self.STUB_DATA)
+        calc.filter_out_subset_funghis(data)
+        # Funghi 1 is dominated by funghi 2, funghi 2 and funghi 3 are the
+        # same so only the later one is kept
+        self.assertEqual(list(data['funghis']), [3, 4])
+
+    def test_capacity_1(self):
+        data = copy.deepcopy(self.STUB_DATA)
+        data['adventures'][1]['capacity'] = 3
+        calc.filter_out_subset_funghis(data)
+        self.assertEqual(list(data['funghis']), [2, 3, 4])
+
+    def test_signatures_1(self):
+        signatures = calc.gen_requirement_met_signatures(self.STUB_DATA)
+        self.assertEqual(signatures, {1: 0b10, 2: 0b11, 3: 0b11, 4: 0b01})
+
+
 class TestGenFunghiCombinations(unittest.TestCase):
     STUB_DATA = {
         'adventures': {
@@ -369,6 +478,17 @@ class TestGenCombinationsPrimaryJumpy(unittest.TestCase):
         combinations = calc.gen_combinations_primary_jumpy(CANDIDATES, 3)
         self.assertEqual(list(combinations), EXPECTED_COMBINATIONS)
 
+    def test_first_pointers_1(self):
+        CANDIDATES = [(1, 1), (2, 1), (2, 2), (3, 1), (4, 1)]
+        for n in range(1, 5):
+            expected_combinations = list(calc.gen_combinations_primary_jumpy(
+                CANDIDATES, n))
+            combinations = []
+            for first_pointer in calc.gen_first_pointers(CANDIDATES, n):
+                combinations.extend(calc.gen_combinations_primary_jumpy(
+                    CANDIDATES, n, first_pointer))
+            self.assertEqual(combinations, expected_combinations)
+
 
 class TestIsNonReduceRequirementMet(unittest.TestCase):
     STUB_FUNGHIS = [{
@@ -511,6 +631,48 @@ class TestIsNonReduceRequirementMet(unittest.TestCase):
         self.assertFalse(calc.is_non_reduce_requirement_met(
             REQUIREMENT, self.STUB_FUNGHIS, 'skills'))
 
+    def test_reassigned_stats_1(self):
+        # The first spec object has to give up the funghi it passes first
+        REQUIREMENT = {
+            'stats': [{
+                'intelligence': 20,
+            }, {
+                'speed': 30,
+            }, {
+                'vitality': 10,
+            }],
+        }
+        self.assertTrue(calc.is_non_reduce_requirement_met(
+            REQUIREMENT, self.STUB_FUNGHIS, 'stats'))
+
+    def test_more_specs_than_funghis_1(self):
+        REQUIREMENT = {
+            'stats': [{
+                'vitality': 10,
+            }, {
+                'vitality': 10,
+            }],
+        }
+        self.assertTrue(calc.is_non_reduce_requirement_met(
+            REQUIREMENT, self.STUB_FUNGHIS[:1], 'stats'))
+
+    def test_large_capacity_1(self):
+        funghis = [{
+            'stats': {
+                'vitality': 10 * (idx + 1),
+            },
+        } for idx in range(6)]
+        requirement = {
+            'stats': [{
+                'vitality': 10 * (idx + 1),
+            } for idx in reversed(range(6))],
+        }
+        self.assertTrue(calc.is_non_reduce_requirement_met(
+            requirement, funghis, 'stats'))
+        requirement['stats'][-1]['vitality'] = 20
+        self.assertFalse(calc.is_non_reduce_requirement_met(
+            requirement, funghis, 'stats'))
+
 
 class TestIsReduceRequirementMet(unittest.TestCase):
     STUB_FUNGHIS = [{
@@ -731,6 +893,47 @@ class TestGenAugmentedFunghis(unittest.TestCase):
         expected_funghis[2]['stats']['vitality'] += 100 + 101
         self.assertEqual(augmented_funghis, expected_funghis)
 
+    def test_cache_1(self):
+        REQUIREMENTS = {
+            1: {
+                'boosts': [{
+                    'skill2': {
+                        'vitality': 100,
+                    }
+                }],
+                'reduce_boosts': [{
+                    'skill1': {
+                        'vitality': 101,
+                    },
+                }],
+            },
+            2: {
+                'reduce_boosts': [{
+                    'skill2': {
+                        'speed': 102,
+                    },
+                }],
+            },
+        }
+        data = {
+            'adventures': {
+                1: {
+                    'requirements': REQUIREMENTS,
+                },
+            },
+            'funghis': dict(enumerate(self.STUB_FUNGHIS)),
+        }
+        augmented_cache = calc.gen_augmented_funghis_cache(data)
+        for requirement_id, requirement in REQUIREMENTS.items():
+            for allocation in [[0, 1, 2], [1, 2], [0]]:
+                allocated_funghis = [self.STUB_FUNGHIS[funghi_id]
+                                     for funghi_id in allocation]
+                expected_funghis = calc.gen_augmented_funghis(
+                    requirement, allocated_funghis)
+                augmented_funghis = calc.gen_cached_augmented_funghis(
+                    augmented_cache, 1, requirement_id, allocation)
+                self.assertEqual(augmented_funghis, expected_funghis)
+
 
 if __name__ == '__main__':
     unittest.main(exit=False)
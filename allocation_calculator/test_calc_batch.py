@@ -0,0 +1,56 @@
+# Native modules
+import argparse
+import os
+import tempfile
+import unittest
+
+# Project modules
+import allocation_calculator.calc as calc
+import allocation_calculator.loader as loader
+import allocation_calculator.synthetic as synthetic
+import calc_batch
+
+
+class TestGenBatchBestResults(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        synthetic.write_data_dirs(self.tmp_dir.name, [10, 2, 1],
+                                  '{}-synthetic', funghi_size=8, capacity=2)
+        # The directory without an adventures spec file is skipped
+        os.makedirs(os.path.join(self.tmp_dir.name, 'all'))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def gen_args(self, workers):
+        pattern = os.path.join(self.tmp_dir.name, '*')
+        return argparse.Namespace(
+            data_dirs=calc_batch.expand_data_dirs([pattern]),
+            funghis_path=os.path.join(self.tmp_dir.name, '1-synthetic',
+                                      'funghis.yaml'),
+            max=3, engine='python', search='exhaustive', workers=workers,
+            filter_out_subset_funghis=False, spec_cache=False)
+
+    def test_expand_data_dirs_1(self):
+        args = self.gen_args(1)
+        self.assertEqual([os.path.basename(data_dir)
+                          for data_dir in args.data_dirs],
+                         ['1-synthetic', '2-synthetic', '10-synthetic'])
+
+    def test_workers_1(self):
+        for workers in [1, 2]:
+            args = self.gen_args(workers)
+            outputs = list(calc_batch.gen_batch_best_results(args))
+            self.assertEqual(sorted(data_dir for data_dir, _, _ in outputs),
+                             sorted(args.data_dirs))
+            # The best results are the same as solving each data directory
+            for data_dir, _, best_results in outputs:
+                data = loader.load_data_dir(data_dir, args.funghis_path,
+                                            False)
+                expected_best_results = calc.calc_best_results(
+                    data, calc.gen_funghi_combinations(data, 2, 8), 3)
+                self.assertEqual(best_results, expected_best_results)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,77 @@
+# Native modules
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+# Project modules
+import allocation_calculator.synthetic as synthetic
+import calc_global
+
+
+class TestResume(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        data_dirs = synthetic.write_data_dirs(
+            self.tmp_dir.name, range(3), funghi_size=8, capacity=2,
+            requirement_size=2)
+        self.checkpoint_path = os.path.join(self.tmp_dir.name, 'checkpoint')
+        # Save the checkpoint before every step
+        self.args = argparse.Namespace(
+            data_dirs=data_dirs,
+            funghis_path=os.path.join(data_dirs[0], 'funghis.yaml'),
+            engine='python', search='exhaustive', workers=1, cache_size=0,
+            spec_cache=False, checkpoint=self.checkpoint_path,
+            checkpoint_interval=0.0, resume=False)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def interrupt(self, output_size):
+        checkpoint = calc_global.gen_global_checkpoint(self.args)
+        global_results = calc_global.gen_global_best_results(
+            self.args, checkpoint=checkpoint)
+        outputs = [next(global_results) for _ in range(output_size)]
+        global_results.close()
+        return outputs
+
+    def test_resume_1(self):
+        expected_outputs = list(calc_global.gen_global_best_results(
+            self.args))
+        self.assertGreater(len(expected_outputs), 10)
+        self.assertEqual(self.interrupt(10), expected_outputs[:10])
+        self.args.resume = True
+        checkpoint = calc_global.gen_global_checkpoint(self.args)
+        state = checkpoint['state']
+        self.assertIsNotNone(state)
+        # Only the number of outputs is saved, and the outputs after it are
+        # generated
+        self.assertNotIn('outputs', state)
+        output_count = state['output_count']
+        self.assertLessEqual(output_count, 10)
+        self.assertGreater(output_count, 0)
+        outputs = list(calc_global.gen_global_best_results(
+            self.args, checkpoint=checkpoint))
+        self.assertEqual(outputs, expected_outputs[output_count:])
+
+    def test_missing_1(self):
+        self.args.resume = True
+        with contextlib.redirect_stderr(io.StringIO()):
+            checkpoint = calc_global.gen_global_checkpoint(self.args)
+        # Start from the beginning
+        self.assertIsNone(checkpoint['state'])
+
+    def test_changed_specs_1(self):
+        self.interrupt(1)
+        rewards_path = os.path.join(self.args.data_dirs[1], 'rewards.yaml')
+        with open(rewards_path, 'a', encoding='utf8') as stream:
+            stream.write('item7: 1.0\n')
+        self.args.resume = True
+        with self.assertRaises(ValueError):
+            calc_global.gen_global_checkpoint(self.args)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,104 @@
+# Native modules
+import copy
+import random
+import unittest
+
+# Project modules
+import allocation_calculator.calc as calc
+import allocation_calculator.compatible as compatible
+import allocation_calculator.loader as loader
+import allocation_calculator.test_calc as test_calc
+import calc_compatible
+
+
+class TestGenCompatibleCombinations(unittest.TestCase):
+    def test_larger_capacity_1(self):
+        combinations = [{1, 2, 3}, {1, 4, 5}, {2, 3, 4}]
+        new_combinations = [{2, 3}, {4, 6}]
+        compatible_combinations = calc_compatible.gen_compatible_combinations(
+            combinations, new_combinations, 2)
+        self.assertEqual(compatible_combinations, [{1, 2, 3}, {2, 3, 4}])
+
+    def test_smaller_capacity_1(self):
+        combinations = [{1, -1}, {2, 3}]
+        new_combinations = [{1, 2, -1}, {1, 2, 4}, {2, 3, 4}]
+        compatible_combinations = calc_compatible.gen_compatible_combinations(
+            combinations, new_combinations, 3)
+        self.assertEqual(compatible_combinations, [{1, 2, -1}, {2, 3, 4}])
+
+    def test_empty_1(self):
+        new_combinations = [{1, 2}]
+        self.assertEqual(calc_compatible.gen_compatible_combinations(
+            [], new_combinations, 2), new_combinations)
+        self.assertEqual(calc_compatible.gen_compatible_combinations(
+            [{1, 2}], [], 2), [])
+
+    def test_random_1(self):
+        rand = random.Random(0)
+        for _ in range(100):
+            size = rand.randint(1, 4)
+            combinations = [set(rand.sample(range(-1, 8), size))
+                            for _ in range(rand.randint(1, 30))]
+            subset_combinations = [
+                set(rand.sample(range(-1, 8), rand.randint(0, size)))
+                for _ in range(rand.randint(0, 30))]
+            expected_combinations = [
+                combination for combination in combinations
+                if any(subset_combination.issubset(combination)
+                       for subset_combination in subset_combinations)]
+            self.assertEqual(calc_compatible.filter_superset_combinations(
+                combinations, subset_combinations), expected_combinations)
+
+
+class TestJointCompatible(unittest.TestCase):
+    def setUp(self):
+        stub = test_calc.TestMain
+        adventures = loader.parse_yaml(stub.STUB_ADVENTURES)
+        funghis = loader.parse_yaml(stub.STUB_FUNGHIS)
+        funghis[4] = copy.deepcopy(funghis[2])
+        funghis[4]['capacity'] = 2
+        # Split the adventures into single adventure data
+        self.all_data = []
+        for adventure_id, adventure in adventures.items():
+            data = {
+                'adventures': {adventure_id: adventure},
+                'funghis': copy.deepcopy(funghis),
+                'rewards': loader.parse_yaml(stub.STUB_REWARDS),
+            }
+            calc.normalize_data(data)
+            self.all_data.append(data)
+
+    def assert_same_combinations(self, data, combinations):
+        results = calc_compatible.gen_single_best_results(data)
+        capacity = next(iter(data['adventures'].values()))['capacity']
+        expected_combinations = calc_compatible.gen_compatible_combinations(
+            combinations, calc_compatible.convert_to_combinations_set(results),
+            capacity)
+        self.assertEqual(compatible.gen_compatible_combinations(
+            data, combinations), expected_combinations)
+
+    def test_supersets_1(self):
+        data = self.all_data[1]
+        self.assert_same_combinations(data, [{1}, {2}, {3}, {4}])
+        self.assert_same_combinations(data, [{4}])
+        self.assert_same_combinations(data, [])
+
+    def test_subsets_1(self):
+        data = self.all_data[0]
+        self.assert_same_combinations(data, [{1, 2}, {2, 4}, {3, 4}])
+        self.assert_same_combinations(data, [{1, 2}])
+
+    def test_ties_1(self):
+        for data in self.all_data:
+            data['rewards'] = {name: 0.0 for name in data['rewards']}
+        self.assert_same_combinations(self.all_data[1], [{1}, {4}])
+        self.assert_same_combinations(self.all_data[0], [{1, 2}, {3, 4}])
+
+    def test_narrowed_1(self):
+        data = self.all_data[1]
+        self.assertTrue(compatible.is_narrowed(data, [{1}]))
+        self.assertFalse(compatible.is_narrowed(data, [{1}, {2}, {3}, {4}]))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
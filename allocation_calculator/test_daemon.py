@@ -0,0 +1,110 @@
+# Native modules
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+# Project modules
+import allocation_calculator.calc as calc
+import allocation_calculator.synthetic as synthetic
+import calc_daemon
+
+
+class TestNormalizeQuery(unittest.TestCase):
+    def test_defaults_1(self):
+        query = calc_daemon.normalize_query(
+            {'mode': 'global', 'data_dirs': ['a', 'b'], 'max': 0})
+        self.assertEqual(query['max'], 0)
+        self.assertEqual(query['search'], 'exhaustive')
+        self.assertFalse(query['joint'])
+
+    def test_invalid_1(self):
+        for query in [[], {'mode': 'x'}, {'mode': 'single'},
+                      {'mode': 'single', 'data_dir': 'a', 'joint': True},
+                      {'mode': 'single', 'data_dir': 1},
+                      {'mode': 'single', 'data_dir': 'a', 'max': '1'},
+                      {'mode': 'single', 'data_dir': 'a', 'max': True},
+                      {'mode': 'single', 'data_dir': 'a', 'engine': 'x'},
+                      {'mode': 'single', 'data_dir': 'a', 'search': None},
+                      {'mode': 'single', 'data_dir': 'a',
+                       'filter_out_subset_funghis': 1},
+                      {'mode': 'global', 'data_dirs': 'a'},
+                      {'mode': 'global', 'data_dirs': []},
+                      {'mode': 'global', 'data_dirs': ['a', 1]},
+                      {'mode': 'global', 'data_dirs': ['a'],
+                       'cache_size': 1.5},
+                      {'mode': 'compatible', 'data_dirs': ['a'],
+                       'engine': ['python']}]:
+            with self.assertRaises(ValueError):
+                calc_daemon.normalize_query(query)
+
+
+class TestAnswerQuery(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = os.path.join(self.tmp_dir.name, '1-synthetic')
+        self.specs = synthetic.gen_specs(funghi_size=10, capacity=2)
+        synthetic.write_specs(self.specs, self.data_dir)
+        funghis_path = os.path.join(self.data_dir, 'funghis.yaml')
+        self.state = calc_daemon.gen_daemon_state(
+            funghis_path, data_dirs=[self.data_dir])
+
+    def tearDown(self):
+        self.state['executor'].shutdown()
+        self.tmp_dir.cleanup()
+
+    async def answer_queries(self, queries):
+        return await asyncio.gather(*[
+            calc_daemon.answer_query(self.state, query)
+            for query in queries])
+
+    def test_coalesce_1(self):
+        query = {'mode': 'single', 'data_dir': self.data_dir, 'max': 0}
+        answers = asyncio.run(self.answer_queries([query] * 3))
+        self.assertTrue(answers[0]['ok'])
+        self.assertEqual(answers[1:], answers[:1] * 2)
+        self.assertEqual(self.state['misses'], 1)
+        self.assertEqual(self.state['coalesced'], 2)
+        # The answer is the same as the program
+        data = self.specs
+        calc.normalize_data(data)
+        best_results = calc.calc_best_results(
+            data, calc.gen_funghi_combinations(data, 2, 10))
+        result = answers[0]['result']
+        self.assertEqual(result['max_score'], best_results['max_score'])
+        self.assertEqual(result['result_count'],
+                         best_results['result_count'])
+        self.assertEqual(
+            [item['allocation'] for item in json.loads(json.dumps(
+                result))['results']],
+            [{str(adventure_id): funghi_ids
+              for adventure_id, funghi_ids in combination.items()}
+             for combination, _, _ in best_results['results']])
+
+    def test_cache_1(self):
+        query = {'mode': 'single', 'data_dir': self.data_dir, 'max': 1}
+        answer = asyncio.run(self.answer_queries([query]))[0]
+        self.assertEqual(asyncio.run(self.answer_queries([query]))[0],
+                         answer)
+        self.assertEqual(self.state['hits'], 1)
+        # The cached answer is not used after the spec file is changed
+        rewards_path = os.path.join(self.data_dir, 'rewards.yaml')
+        with open(rewards_path, 'a', encoding='utf8') as stream:
+            stream.write('item7: 1.0\n')
+        asyncio.run(self.answer_queries([query]))
+        self.assertEqual(self.state['misses'], 2)
+
+    def test_error_1(self):
+        query = {'mode': 'single', 'data_dir': self.tmp_dir.name}
+        answer = asyncio.run(self.answer_queries([query]))[0]
+        self.assertFalse(answer['ok'])
+        # The wrong types are answered as errors too
+        query = {'mode': 'single', 'data_dir': 1}
+        answer = asyncio.run(self.answer_queries([query]))[0]
+        self.assertFalse(answer['ok'])
+        self.assertEqual(self.state['misses'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,124 @@
+# Native modules
+import argparse
+import contextlib
+import io
+import math
+import os
+import sys
+import tempfile
+import unittest
+
+# Project modules
+import allocation_calculator.calc as calc
+import allocation_calculator.estimate as estimate
+import allocation_calculator.synthetic as synthetic
+import calc_single
+
+
+class TestCountFunghiCombinations(unittest.TestCase):
+    def count_both(self, data):
+        adventure_capacity = calc.calc_total_adventure_capacity(data)
+        funghi_capacity = calc.calc_total_funghi_capacity(data)
+        combinations = list(calc.gen_funghi_combinations(
+            data, adventure_capacity, funghi_capacity))
+        count = estimate.count_funghi_combinations(
+            data, adventure_capacity, funghi_capacity)
+        return len(combinations), count
+
+    def test_empty_funghis_1(self):
+        data = synthetic.gen_specs(funghi_size=2, adventure_size=2,
+                                   capacity=2)
+        calc.normalize_data(data)
+        expected, count = self.count_both(data)
+        self.assertEqual(count, expected)
+
+    def test_synthetic_1(self):
+        # Duplicated funghis, allowed funghis and multiple adventures
+        for seed in range(10):
+            data = synthetic.gen_specs(
+                funghi_size=7, duplicate_ratio=0.4, adventure_size=3,
+                capacity=2, allowed_ratio=0.7, seed=seed)
+            calc.normalize_data(data)
+            expected, count = self.count_both(data)
+            self.assertEqual(count, expected)
+
+    def test_large_1(self):
+        # The combinations are too many to be generated
+        data = synthetic.gen_specs(funghi_size=500, capacity=6)
+        calc.normalize_data(data)
+        count = estimate.count_funghi_combinations(data, 6, 500)
+        self.assertEqual(count, math.comb(500, 6))
+
+
+class TestCheckBudget(unittest.TestCase):
+    def gen_args(self, over_budget):
+        return argparse.Namespace(budget=100, over_budget=over_budget,
+                                  search='exhaustive')
+
+    def test_refuse_1(self):
+        args = self.gen_args('refuse')
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            self.assertTrue(estimate.check_budget(args, 100))
+            self.assertFalse(estimate.check_budget(args, 101))
+        self.assertIn('refusing', stderr.getvalue())
+
+    def test_switch_1(self):
+        args = self.gen_args('branch_bound')
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertFalse(estimate.check_budget(args, 101, False))
+            self.assertEqual(args.search, 'exhaustive')
+            self.assertTrue(estimate.check_budget(args, 101))
+        self.assertEqual(args.search, 'branch_bound')
+
+
+class TestSingleBudget(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = os.path.join(self.tmp_dir.name, '1-synthetic')
+        synthetic.write_specs(synthetic.gen_specs(funghi_size=8, capacity=2),
+                              self.data_dir)
+        self.argv = sys.argv
+
+    def tearDown(self):
+        sys.argv = self.argv
+        self.tmp_dir.cleanup()
+
+    def run_single(self, options):
+        sys.argv = ['calc_single.py', '--data_dir', self.data_dir,
+                    '--no_spec_cache', '--budget', '1', '--over_budget',
+                    'branch_bound'] + options
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(stdout), \
+                contextlib.redirect_stderr(stderr):
+            try:
+                calc_single.main()
+            except SystemExit as e:
+                return e.code, stdout.getvalue(), stderr.getvalue()
+        return 0, stdout.getvalue(), stderr.getvalue()
+
+    def test_switch_1(self):
+        code, stdout, stderr = self.run_single([])
+        self.assertEqual(code, 0)
+        self.assertIn('switching', stderr)
+        self.assertIn('Best allocations', stdout)
+
+    def test_pareto_1(self):
+        # The Pareto frontier needs all combinations
+        code, stdout, stderr = self.run_single(['--pareto'])
+        self.assertEqual(code, 1)
+        self.assertIn('refusing', stderr)
+        self.assertEqual(stdout, '')
+
+    def test_incremental_1(self):
+        # The store is not updated by the "branch_bound" search
+        store_path = os.path.join(self.tmp_dir.name, 'store')
+        code, stdout, stderr = self.run_single(['--incremental', store_path])
+        self.assertEqual(code, 1)
+        self.assertIn('refusing', stderr)
+        self.assertFalse(os.path.exists(store_path))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
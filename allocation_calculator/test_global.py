@@ -0,0 +1,96 @@
+# Native modules
+import argparse
+import os
+import tempfile
+import unittest
+
+# Project modules
+import allocation_calculator.synthetic as synthetic
+import calc_global
+
+
+class TestResultsCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        data_dirs = synthetic.write_data_dirs(
+            self.tmp_dir.name, range(3), funghi_size=8, capacity=2,
+            requirement_size=2)
+        self.args = argparse.Namespace(
+            data_dirs=data_dirs,
+            funghis_path=os.path.join(data_dirs[0], 'funghis.yaml'),
+            engine='python', search='exhaustive', workers=1, cache_size=256,
+            spec_cache=False)
+        # Count the searches which are not answered by the cache
+        self.gen_single_best_results = calc_global.gen_single_best_results
+        self.searched_keys = []
+
+        def count_gen_single_best_results(args, data_dir_idx,
+                                          allocated_counts, reporter=None,
+                                          executor=None):
+            self.searched_keys.append((data_dir_idx, dict(allocated_counts)))
+            return self.gen_single_best_results(
+                args, data_dir_idx, allocated_counts, reporter, executor)
+
+        calc_global.gen_single_best_results = count_gen_single_best_results
+
+    def tearDown(self):
+        calc_global.gen_single_best_results = self.gen_single_best_results
+        self.tmp_dir.cleanup()
+
+    def gen_best_results(self, results_cache, data_dir_idx, allocated_counts):
+        return calc_global.gen_cached_single_best_results(
+            self.args, data_dir_idx, allocated_counts, results_cache)
+
+    def test_hit_1(self):
+        results_cache = calc_global.gen_results_cache(2)
+        best_results = self.gen_best_results(results_cache, 1, {1: 1, 2: 1})
+        # The allocated counts are compared by their items
+        self.assertIs(self.gen_best_results(results_cache, 1, {2: 1, 1: 1}),
+                      best_results)
+        self.assertEqual(len(self.searched_keys), 1)
+        self.assertEqual(results_cache['hits'], 1)
+        self.assertEqual(results_cache['misses'], 1)
+        # Another data directory or other allocated counts are missed
+        self.gen_best_results(results_cache, 2, {1: 1, 2: 1})
+        self.gen_best_results(results_cache, 1, {1: 1})
+        self.assertEqual(len(self.searched_keys), 3)
+
+    def test_evict_1(self):
+        results_cache = calc_global.gen_results_cache(2)
+        self.gen_best_results(results_cache, 1, {1: 1})
+        self.gen_best_results(results_cache, 1, {2: 1})
+        # The first best results are used again, so the second ones are the
+        # least recently used
+        self.gen_best_results(results_cache, 1, {1: 1})
+        self.gen_best_results(results_cache, 1, {3: 1})
+        self.assertEqual(len(results_cache['entries']), 2)
+        self.gen_best_results(results_cache, 1, {1: 1})
+        self.assertEqual(len(self.searched_keys), 3)
+        self.gen_best_results(results_cache, 1, {2: 1})
+        self.assertEqual(self.searched_keys[-1], (1, {2: 1}))
+        self.assertEqual(len(self.searched_keys), 4)
+
+    def test_disabled_1(self):
+        results_cache = calc_global.gen_results_cache(0)
+        for _ in range(2):
+            self.gen_best_results(results_cache, 1, {1: 1})
+        self.assertEqual(len(self.searched_keys), 2)
+        self.assertEqual(len(results_cache['entries']), 0)
+        self.assertEqual(results_cache['hits'], 0)
+
+    def test_same_results_1(self):
+        results_cache = calc_global.gen_results_cache(self.args.cache_size)
+        global_results = list(calc_global.gen_global_best_results(
+            self.args, results_cache))
+        self.assertGreater(results_cache['hits'], 0)
+        search_size = len(self.searched_keys)
+        self.args.cache_size = 0
+        self.assertEqual(
+            list(calc_global.gen_global_best_results(self.args)),
+            global_results)
+        self.assertGreater(len(self.searched_keys) - search_size,
+                           search_size)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
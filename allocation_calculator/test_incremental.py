@@ -0,0 +1,68 @@
+# Native modules
+import copy
+import unittest
+
+# Project modules
+import allocation_calculator.calc as calc
+import allocation_calculator.incremental as incremental
+import allocation_calculator.synthetic as synthetic
+
+
+class TestCalcBestResults(unittest.TestCase):
+    def setUp(self):
+        self.data = synthetic.gen_specs(funghi_size=8, duplicate_ratio=0.3,
+                                        adventure_size=2, capacity=2)
+        calc.normalize_data(self.data)
+
+    def calc_both(self, data, store):
+        adventure_capacity = calc.calc_total_adventure_capacity(data)
+        funghi_capacity = calc.calc_total_funghi_capacity(data)
+        funghi_combinations = list(calc.gen_funghi_combinations(
+            data, adventure_capacity, funghi_capacity))
+        expected_best_results = calc.calc_best_results(
+            data, funghi_combinations)
+        best_results, new_store, scored_count = \
+            incremental.calc_best_results(data, funghi_combinations, store)
+        self.assertEqual(best_results, expected_best_results)
+        self.assertEqual(len(new_store['bitmaps']), len(funghi_combinations))
+        return new_store, scored_count
+
+    def test_roster_diff_1(self):
+        store, scored_count = self.calc_both(self.data, None)
+        self.assertEqual(scored_count, len(store['bitmaps']))
+        # Nothing is scored again without any changes
+        store, scored_count = self.calc_both(self.data, store)
+        self.assertEqual(scored_count, 0)
+        # Add, change and remove funghis
+        data = copy.deepcopy(self.data)
+        funghis = data['funghis']
+        funghis[9] = copy.deepcopy(funghis[1])
+        funghis[9]['stats']['speed'] += 50
+        funghis[2]['stats']['vitality'] += 50
+        del funghis[3]
+        new_store, scored_count = self.calc_both(data, store)
+        changed_count = sum(
+            1 for key in new_store['bitmaps']
+            if any(2 in ids or 9 in ids for _, ids in key))
+        self.assertEqual(scored_count, changed_count)
+        self.assertLess(scored_count, len(new_store['bitmaps']))
+
+    def test_adventures_changed_1(self):
+        store, _ = self.calc_both(self.data, None)
+        data = copy.deepcopy(self.data)
+        adventure = next(iter(data['adventures'].values()))
+        adventure['perfect_rewards'] = {'item1': 5}
+        store, scored_count = self.calc_both(data, store)
+        self.assertEqual(scored_count, len(store['bitmaps']))
+
+    def test_rewards_changed_1(self):
+        # The rewards do not change the met requirements
+        store, _ = self.calc_both(self.data, None)
+        data = copy.deepcopy(self.data)
+        data['rewards']['item1'] = 10.0
+        _, scored_count = self.calc_both(data, store)
+        self.assertEqual(scored_count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
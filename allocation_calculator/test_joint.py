@@ -0,0 +1,91 @@
+# Native modules
+import copy
+import unittest
+
+# Project modules
+import allocation_calculator.calc as calc
+import allocation_calculator.joint as joint
+
+
+class TestGenJointBestResults(unittest.TestCase):
+    STUB_FUNGHIS = {
+        1: {
+            'name': 'funghi1',
+            'capacity': 1,
+            'stats': {
+                'vitality': 20,
+            },
+            'skills': {},
+        },
+        2: {
+            'name': 'funghi2',
+            'capacity': 1,
+            'stats': {
+                'vitality': 10,
+            },
+            'skills': {},
+        },
+    }
+    STUB_REWARDS = {
+        'item1': 1.0,
+        'item2': 1.0,
+    }
+
+    def gen_data(self, adventure_id, vitality, reward_value):
+        # The data is normalized like the loaded data
+        data = {
+            'adventures': {
+                adventure_id: {
+                    'name': 'adventure{}'.format(adventure_id),
+                    'capacity': 1,
+                    'requirements': {
+                        1: {
+                            'name': 'path1',
+                            'stats': [{
+                                'vitality': vitality,
+                            }],
+                            'rewards': {
+                                'item1': reward_value,
+                            },
+                        },
+                    },
+                    'perfect_rewards': {
+                        'item2': 0,
+                    },
+                },
+            },
+            'funghis': copy.deepcopy(self.STUB_FUNGHIS),
+            'rewards': self.STUB_REWARDS,
+        }
+        calc.normalize_data(data)
+        return data
+
+    def test_better_than_order_1(self):
+        # Allocating the first adventure first takes funghi 1, which is the
+        # only funghi for the second adventure
+        all_data = [self.gen_data(1, 10, 2), self.gen_data(2, 20, 10)]
+        all_global_results = list(joint.gen_joint_best_results(all_data))
+        self.assertEqual(len(all_global_results), 1)
+        global_results = all_global_results[0]
+        self.assertEqual([results['max_score'] for results in global_results],
+                         [2.0, 10.0])
+        self.assertEqual(global_results[0]['results'][0][0], {1: [2]})
+        self.assertEqual(global_results[1]['results'][0][0], {2: [1]})
+
+    def test_empty_1(self):
+        # Only funghi 1 can score, the other adventure gets nothing
+        all_data = [self.gen_data(1, 20, 1), self.gen_data(2, 20, 1),
+                    self.gen_data(3, 20, 1)]
+        all_global_results = list(joint.gen_joint_best_results(all_data))
+        self.assertEqual(len(all_global_results), 3)
+        for global_results in all_global_results:
+            total_score = sum(results['max_score']
+                              for results in global_results)
+            self.assertEqual(total_score, 1.0)
+        global_results = all_global_results[0]
+        self.assertEqual(global_results[1]['results'][0][0],
+                         {2: [calc.EMPTY_ID]})
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,80 @@
+# Native modules
+import os
+import tempfile
+import unittest
+
+# Project modules
+import allocation_calculator.loader as loader
+import allocation_calculator.test_calc as test_calc
+
+
+class TestLoadSpec(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.spec_path = os.path.join(self.temp_dir.name, 'funghis.yaml')
+        self.cache_path = self.spec_path + loader.CACHE_SUFFIX
+        self.write_spec(test_calc.TestMain.STUB_FUNGHIS)
+        loader.LOADED_SPECS.clear()
+
+    def tearDown(self):
+        loader.LOADED_SPECS.clear()
+        self.temp_dir.cleanup()
+
+    def write_spec(self, content):
+        with open(self.spec_path, 'w', encoding='utf8') as stream:
+            stream.write(content)
+
+    def test_normalized_1(self):
+        self.write_spec('1:\n  name: Funghi 1\n  capacity: 1\n')
+        funghis = loader.load_spec(self.spec_path, 'funghis')
+        self.assertEqual(funghis[1]['skills'], [])
+        self.assertTrue(os.path.exists(self.cache_path))
+
+    def test_copy_1(self):
+        funghis = loader.load_spec(self.spec_path, 'funghis')
+        del funghis[1]
+        funghis = loader.load_spec(self.spec_path, 'funghis')
+        self.assertIn(1, funghis)
+
+    def test_cache_1(self):
+        expected_funghis = loader.load_spec(self.spec_path, 'funghis')
+        loader.LOADED_SPECS.clear()
+        # The spec file is not parsed if the cache file is fresh
+        with open(self.spec_path, 'w', encoding='utf8') as stream:
+            stream.write('')
+        stat = os.stat(self.spec_path)
+        compiled = loader.read_compiled_spec(self.cache_path, 'funghis')
+        compiled['mtime'] = stat.st_mtime_ns
+        compiled['size'] = stat.st_size
+        loader.write_compiled_spec(self.cache_path, compiled)
+        funghis = loader.load_spec(self.spec_path, 'funghis')
+        self.assertEqual(funghis, expected_funghis)
+
+    def test_invalidated_1(self):
+        loader.load_spec(self.spec_path, 'funghis')
+        self.write_spec('1:\n  name: Funghi 1\n  capacity: 1\n')
+        funghis = loader.load_spec(self.spec_path, 'funghis')
+        self.assertEqual(list(funghis), [1])
+
+    def test_version_1(self):
+        loader.load_spec(self.spec_path, 'funghis')
+        compiled = loader.read_compiled_spec(self.cache_path, 'funghis')
+        compiled['version'] = loader.CACHE_VERSION + 1
+        loader.write_compiled_spec(self.cache_path, compiled)
+        self.assertIsNone(loader.read_compiled_spec(self.cache_path,
+                                                    'funghis'))
+
+    def test_broken_cache_1(self):
+        with open(self.cache_path, 'wb') as stream:
+            stream.write(b'broken')
+        funghis = loader.load_spec(self.spec_path, 'funghis')
+        self.assertEqual(len(funghis), 3)
+
+    def test_no_cache_1(self):
+        funghis = loader.load_spec(self.spec_path, 'funghis', use_cache=False)
+        self.assertEqual(len(funghis), 3)
+        self.assertFalse(os.path.exists(self.cache_path))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,62 @@
+# Native modules
+import itertools
+import unittest
+
+# Project modules
+import allocation_calculator.calc as calc
+import allocation_calculator.model as model
+import allocation_calculator.synthetic as synthetic
+
+
+class TestCompile(unittest.TestCase):
+    def test_compile_funghi_1(self):
+        stat_idxs = {'power': 0, 'speed': 1, 'vitality': 2}
+        skill_idxs = {'fire': 0}
+        funghi = {'stats': {'vitality': 5, 'power': 3}, 'skills': []}
+        self.assertEqual(model.compile_funghi(funghi, stat_idxs, skill_idxs),
+                         ((3, None, 5), (None,)))
+
+    def test_compile_requirement_1(self):
+        stat_idxs = {'power': 0, 'speed': 1}
+        skill_idxs = {'fire': 0, 'water': 1}
+        requirement = {
+            'stats': [{'speed': 10, 'power': 2}, {'power': 4}],
+            'skills': [{'water': 1}],
+            'reduce_stats': {'speed': 30},
+        }
+        self.assertEqual(
+            model.compile_requirement(requirement, stat_idxs, skill_idxs),
+            ((((1, 10), (0, 2)), ((0, 4),)), (((1, 1),),), ((1, 30),)))
+
+
+class TestIsRequirementMet(unittest.TestCase):
+    def test_same_as_dict_1(self):
+        # The compiled requirements are met exactly when the dict ones are
+        for seed in range(3):
+            data = synthetic.gen_specs(funghi_size=8, capacity=3, seed=seed)
+            calc.normalize_data(data)
+            allocation_model = calc.gen_allocation_model(data)
+            augmented_cache = calc.gen_augmented_funghis_cache(data)
+            adventures = data['adventures']
+            for adventure_id, adventure in adventures.items():
+                requirement_records, _ = \
+                    allocation_model['adventures'][adventure_id]
+                requirements = adventure['requirements']
+                for (requirement_id, requirement), requirement_record in \
+                        zip(requirements.items(), requirement_records):
+                    for allocation in itertools.combinations(
+                            data['funghis'], 3):
+                        augmented_funghis = calc.gen_cached_augmented_funghis(
+                            augmented_cache, adventure_id, requirement_id,
+                            allocation)
+                        funghi_records = calc.gen_augmented_funghi_records(
+                            requirement_record[3], allocation)
+                        self.assertEqual(
+                            model.is_requirement_met(requirement_record[1],
+                                                     funghi_records),
+                            calc.is_requirement_met(requirement,
+                                                    augmented_funghis))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
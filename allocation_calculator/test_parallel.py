@@ -0,0 +1,58 @@
+# Native modules
+import unittest
+
+# Project modules
+import allocation_calculator.calc as calc
+import allocation_calculator.loader as loader
+import allocation_calculator.parallel as parallel
+import allocation_calculator.test_calc as test_calc
+
+
+class TestParallel(unittest.TestCase):
+    def setUp(self):
+        stub = test_calc.TestMain
+        self.data = {
+            'adventures': loader.parse_yaml(stub.STUB_ADVENTURES),
+            'funghis': loader.parse_yaml(stub.STUB_FUNGHIS),
+            'rewards': loader.parse_yaml(stub.STUB_REWARDS),
+        }
+        calc.normalize_data(self.data)
+
+    def test_simple_1(self):
+        funghi_combinations = calc.gen_funghi_combinations(self.data, 3, 3)
+        expected_best_results = calc.calc_best_results(
+            self.data, funghi_combinations)
+        best_results = parallel.calc_best_results(self.data, 3, 3, workers=2)
+        self.assertEqual(best_results, expected_best_results)
+
+    def test_ties_1(self):
+        # Make all allocations have the same score
+        self.data['rewards'] = {name: 0.0 for name in self.data['rewards']}
+        for max_results in [0, 2]:
+            funghi_combinations = calc.gen_funghi_combinations(
+                self.data, 3, 3)
+            expected_best_results = calc.calc_best_results(
+                self.data, funghi_combinations, max_results)
+            best_results = parallel.calc_best_results(
+                self.data, 3, 3, max_results, workers=2)
+            self.assertEqual(best_results, expected_best_results)
+
+    def test_shared_pool_1(self):
+        # The workers score the new search instead of the last one
+        all_rewards = [self.data['rewards'],
+                       {name: 1.0 for name in self.data['rewards']}]
+        with parallel.open_pool(2) as executor:
+            for rewards in all_rewards * 2:
+                data = dict(self.data, rewards=rewards)
+                funghi_combinations = calc.gen_funghi_combinations(data, 3, 3)
+                expected_best_results = calc.calc_best_results(
+                    data, funghi_combinations)
+                best_results = parallel.calc_best_results(
+                    data, 3, 3, workers=2, executor=executor)
+                self.assertEqual(best_results, expected_best_results)
+        with parallel.open_pool(1) as executor:
+            self.assertIsNone(executor)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,80 @@
+# Native modules
+import random
+import unittest
+
+# Project modules
+import allocation_calculator.calc as calc
+import allocation_calculator.pareto as pareto
+import allocation_calculator.synthetic as synthetic
+
+
+class TestUpdateFrontier(unittest.TestCase):
+    def calc_frontier_totals(self, all_totals):
+        points = {}
+        dominated_totals = set()
+        for totals in all_totals:
+            if totals not in points and \
+                    pareto.update_frontier(points, dominated_totals, totals):
+                points[totals] = None
+        return points
+
+    def test_simple_1(self):
+        all_totals = [(2, 2), (1, 5), (3, 1), (3, 3), (5, 1), (1, 5), (2, 2)]
+        self.assertEqual(sorted(self.calc_frontier_totals(all_totals)),
+                         [(1, 5), (3, 3), (5, 1)])
+
+    def test_same_as_pairwise_1(self):
+        rand = random.Random(0)
+        for _ in range(20):
+            all_totals = [tuple(rand.randint(0, 4) for _ in range(3))
+                          for _ in range(30)]
+            expected_frontier_totals = {
+                totals for totals in all_totals
+                if not any(other_totals != totals and
+                           all(other_value >= value for value, other_value
+                               in zip(totals, other_totals))
+                           for other_totals in all_totals)}
+            self.assertEqual(set(self.calc_frontier_totals(all_totals)),
+                             expected_frontier_totals)
+
+
+class TestCalcFrontier(unittest.TestCase):
+    def test_best_score_1(self):
+        data = synthetic.gen_specs(funghi_size=8, adventure_size=2,
+                                   capacity=2)
+        calc.normalize_data(data)
+        funghi_combinations = list(calc.gen_funghi_combinations(
+            data, calc.calc_total_adventure_capacity(data),
+            calc.calc_total_funghi_capacity(data)))
+        frontier = pareto.calc_frontier(data, funghi_combinations, 2,
+                                        chunk_size=7)
+        points = frontier['points']
+        self.assertGreater(len(points), 0)
+        for point in points:
+            self.assertLessEqual(len(point['results']), 2)
+            self.assertLessEqual(len(point['results']), point['result_count'])
+        # The best combinations are on the frontier with positive importance
+        # values, in the first point
+        best_results = calc.calc_best_results(data, funghi_combinations, 2)
+        self.assertEqual(points[0]['score'], best_results['max_score'])
+        self.assertEqual(points[0]['results'], best_results['results'])
+
+    def test_unlimited_1(self):
+        data = synthetic.gen_specs(funghi_size=8, adventure_size=2,
+                                   capacity=2)
+        calc.normalize_data(data)
+        funghi_combinations = list(calc.gen_funghi_combinations(
+            data, calc.calc_total_adventure_capacity(data),
+            calc.calc_total_funghi_capacity(data)))
+        frontier = pareto.calc_frontier(data, funghi_combinations,
+                                        chunk_size=7)
+        # All combinations of the frontier are kept, and only them
+        result_size = 0
+        for point in frontier['points']:
+            self.assertEqual(len(point['results']), point['result_count'])
+            result_size += len(point['results'])
+        self.assertLess(result_size, len(funghi_combinations))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
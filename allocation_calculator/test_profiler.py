@@ -0,0 +1,69 @@
+# Native modules
+import time
+import unittest
+
+# Project modules
+import allocation_calculator.calc as calc
+import allocation_calculator.loader as loader
+import allocation_calculator.profiler as profiler
+import allocation_calculator.test_calc as test_calc
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        stub = test_calc.TestMain
+        self.data = {
+            'adventures': loader.parse_yaml(stub.STUB_ADVENTURES),
+            'funghis': loader.parse_yaml(stub.STUB_FUNGHIS),
+            'rewards': loader.parse_yaml(stub.STUB_REWARDS),
+        }
+        calc.normalize_data(self.data)
+
+    def tearDown(self):
+        profiler.disable()
+        profiler.reset()
+
+    def calc_best_results(self):
+        funghi_combinations = calc.gen_funghi_combinations(self.data, 3, 3)
+        return calc.calc_best_results(self.data, funghi_combinations)
+
+    def test_disabled_1(self):
+        profiler.disable()
+        profiler.reset()
+        self.calc_best_results()
+        self.assertEqual(profiler.gen_report(), {
+            'counters': {},
+            'phases': {},
+        })
+
+    def test_counters_1(self):
+        profiler.enable()
+        self.data['adventures'][2]['allowed_funghis'] = [1, 2]
+        best_results = self.calc_best_results()
+        profiler.disable()
+        self.data['adventures'][2].pop('allowed_funghis')
+        report = profiler.gen_report()
+        counters = report['counters']
+        self.assertEqual(counters['combinations'], 1)
+        self.assertEqual(counters['rejected_combinations'], 2)
+        self.assertEqual(counters['scored_combinations'], 1)
+        self.assertEqual(counters['requirement_checks'], 9)
+        self.assertGreater(counters['deepcopies'], 0)
+        self.assertEqual(set(report['phases']), {'enumerate', 'score', 'rank'})
+        # The results are the same as the ones without the profiler
+        self.data['adventures'][2]['allowed_funghis'] = [1, 2]
+        self.assertEqual(self.calc_best_results(), best_results)
+
+    def test_exclusive_phases_1(self):
+        profiler.enable()
+        with profiler.phase('outer'):
+            time.sleep(0.01)
+            with profiler.phase('inner'):
+                time.sleep(0.02)
+        phases = profiler.gen_report()['phases']
+        self.assertLess(phases['outer'], 0.02)
+        self.assertGreaterEqual(phases['inner'], 0.02)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
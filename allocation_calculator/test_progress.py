@@ -0,0 +1,54 @@
+# Native modules
+import io
+import unittest
+
+# Project modules
+import allocation_calculator.calc as calc
+import allocation_calculator.estimate as estimate
+import allocation_calculator.progress as progress
+import allocation_calculator.synthetic as synthetic
+
+
+class TestReporter(unittest.TestCase):
+    def setUp(self):
+        self.data = synthetic.gen_specs(funghi_size=20, capacity=3)
+        calc.normalize_data(self.data)
+        self.adventure_capacity = calc.calc_total_adventure_capacity(
+            self.data)
+        self.funghi_capacity = calc.calc_total_funghi_capacity(self.data)
+
+    def calc_best_results(self, reporter=None):
+        funghi_combinations = calc.gen_funghi_combinations(
+            self.data, self.adventure_capacity, self.funghi_capacity)
+        return calc.calc_best_results(self.data, funghi_combinations,
+                                      reporter=reporter)
+
+    def test_best_results_1(self):
+        total = estimate.count_funghi_combinations(
+            self.data, self.adventure_capacity, self.funghi_capacity)
+        stream = io.StringIO()
+        reporter = progress.gen_reporter(total, 0.0, stream)
+        best_results = self.calc_best_results(reporter)
+        progress.finish(reporter)
+        # The results are the same as without the reporter
+        self.assertEqual(best_results, self.calc_best_results())
+        self.assertEqual(reporter['count'], total)
+        self.assertEqual(reporter['best_score'], best_results['max_score'])
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), total // progress.CHECK_STEP + 1)
+        self.assertTrue(lines[-1].startswith(
+            'Progress: {}/{} combinations (100.0%)'.format(total, total)))
+
+    def test_interval_1(self):
+        stream = io.StringIO()
+        reporter = progress.gen_reporter(None, 3600.0, stream)
+        self.calc_best_results(reporter)
+        # Only the last progress is reported within the interval
+        self.assertEqual(stream.getvalue(), '')
+        progress.finish(reporter)
+        self.assertEqual(len(stream.getvalue().splitlines()), 1)
+        self.assertNotIn('ETA', stream.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,62 @@
+# Native modules
+import unittest
+
+# Third-party modules
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Project modules
+import allocation_calculator.calc as calc
+import allocation_calculator.incremental as incremental
+import allocation_calculator.reweight as reweight
+import allocation_calculator.synthetic as synthetic
+
+
+class TestCalcBestResults(unittest.TestCase):
+    def setUp(self):
+        # There are not enough funghis, so some allocations are empty
+        self.data = synthetic.gen_specs(funghi_size=5, adventure_size=2,
+                                        capacity=3)
+        calc.normalize_data(self.data)
+        self.funghi_combinations = list(calc.gen_funghi_combinations(
+            self.data, calc.calc_total_adventure_capacity(self.data),
+            calc.calc_total_funghi_capacity(self.data)))
+        _, self.store, _ = incremental.calc_best_results(
+            self.data, self.funghi_combinations)
+
+    def check_rewards(self, rewards, engine):
+        data = reweight.gen_store_data(self.store, rewards)
+        expected_best_results = calc.calc_best_results(
+            dict(self.data, rewards=rewards), self.funghi_combinations, 2)
+        self.assertEqual(reweight.calc_best_results(data, self.store, 2,
+                                                    engine),
+                         expected_best_results)
+
+    def gen_rewards_list(self):
+        reward_names = list(self.data['rewards'])
+        return [
+            self.data['rewards'],
+            {reward_name: 1.0 for reward_name in reward_names},
+            {reward_name: 0.1 * (idx + 1) - 0.3
+             for idx, reward_name in enumerate(reward_names)},
+        ]
+
+    def test_python_1(self):
+        for rewards in self.gen_rewards_list():
+            self.check_rewards(rewards, 'python')
+
+    @unittest.skipIf(numpy is None, 'requires the "numpy" package')
+    def test_numpy_1(self):
+        for rewards in self.gen_rewards_list():
+            self.check_rewards(rewards, 'numpy')
+
+    def test_missing_reward_1(self):
+        data = reweight.gen_store_data(self.store, {})
+        with self.assertRaises(ValueError):
+            reweight.calc_best_results(data, self.store)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
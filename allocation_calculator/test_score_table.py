@@ -0,0 +1,143 @@
+# Native modules
+import copy
+import itertools
+import os
+import tempfile
+import unittest
+
+# Project modules
+import allocation_calculator.calc as calc
+import allocation_calculator.score_table as score_table
+import allocation_calculator.synthetic as synthetic
+
+
+class TestScoreTable(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.table_dir = score_table.TABLE_DIR
+        score_table.TABLE_DIR = self.tmp_dir.name
+        score_table.LOADED_TABLES.clear()
+        self.data = synthetic.gen_specs(funghi_size=8, adventure_size=2,
+                                        capacity=2)
+        calc.normalize_data(self.data)
+
+    def tearDown(self):
+        score_table.TABLE_DIR = self.table_dir
+        score_table.LOADED_TABLES.clear()
+        self.tmp_dir.cleanup()
+
+    def calc_both(self, data):
+        funghi_combinations = list(calc.gen_funghi_combinations(
+            data, calc.calc_total_adventure_capacity(data),
+            calc.calc_total_funghi_capacity(data)))
+        best_results = calc.calc_best_results(data, funghi_combinations,
+                                              engine='table')
+        expected_best_results = calc.calc_best_results(data,
+                                                       funghi_combinations)
+        self.assertEqual(best_results, expected_best_results)
+
+    def read_tables(self):
+        tables = {}
+        for file_name in os.listdir(self.tmp_dir.name):
+            with open(os.path.join(self.tmp_dir.name, file_name),
+                      'rb') as stream:
+                tables[file_name] = stream.read()
+        return tables
+
+    def test_same_as_python_1(self):
+        self.calc_both(self.data)
+        # Each adventure is also solved alone
+        for adventure_id, adventure in self.data['adventures'].items():
+            data = dict(self.data, adventures={adventure_id: adventure})
+            self.calc_both(data)
+        self.assertEqual(len(self.read_tables()), 2)
+
+    def test_roster_changed_1(self):
+        self.calc_both(self.data)
+        tables = self.read_tables()
+        # The tables are used by the rosters with fewer funghis
+        data = copy.deepcopy(self.data)
+        del data['funghis'][1]
+        score_table.LOADED_TABLES.clear()
+        self.calc_both(data)
+        self.assertEqual(self.read_tables(), tables)
+        # The tables are built again if any funghi is changed
+        data['funghis'][2]['stats']['speed'] += 50
+        self.calc_both(data)
+        new_tables = self.read_tables()
+        self.assertEqual(list(new_tables), list(tables))
+        self.assertNotEqual(new_tables, tables)
+
+    def test_record_offset_1(self):
+        # The offsets are calculated without an index of the records
+        for capacity in range(4):
+            data = synthetic.gen_specs(funghi_size=6, capacity=capacity)
+            calc.normalize_data(data)
+            table = score_table.gen_table(data, 1)
+            funghi_ids = sorted(table['positions'])
+            record_struct = table['record_struct']
+            allocations = list(itertools.combinations_with_replacement(
+                funghi_ids, capacity))
+            self.assertEqual(len(table['buffer']),
+                             table['records_offset'] +
+                             len(allocations) * record_struct.size)
+            for allocation in allocations:
+                record = record_struct.unpack_from(
+                    table['buffer'], score_table.calc_record_offset(
+                        table, allocation[::-1]))
+                self.assertEqual(record[:capacity], allocation)
+
+    def test_roster_regrown_1(self):
+        # Count the tables which are built
+        build_table = score_table.build_table
+        built_rosters = []
+
+        def count_build_table(data, adventure_id, adventure_hash, roster,
+                              old_table=None):
+            built_rosters.append(sorted(roster))
+            return build_table(data, adventure_id, adventure_hash, roster,
+                               old_table)
+
+        score_table.build_table = count_build_table
+        try:
+            # The tables are built for a roster without a funghi, and again
+            # once it is added back
+            data = copy.deepcopy(self.data)
+            del data['funghis'][1]
+            self.calc_both(data)
+            self.calc_both(self.data)
+            self.assertEqual(len(built_rosters), 4)
+            # Shrinking and growing the roster again does not build them
+            for removed_funghi_ids in [[1], [2, 3], [1, 4], []]:
+                data = copy.deepcopy(self.data)
+                for funghi_id in removed_funghi_ids:
+                    del data['funghis'][funghi_id]
+                score_table.LOADED_TABLES.clear()
+                self.calc_both(data)
+            self.assertEqual(len(built_rosters), 4)
+        finally:
+            score_table.build_table = build_table
+
+    def test_too_many_records_1(self):
+        max_record_size = score_table.MAX_RECORD_SIZE
+        score_table.MAX_RECORD_SIZE = 10
+        try:
+            with self.assertRaises(ValueError):
+                self.calc_both(self.data)
+        finally:
+            score_table.MAX_RECORD_SIZE = max_record_size
+
+    def test_broken_1(self):
+        self.calc_both(self.data)
+        tables = self.read_tables()
+        for file_name in tables:
+            with open(os.path.join(self.tmp_dir.name, file_name),
+                      'wb') as stream:
+                stream.write(b'broken')
+        score_table.LOADED_TABLES.clear()
+        self.calc_both(self.data)
+        self.assertEqual(self.read_tables(), tables)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,86 @@
+# Native modules
+import os
+import tempfile
+import unittest
+
+# Third-party modules
+import yaml
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Project modules
+import allocation_calculator.branch_bound as branch_bound
+import allocation_calculator.calc as calc
+import allocation_calculator.loader as loader
+import allocation_calculator.synthetic as synthetic
+
+
+class TestGenSpecs(unittest.TestCase):
+    OPTIONS = {
+        'funghi_size': 8,
+        'duplicate_ratio': 0.3,
+        'adventure_size': 2,
+        'capacity': 2,
+        'requirement_size': 6,
+        'reduce_ratio': 0.4,
+        'allowed_ratio': 0.8,
+    }
+
+    def gen_data(self, seed):
+        specs = synthetic.gen_specs(seed=seed, **self.OPTIONS)
+        # The specs should be the same after being written as YAML
+        data = {spec_name: loader.parse_yaml(yaml.safe_dump(spec))
+                for spec_name, spec in specs.items()}
+        self.assertEqual(data, specs)
+        calc.normalize_data(data)
+        return data
+
+    def test_seed_1(self):
+        self.assertEqual(synthetic.gen_specs(seed=1, **self.OPTIONS),
+                         synthetic.gen_specs(seed=1, **self.OPTIONS))
+        self.assertNotEqual(synthetic.gen_specs(seed=1, **self.OPTIONS),
+                            synthetic.gen_specs(seed=2, **self.OPTIONS))
+
+    def test_unknown_option_1(self):
+        with self.assertRaises(ValueError):
+            synthetic.gen_specs(funghis=10)
+
+    def test_engines_1(self):
+        engines = ['python']
+        if numpy is not None:
+            engines.append('numpy')
+        for seed in range(5):
+            data = self.gen_data(seed)
+            adventure_capacity = calc.calc_total_adventure_capacity(data)
+            funghi_capacity = calc.calc_total_funghi_capacity(data)
+            expected_best_results = branch_bound.calc_best_results(
+                data, adventure_capacity, funghi_capacity)
+            for engine in engines:
+                funghi_combinations = calc.gen_funghi_combinations(
+                    data, adventure_capacity, funghi_capacity)
+                best_results = calc.calc_best_results(
+                    data, funghi_combinations, engine=engine)
+                self.assertEqual(best_results, expected_best_results)
+
+
+class TestWriteDataDirs(unittest.TestCase):
+    def test_seeds_1(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data_dirs = synthetic.write_data_dirs(
+                tmp_dir, [3, 1], '{}-synthetic', funghi_size=4, capacity=2)
+            self.assertEqual(data_dirs, [
+                os.path.join(tmp_dir, '3-synthetic'),
+                os.path.join(tmp_dir, '1-synthetic'),
+            ])
+            for seed, data_dir in zip([3, 1], data_dirs):
+                data = loader.load_data_dir(
+                    data_dir, os.path.join(data_dir, 'funghis.yaml'), False)
+                specs = synthetic.gen_specs(funghi_size=4, capacity=2,
+                                            seed=seed)
+                self.assertEqual(data['rewards'], specs['rewards'])
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,343 @@
+# Native modules
+import argparse
+import concurrent.futures
+import glob
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Project modules
+import allocation_calculator.branch_bound as branch_bound
+import allocation_calculator.calc as calc
+import allocation_calculator.loader as loader
+import allocation_calculator.profiler as profiler
+import allocation_calculator.synthetic as synthetic
+import calc_compatible
+import calc_global
+
+RESULT_VERSION = 1
+# The data directory numbers of the examples in README.md
+COMPATIBLE_DIR_SETS = [
+    [1, 2], [4, 5], [6, 7], [8, 9], [10, 11], [12, 13],
+    [14, 15, 16], [17, 18, 19], [20, 21, 22],
+]
+GLOBAL_DIR_SETS = [
+    [19, 16, 13, 11, 9, 7, 5, 2],
+]
+SYNTHETIC_FUNGHI_SIZES = [100, 200, 500]
+SYNTHETIC_CAPACITIES = [3, 6]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--data_root', default='data',
+                        help='directory containing the data directories')
+    parser.add_argument('--funghis_path', default='data/all/funghis.yaml',
+                        help='funghis spec path')
+    parser.add_argument('--engine', default='python',
+                        choices=['python', 'numpy', 'table'],
+                        help='scoring engine ("numpy" scores the combinations'
+                        ' in batches and requires the "numpy" package,'
+                        ' "table" looks up the scores in the score tables'
+                        ' built in "score_tables")')
+    parser.add_argument('--search', default='exhaustive',
+                        choices=['exhaustive', 'branch_bound'],
+                        help='search mode ("branch_bound" prunes the'
+                        ' allocations which can not reach the best score,'
+                        ' "--engine" is ignored)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='the number of worker processes of the'
+                        ' compatible and global cases')
+    parser.add_argument('--suites', default='single,compatible,global,'
+                        'synthetic', help='suites to run separated by commas')
+    parser.add_argument('--filter', default=None,
+                        help='only run the cases whose names contain it')
+    parser.add_argument('--synthetic_limit', type=int, default=20000,
+                        help='the number of combinations scored in each'
+                        ' synthetic case')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed of the synthetic cases')
+    parser.add_argument('--output', default=None,
+                        help='path of the JSON results')
+    parser.add_argument('--baseline', default=None,
+                        help='path of the JSON results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='the ratio of slowdown regarded as a regression')
+    args = parser.parse_args()
+    args.suites = args.suites.split(',')
+    return args
+
+
+def gen_cases(args):
+    cases = []
+    if 'single' in args.suites:
+        for data_dir in list_data_dirs(args.data_root):
+            cases.append({
+                'name': 'single/{}'.format(os.path.basename(data_dir)),
+                'suite': 'single',
+                'data_dirs': [data_dir],
+            })
+    if 'compatible' in args.suites:
+        for numbers in COMPATIBLE_DIR_SETS:
+            cases.append({
+                'name': 'compatible/{}'.format(
+                    '-'.join(str(number) for number in numbers)),
+                'suite': 'compatible',
+                'data_dirs': [find_data_dir(args.data_root, number)
+                              for number in numbers],
+            })
+    if 'global' in args.suites:
+        for numbers in GLOBAL_DIR_SETS:
+            cases.append({
+                'name': 'global/{}'.format(
+                    '-'.join(str(number) for number in numbers)),
+                'suite': 'global',
+                'data_dirs': [find_data_dir(args.data_root, number)
+                              for number in numbers],
+            })
+    if 'synthetic' in args.suites and args.engine == 'table':
+        # The score tables of the synthetic cases would have too many records
+        print('The synthetic cases are skipped by the "table" engine',
+              file=sys.stderr)
+    elif 'synthetic' in args.suites:
+        for funghi_size, capacity in itertools.product(
+                SYNTHETIC_FUNGHI_SIZES, SYNTHETIC_CAPACITIES):
+            cases.append({
+                'name': 'synthetic/f{}-c{}'.format(funghi_size, capacity),
+                'suite': 'synthetic',
+                'funghi_size': funghi_size,
+                'capacity': capacity,
+            })
+    if args.filter is not None:
+        cases = [case for case in cases if args.filter in case['name']]
+    return cases
+
+
+def list_data_dirs(data_root):
+    # Sort the data directories by their numbers
+    data_dirs = []
+    for data_dir in glob.glob(os.path.join(data_root, '*-*')):
+        number = os.path.basename(data_dir).split('-')[0]
+        if number.isdigit() and os.path.isdir(data_dir):
+            data_dirs.append((int(number), data_dir))
+    return [data_dir for _, data_dir in sorted(data_dirs)]
+
+
+def find_data_dir(data_root, number):
+    pattern = os.path.join(data_root, '{}-*'.format(number))
+    data_dirs = glob.glob(pattern)
+    if len(data_dirs) != 1:
+        raise ValueError('Can not find the data directory "{}"'.format(
+            pattern))
+    return data_dirs[0]
+
+
+def run_case(args, case):
+    """Run a case in a new process.
+
+    The peak memory and the in-process caches are not shared with other
+    cases. The process is not daemonic, so the case can start its own worker
+    processes.
+    """
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(run_case_in_process, vars(args), case).result()
+
+
+def run_case_in_process(arg_dict, case):
+    args = argparse.Namespace(**arg_dict)
+    timer = {'phases': {}, 'last': time.perf_counter()}
+    if case['suite'] == 'single':
+        combination_count = run_single(args, case, timer)
+    elif case['suite'] == 'compatible':
+        combination_count = run_compatible(args, case, timer)
+    elif case['suite'] == 'global':
+        combination_count = run_global(args, case, timer)
+    else:
+        combination_count = run_synthetic(args, case, timer)
+    phases = timer['phases']
+    total_time = sum(phases.values())
+    scoring_time = phases.get('enumerate', 0.0) + phases.get('score', 0.0)
+    result = {
+        'phases': phases,
+        'total': total_time,
+        'combinations': combination_count,
+        'combinations_per_second': None,
+        'peak_rss_kb': None,
+    }
+    if combination_count is not None and scoring_time > 0.0:
+        result['combinations_per_second'] = combination_count / scoring_time
+    if resource is not None:
+        result['peak_rss_kb'] = resource.getrusage(
+            resource.RUSAGE_SELF).ru_maxrss
+    return result
+
+
+def end_phase(timer, phase):
+    now = time.perf_counter()
+    phases = timer['phases']
+    phases[phase] = phases.get(phase, 0.0) + now - timer['last']
+    timer['last'] = now
+
+
+def load_case_data(args, case, timer):
+    all_data = [loader.load_data_dir(data_dir, args.funghis_path)
+                for data_dir in case['data_dirs']]
+    end_phase(timer, 'load')
+    return all_data
+
+
+def run_single(args, case, timer):
+    data = load_case_data(args, case, timer)[0]
+    adventure_capacity = calc.calc_total_adventure_capacity(data)
+    funghi_capacity = calc.calc_total_funghi_capacity(data)
+    return score_data(args, data, adventure_capacity, funghi_capacity, timer)
+
+
+def score_data(args, data, adventure_capacity, funghi_capacity, timer,
+               limit=None):
+    if args.search == 'branch_bound':
+        branch_bound.calc_best_results(
+            data, adventure_capacity, funghi_capacity)
+        end_phase(timer, 'search')
+        return None
+    # The combinations are streamed like the programs, and the enumeration,
+    # scoring and ranking are timed by the profiler
+    counter = {'combinations': 0}
+    funghi_combinations = gen_counted_combinations(itertools.islice(
+        calc.gen_funghi_combinations(data, adventure_capacity,
+                                     funghi_capacity), limit), counter)
+    profiler.enable()
+    try:
+        calc.calc_best_results(data, funghi_combinations, engine=args.engine)
+    finally:
+        profiler.disable()
+    phases = timer['phases']
+    for phase in ['enumerate', 'score', 'rank']:
+        phases[phase] = phases.get(phase, 0.0) + \
+            profiler.PHASE_TIMES.get(phase, 0.0)
+    timer['last'] = time.perf_counter()
+    return counter['combinations']
+
+
+def gen_counted_combinations(funghi_combinations, counter):
+    for funghi_combination in funghi_combinations:
+        counter['combinations'] += 1
+        yield funghi_combination
+
+
+def run_compatible(args, case, timer):
+    all_data = load_case_data(args, case, timer)
+    compatible_args = argparse.Namespace(
+        data_dirs=case['data_dirs'], funghis_path=args.funghis_path,
+        engine=args.engine, search=args.search, workers=args.workers,
+        joint=False,
+        spec_cache=True)
+    calc_compatible.gen_compatible_best_results(compatible_args, all_data)
+    end_phase(timer, 'search')
+    return None
+
+
+def run_global(args, case, timer):
+    load_case_data(args, case, timer)
+    global_args = argparse.Namespace(
+        data_dirs=case['data_dirs'], funghis_path=args.funghis_path,
+        engine=args.engine, search=args.search, workers=args.workers,
+        cache_size=256, spec_cache=True)
+    # Only the first global allocation is searched like the README example
+    next(calc_global.gen_global_best_results(global_args), None)
+    end_phase(timer, 'search')
+    return None
+
+
+def run_synthetic(args, case, timer):
+    data = synthetic.gen_specs(funghi_size=case['funghi_size'],
+                               capacity=case['capacity'], seed=args.seed)
+    calc.normalize_data(data)
+    end_phase(timer, 'generate')
+    adventure_capacity = calc.calc_total_adventure_capacity(data)
+    funghi_capacity = calc.calc_total_funghi_capacity(data)
+    # Only a prefix of the combinations is scored, the whole space is too
+    # large
+    return score_data(args, data, adventure_capacity, funghi_capacity, timer,
+                      args.synthetic_limit)
+
+
+def compare_results(results, baseline, threshold):
+    """Compare the total time of each case with the baseline.
+
+    A case is regressed if it is slower than the baseline by more than the
+    threshold ratio. The cases which are not in both results are skipped.
+    """
+    regressions = []
+    baseline_cases = baseline['cases']
+    for name, case_result in results['cases'].items():
+        if name not in baseline_cases:
+            continue
+        baseline_total = baseline_cases[name]['total']
+        total = case_result['total']
+        if total > baseline_total * (1.0 + threshold):
+            regressions.append({
+                'name': name,
+                'baseline': baseline_total,
+                'total': total,
+            })
+    return regressions
+
+
+def format_number(value, spec):
+    if value is None:
+        return '-'
+    return format(value, spec)
+
+
+def main():
+    args = parse_args()
+    results = {
+        'version': RESULT_VERSION,
+        'python': platform.python_version(),
+        'engine': args.engine,
+        'search': args.search,
+        'workers': args.workers,
+        'cases': {},
+    }
+    for case in gen_cases(args):
+        case_result = run_case(args, case)
+        results['cases'][case['name']] = case_result
+        phases = ', '.join('{} {:.3f}s'.format(phase, seconds)
+                           for phase, seconds in case_result['phases'].items())
+        print('{}: {:.3f}s ({}), {} combinations/s, peak {} KB'.format(
+            case['name'], case_result['total'], phases,
+            format_number(case_result['combinations_per_second'], '.0f'),
+            format_number(case_result['peak_rss_kb'], 'd')))
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf8') as stream:
+            json.dump(results, stream, indent=2, ensure_ascii=False)
+    if args.baseline is not None:
+        with open(args.baseline, 'r', encoding='utf8') as stream:
+            baseline = json.load(stream)
+        for option in ['engine', 'search', 'workers']:
+            if baseline.get(option) != results[option]:
+                print('The baseline uses a different {}: {}'.format(
+                    option, baseline.get(option)), file=sys.stderr)
+        regressions = compare_results(results, baseline, args.threshold)
+        for regression in regressions:
+            print('Regression: {} {:.3f}s -> {:.3f}s'.format(
+                regression['name'], regression['baseline'],
+                regression['total']))
+        if len(regressions) > 0:
+            sys.exit(1)
+        print('No regressions')
+
+
+if __name__ == '__main__':
+    main()
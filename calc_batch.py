@@ -0,0 +1,211 @@
+# Native modules
+import argparse
+import concurrent.futures
+import glob
+import os
+import pickle
+import sys
+import time
+
+# Project modules
+import allocation_calculator.branch_bound as branch_bound
+import allocation_calculator.calc as calc
+import allocation_calculator.estimate as estimate
+import allocation_calculator.loader as loader
+
+# The data of the worker process, it is set once when the worker starts
+WORKER_STATE = {}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--data_dirs', required=True,
+                        help='data directories or glob patterns separated by'
+                        ' commas, e.g. "data/*-*"')
+    parser.add_argument('--funghis_path', default='data/all/funghis.yaml',
+                        help='funghis spec path')
+    parser.add_argument(
+        '--max', type=int, default=10, help='the maximum number of allocations'
+        ' of each adventure (set 0 to be unlimited)')
+    parser.add_argument('--engine', default='python',
+                        choices=['python', 'numpy', 'table'],
+                        help='scoring engine ("numpy" scores the combinations'
+                        ' in batches and requires the "numpy" package,'
+                        ' "table" looks up the scores in the score tables'
+                        ' built in "score_tables")')
+    parser.add_argument('--search', default='exhaustive',
+                        choices=['exhaustive', 'branch_bound'],
+                        help='search mode ("branch_bound" prunes the'
+                        ' allocations which can not reach the best score,'
+                        ' "--engine" is ignored)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='the number of worker processes (set 1 to solve'
+                        ' the adventures in this process)')
+    parser.add_argument('--filter_out_subset_funghis', default=False,
+                        action='store_true',
+                        help='filter out the funghis which meet a subset of'
+                        ' the requirements of another funghi and have lower'
+                        ' stats')
+    parser.add_argument('--no_spec_cache', dest='spec_cache', default=True,
+                        action='store_false',
+                        help='do not read or write the compiled spec cache'
+                        ' files')
+    # Report score
+    parser.add_argument('--report_score', dest='report_score',
+                        action='store_true', help='report score')
+    parser.add_argument('--no_report_score', dest='report_score',
+                        action='store_false', help='do not report score')
+    parser.set_defaults(report_score=True)
+    # Report success rate
+    parser.add_argument('--report_success_rate', dest='report_success_rate',
+                        action='store_true', help='report success rate')
+    parser.add_argument('--no_report_success_rate', dest='report_success_rate',
+                        action='store_false', help='do not report success rate')
+    parser.set_defaults(report_success_rate=True)
+    # Report failed requirement
+    parser.add_argument('--report_failed_requirement',
+                        dest='report_failed_requirement', action='store_true',
+                        help='report failed requirement')
+    parser.add_argument('--no_report_failed_requirement',
+                        dest='report_failed_requirement', action='store_false',
+                        help='do not report failed requirement')
+    parser.set_defaults(report_failed_requirement=True)
+    # One switch to turn off all additional reports
+    parser.add_argument('--no_additional', default=False, action='store_true',
+                        help='do not report any additional information')
+    args = parser.parse_args()
+    args.data_dirs = expand_data_dirs(args.data_dirs.split(','))
+    if len(args.data_dirs) <= 0:
+        raise ValueError('There are no data directories to solve')
+    if args.no_additional:
+        args.report_score = False
+        args.report_success_rate = False
+        args.report_failed_requirement = False
+    return args
+
+
+def expand_data_dirs(patterns):
+    """Expand the glob patterns into the data directories.
+
+    The data directories of each pattern are sorted by their numbers, and
+    the directories without an adventures spec file are skipped.
+    """
+    data_dirs = []
+    for pattern in patterns:
+        matched_dirs = [
+            data_dir for data_dir in glob.glob(pattern)
+            if os.path.isfile(os.path.join(data_dir, 'adventures.yaml'))]
+        matched_dirs.sort(key=gen_data_dir_sort_key)
+        for data_dir in matched_dirs:
+            if data_dir not in data_dirs:
+                data_dirs.append(data_dir)
+    return data_dirs
+
+
+def gen_data_dir_sort_key(data_dir):
+    number = os.path.basename(os.path.normpath(data_dir)).split('-')[0]
+    if number.isdigit():
+        return 0, int(number), data_dir
+    return 1, 0, data_dir
+
+
+def gen_batch_best_results(args):
+    """Generate the best results of each data directory once it is solved.
+
+    The funghis spec is parsed once and shared by all adventures. The
+    adventures are solved by a process pool, the largest ones first, and
+    each output is (data_dir, data, best_results) in the order of finishing.
+    """
+    funghis = loader.load_spec(args.funghis_path, 'funghis', args.spec_cache)
+    options = {
+        'max': args.max,
+        'engine': args.engine,
+        'search': args.search,
+        'filter_out_subset_funghis': args.filter_out_subset_funghis,
+        'spec_cache': args.spec_cache,
+    }
+    init_args = (pickle.dumps(funghis, protocol=pickle.HIGHEST_PROTOCOL),
+                 options)
+    if args.workers <= 1:
+        init_worker(*init_args)
+        for data_dir in args.data_dirs:
+            yield solve_data_dir(data_dir)
+        return
+    data_dirs = sort_data_dirs_by_size(args.data_dirs, funghis, options)
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=args.workers, initializer=init_worker,
+            initargs=init_args) as executor:
+        futures = [executor.submit(solve_data_dir, data_dir)
+                   for data_dir in data_dirs]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+
+def sort_data_dirs_by_size(data_dirs, funghis, options):
+    # Start the largest adventures first, so that the workers finish at
+    # about the same time
+    combination_counts = {}
+    for data_dir in data_dirs:
+        data = load_data(data_dir, funghis, options)
+        combination_counts[data_dir] = estimate.count_funghi_combinations(
+            data, calc.calc_total_adventure_capacity(data),
+            calc.calc_total_funghi_capacity(data))
+    return sorted(data_dirs, key=lambda data_dir: combination_counts[data_dir],
+                  reverse=True)
+
+
+def init_worker(funghis_dump, options):
+    WORKER_STATE['funghis_dump'] = funghis_dump
+    WORKER_STATE['options'] = options
+
+
+def load_data(data_dir, funghis, options):
+    adventures_path = os.path.join(data_dir, 'adventures.yaml')
+    rewards_path = os.path.join(data_dir, 'rewards.yaml')
+    return {
+        'adventures': loader.load_spec(adventures_path, 'adventures',
+                                       options['spec_cache']),
+        'funghis': funghis,
+        'rewards': loader.load_spec(rewards_path, 'rewards',
+                                    options['spec_cache']),
+    }
+
+
+def solve_data_dir(data_dir):
+    options = WORKER_STATE['options']
+    # Each adventure filters its own copy of the funghis
+    funghis = pickle.loads(WORKER_STATE['funghis_dump'])
+    data = load_data(data_dir, funghis, options)
+    if options['filter_out_subset_funghis']:
+        calc.filter_out_subset_funghis(data)
+    total_adventure_capacity = calc.calc_total_adventure_capacity(data)
+    total_funghi_capacity = calc.calc_total_funghi_capacity(data)
+    if options['search'] == 'branch_bound':
+        best_results = branch_bound.calc_best_results(
+            data, total_adventure_capacity, total_funghi_capacity,
+            options['max'])
+    else:
+        funghi_combinations = calc.gen_funghi_combinations(
+            data, total_adventure_capacity, total_funghi_capacity)
+        best_results = calc.calc_best_results(
+            data, funghi_combinations, options['max'], options['engine'])
+    return data_dir, data, best_results
+
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    for data_dir, data, best_results in gen_batch_best_results(args):
+        print('== {} =='.format(data_dir))
+        calc.list_best_allocations(data, best_results, args.report_score,
+                                   args.report_success_rate,
+                                   args.report_failed_requirement)
+        if best_results['result_count'] > len(best_results['results']):
+            print('The limit has been reached')
+        print(flush=True)
+    print('Solved {} data directories in {:.1f}s'.format(
+        len(args.data_dirs), time.perf_counter() - start), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
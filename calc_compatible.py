@@ -1,12 +1,13 @@
 # Native modules
 import argparse
-import os
-
-# Third-party modules
-import yaml
 
 # Project modules
+import allocation_calculator.branch_bound as branch_bound
 import allocation_calculator.calc as calc
+import allocation_calculator.compatible as compatible
+import allocation_calculator.loader as loader
+import allocation_calculator.parallel as parallel
+import allocation_calculator.profiler as profiler
 
 
 def parse_args():
@@ -17,14 +18,40 @@ def parse_args():
     parser.add_argument('--max', type=int, default=10,
                         help='the maximum number of allocations'
                         ' (set 0 to be unlimited)')
+    parser.add_argument('--engine', default='python',
+                        choices=['python', 'numpy', 'table'],
+                        help='scoring engine ("numpy" scores the combinations'
+                        ' in batches and requires the "numpy" package,'
+                        ' "table" looks up the scores in the score tables'
+                        ' built in "score_tables")')
+    parser.add_argument('--search', default='exhaustive',
+                        choices=['exhaustive', 'branch_bound'],
+                        help='search mode ("branch_bound" prunes the'
+                        ' allocations which can not reach the best score,'
+                        ' "--engine" is ignored)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='the number of worker processes used by the'
+                        ' "exhaustive" search')
+    parser.add_argument('--joint', default=False, action='store_true',
+                        help='only score the allocations of each adventure'
+                        ' which can be compatible with the earlier'
+                        ' adventures')
+    parser.add_argument('--no_spec_cache', dest='spec_cache', default=True,
+                        action='store_false',
+                        help='do not read or write the compiled spec cache'
+                        ' files')
+    parser.add_argument('--profile', default=False, action='store_true',
+                        help='print the counters of the hot paths and the'
+                        ' time of each phase to stderr')
     args = parser.parse_args()
     args.data_dirs = args.data_dirs.split(',')
     return args
 
 
-def gen_compatible_best_results(args):
+def gen_compatible_best_results(args, all_data=None):
     # Load all data
-    all_data = load_all_data(args)
+    if all_data is None:
+        all_data = load_all_data(args)
     # Set the intersected allowed funghis to each adventure
     intersected_allowed_funghis = gen_intersected_allowed_funghis(all_data)
     set_intersected_allowed_funghis(all_data, intersected_allowed_funghis)
@@ -32,21 +59,34 @@ def gen_compatible_best_results(args):
     adventure_capacities = get_adventure_capacities(all_data)
     # Generate compatible combinations
     compatible_combinations = None
-    for data, adventure_capacity in zip(all_data, adventure_capacities):
-        results = gen_single_best_results(data)
-        combinations_set = convert_to_combinations_set(results)
-        if compatible_combinations is None:
-            compatible_combinations = combinations_set
-        else:
-            compatible_combinations = gen_compatible_combinations(
-                compatible_combinations, combinations_set, adventure_capacity)
-        if len(compatible_combinations) <= 0:
-            break
+    # The worker processes are shared by the searches of all adventures
+    workers = args.workers if args.search != 'branch_bound' else 1
+    with parallel.open_pool(workers) as executor:
+        for data, adventure_capacity in zip(all_data, adventure_capacities):
+            if args.joint and compatible_combinations is not None and \
+                    compatible.is_narrowed(data, compatible_combinations):
+                # Only score the allocations which can be compatible with the
+                # current combinations
+                compatible_combinations = \
+                    compatible.gen_compatible_combinations(
+                        data, compatible_combinations)
+            else:
+                results = gen_single_best_results(
+                    data, args.engine, args.search, args.workers, executor)
+                combinations_set = convert_to_combinations_set(results)
+                if compatible_combinations is None:
+                    compatible_combinations = combinations_set
+                else:
+                    compatible_combinations = gen_compatible_combinations(
+                        compatible_combinations, combinations_set,
+                        adventure_capacity)
+            if len(compatible_combinations) <= 0:
+                break
     return compatible_combinations
 
 
 def load_all_data(args):
-    return [load_data(data_dir, args.funghis_path)
+    return [loader.load_data_dir(data_dir, args.funghis_path, args.spec_cache)
             for data_dir in args.data_dirs]
 
 
@@ -84,32 +124,20 @@ def get_adventure_capacities(all_data):
     return capacities
 
 
-def gen_single_best_results(data):
-    calc.normalize_data(data)
+def gen_single_best_results(data, engine='python', search='exhaustive',
+                            workers=1, executor=None):
     total_adventure_capacity = calc.calc_total_adventure_capacity(data)
     total_funghi_capacity = calc.calc_total_funghi_capacity(data)
+    if search == 'branch_bound':
+        return branch_bound.calc_best_results(
+            data, total_adventure_capacity, total_funghi_capacity)
+    if workers > 1:
+        return parallel.calc_best_results(
+            data, total_adventure_capacity, total_funghi_capacity,
+            engine=engine, workers=workers, executor=executor)
     funghi_combinations = calc.gen_funghi_combinations(
         data, total_adventure_capacity, total_funghi_capacity)
-    results = calc.calc_allocations_results(data, funghi_combinations)
-    funghi_combinations = calc.gen_funghi_combinations(
-        data, total_adventure_capacity, total_funghi_capacity)
-    return calc.filter_best_results(data, funghi_combinations, results)
-
-
-def load_data(data_dir, funghis_path):
-    adventures_path = os.path.join(data_dir, 'adventures.yaml')
-    rewards_path = os.path.join(data_dir, 'rewards.yaml')
-    with open(adventures_path, 'r', encoding='utf8') as stream:
-        adventures = yaml.load(stream)
-    with open(funghis_path, 'r', encoding='utf8') as stream:
-        funghis = yaml.load(stream)
-    with open(rewards_path, 'r', encoding='utf8') as stream:
-        rewards = yaml.load(stream)
-    return {
-        'adventures': adventures,
-        'funghis': funghis,
-        'rewards': rewards,
-    }
+    return calc.calc_best_results(data, funghi_combinations, engine=engine)
 
 
 def convert_to_combinations_set(best_results):
@@ -127,37 +155,82 @@ def gen_compatible_combinations(combinations, new_combinations,
     # Check whether the current combinations is empty
     if len(combinations) <= 0:
         return new_combinations
-    compatible_combinations = []
     first_combination = next(iter(combinations))
     cur_capacity = len(first_combination)
     # Check whether the current capacity is larger
     if cur_capacity > new_capacity:
         # Check whether any combination is a subset of each current combination
         # If so, the current combination is compatible with the new combination
-        for combination in combinations:
-            for new_combination in new_combinations:
-                if new_combination.issubset(combination):
-                    compatible_combinations.append(combination)
-                    break
-    else:
-        # Check whether any new combination is a subset of each new combination
-        # If so, the new combination is compatible with the current combination
-        for new_combination in new_combinations:
-            for combination in combinations:
-                if combination.issubset(new_combination):
-                    compatible_combinations.append(new_combination)
-                    break
-    return compatible_combinations
+        return filter_superset_combinations(combinations, new_combinations)
+    # Check whether any new combination is a subset of each new combination
+    # If so, the new combination is compatible with the current combination
+    return filter_superset_combinations(new_combinations, combinations)
+
+
+def filter_superset_combinations(combinations, subset_combinations):
+    """Filter the combinations which are supersets of any subset combination.
+
+    The combinations are encoded as bitmasks over the funghi IDs, and the
+    subset combinations are indexed by their bitmasks. Each combination only
+    looks up its own submasks in the index instead of comparing with every
+    subset combination.
+    """
+    funghi_bits = {}
+    subset_masks = {encode_combination(subset_combination, funghi_bits)
+                    for subset_combination in subset_combinations}
+    superset_combinations = []
+    for combination in combinations:
+        mask = encode_combination(combination, funghi_bits)
+        if has_indexed_submask(mask, len(combination), subset_masks):
+            superset_combinations.append(combination)
+    return superset_combinations
+
+
+def encode_combination(combination, funghi_bits):
+    mask = 0
+    for funghi_id in combination:
+        if funghi_id not in funghi_bits:
+            funghi_bits[funghi_id] = 1 << len(funghi_bits)
+        mask |= funghi_bits[funghi_id]
+    return mask
+
+
+def has_indexed_submask(mask, bit_count, subset_masks):
+    # Scan the index if it is smaller than the number of submasks
+    if (1 << bit_count) > len(subset_masks):
+        for subset_mask in subset_masks:
+            if subset_mask & ~mask == 0:
+                return True
+        return False
+    # Look up each submask of the mask, including the mask itself and zero
+    submask = mask
+    while True:
+        if submask in subset_masks:
+            return True
+        if submask == 0:
+            return False
+        submask = (submask - 1) & mask
 
 
 def main():
     args = parse_args()
-    data_list = [load_data(data_dir, args.funghis_path)
-                 for data_dir in args.data_dirs]
+    if args.profile:
+        profiler.enable()
+    with profiler.phase('load'):
+        data_list = load_all_data(args)
     funghis = data_list[0]['funghis']
+    with profiler.phase('search'):
+        compatible_combinations = gen_compatible_best_results(args, data_list)
+    with profiler.phase('print'):
+        print_compatible_combinations(args, funghis, compatible_combinations)
+    if args.profile:
+        profiler.print_report()
+
+
+def print_compatible_combinations(args, funghis, compatible_combinations):
     print('All compatible allocations:')
     has_compatible = False
-    for idx, combinations in enumerate(gen_compatible_best_results(args)):
+    for idx, combinations in enumerate(compatible_combinations):
         print('#{}'.format(idx + 1))
         funghi_names = [funghis[funghi_id]['name']
                         for funghi_id in sorted(combinations)]
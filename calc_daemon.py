@@ -0,0 +1,423 @@
+# Native modules
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import json
+import os
+import signal
+import socket
+import sys
+
+# Project modules
+import allocation_calculator.branch_bound as branch_bound
+import allocation_calculator.calc as calc
+import allocation_calculator.joint as joint
+import allocation_calculator.loader as loader
+import calc_compatible
+import calc_global
+
+MODES = ['single', 'compatible', 'global']
+ENGINES = ['python', 'numpy', 'table']
+SEARCHES = ['exhaustive', 'branch_bound']
+# The default options of each query, the same as the programs
+QUERY_DEFAULTS = {
+    'single': {
+        'max': 10,
+        'engine': 'python',
+        'search': 'exhaustive',
+        'filter_out_subset_funghis': False,
+    },
+    'compatible': {
+        'max': 10,
+        'engine': 'python',
+        'search': 'exhaustive',
+        'joint': False,
+    },
+    'global': {
+        'max': 1,
+        'engine': 'python',
+        'search': 'exhaustive',
+        'joint': False,
+        'cache_size': 256,
+    },
+}
+# The data of the worker process, it is set once when the worker starts
+WORKER_STATE = {}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--socket', default=None,
+                        help='path of the Unix socket to listen on or to'
+                        ' query')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='host to listen on or to query if "--socket" is'
+                        ' not specified')
+    parser.add_argument('--port', type=int, default=8765,
+                        help='port to listen on or to query if "--socket" is'
+                        ' not specified')
+    parser.add_argument('--data_root', default='data',
+                        help='directory containing the data directories to'
+                        ' load when the daemon starts')
+    parser.add_argument('--funghis_path', default='data/all/funghis.yaml',
+                        help='funghis spec path')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='the number of worker processes')
+    parser.add_argument('--cache_size', type=int, default=256,
+                        help='the maximum number of answers kept for the'
+                        ' repeated queries (set 0 to disable)')
+    parser.add_argument('--query', default=None,
+                        help='send the JSON query to a running daemon and'
+                        ' print the answer instead of starting a daemon')
+    return parser.parse_args()
+
+
+def gen_daemon_state(funghis_path, workers=1, cache_size=256,
+                     data_dirs=None):
+    """Generate the state of a daemon.
+
+    The worker processes load the specs of the data directories when they
+    start, and keep the compiled specs in memory. The answers are cached
+    by the queries and the states of the spec files.
+    """
+    data_dirs = data_dirs or []
+    # The forked workers share the specs loaded here
+    load_data_dirs(funghis_path, data_dirs)
+    executor = concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker,
+        initargs=(funghis_path, data_dirs))
+    # Start the workers now instead of on the first queries
+    for future in [executor.submit(warm_up) for _ in range(workers)]:
+        future.result()
+    return {
+        'funghis_path': funghis_path,
+        'executor': executor,
+        'cache_size': cache_size,
+        'answers': collections.OrderedDict(),
+        # The futures of the queries being answered, keyed like the answers
+        'pending': {},
+        'hits': 0,
+        'coalesced': 0,
+        'misses': 0,
+    }
+
+
+def init_worker(funghis_path, data_dirs):
+    # The daemon stops the workers when it is interrupted
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    WORKER_STATE['funghis_path'] = funghis_path
+    load_data_dirs(funghis_path, data_dirs)
+
+
+def load_data_dirs(funghis_path, data_dirs):
+    for data_dir in data_dirs:
+        loader.load_data_dir(data_dir, funghis_path)
+
+
+def warm_up():
+    return len(loader.LOADED_SPECS)
+
+
+def list_data_dirs(data_root):
+    return sorted(
+        os.path.join(data_root, name) for name in os.listdir(data_root)
+        if os.path.isfile(os.path.join(data_root, name, 'adventures.yaml')))
+
+
+async def answer_query(state, query):
+    """Answer the query with the worker processes.
+
+    The identical queries being answered at the same time share one answer,
+    and the answers are reused until any of the spec files is changed.
+    """
+    try:
+        query = normalize_query(query)
+        key = gen_answer_key(state, query)
+    except (ValueError, TypeError, OSError) as e:
+        return {'ok': False, 'error': str(e)}
+    answers = state['answers']
+    if key in answers:
+        state['hits'] += 1
+        answers.move_to_end(key)
+        return answers[key]
+    pending = state['pending']
+    if key in pending:
+        state['coalesced'] += 1
+        return await asyncio.shield(pending[key])
+    state['misses'] += 1
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(state['executor'], run_query, query)
+    pending[key] = future
+    try:
+        answer = await asyncio.shield(future)
+    finally:
+        del pending[key]
+    # Only the successful answers are cached
+    if answer['ok'] and state['cache_size'] > 0:
+        answers[key] = answer
+        if len(answers) > state['cache_size']:
+            answers.popitem(last=False)
+    return answer
+
+
+def normalize_query(query):
+    if not isinstance(query, dict):
+        raise ValueError('The query should be a JSON object')
+    mode = query.get('mode')
+    if mode not in MODES:
+        raise ValueError('The mode should be one of {}'.format(
+            ', '.join(MODES)))
+    defaults = QUERY_DEFAULTS[mode]
+    if mode == 'single':
+        names = ['data_dir']
+    else:
+        names = ['data_dirs']
+    unknown_names = set(query) - set(defaults) - set(names) - {'mode'}
+    if len(unknown_names) > 0:
+        raise ValueError('Unknown options: {}'.format(
+            ', '.join(sorted(unknown_names))))
+    for name in names:
+        if name not in query:
+            raise ValueError('Please specify "{}"'.format(name))
+    query = dict(defaults, **query)
+    check_query_types(query)
+    return query
+
+
+def check_query_types(query):
+    # The options are checked here, so a wrong type is answered as an error
+    # instead of failing in the workers
+    if 'data_dir' in query and not isinstance(query['data_dir'], str):
+        raise ValueError('"data_dir" should be a string')
+    if 'data_dirs' in query:
+        data_dirs = query['data_dirs']
+        if not isinstance(data_dirs, list) or len(data_dirs) <= 0 or \
+                not all(isinstance(data_dir, str) for data_dir in data_dirs):
+            raise ValueError('"data_dirs" should be a non-empty list of'
+                             ' strings')
+    for name in ['max', 'cache_size']:
+        if name in query and (not isinstance(query[name], int) or
+                              isinstance(query[name], bool)):
+            raise ValueError('"{}" should be an integer'.format(name))
+    for name in ['filter_out_subset_funghis', 'joint']:
+        if name in query and not isinstance(query[name], bool):
+            raise ValueError('"{}" should be a boolean'.format(name))
+    for name, choices in [('engine', ENGINES), ('search', SEARCHES)]:
+        if query[name] not in choices:
+            raise ValueError('"{}" should be one of {}'.format(
+                name, ', '.join(choices)))
+
+
+def gen_answer_key(state, query):
+    # The answer is changed if any of the spec files is changed
+    if query['mode'] == 'single':
+        data_dirs = [query['data_dir']]
+    else:
+        data_dirs = query['data_dirs']
+    paths = [state['funghis_path']]
+    for data_dir in data_dirs:
+        paths.append(os.path.join(data_dir, 'adventures.yaml'))
+        paths.append(os.path.join(data_dir, 'rewards.yaml'))
+    file_states = []
+    for path in paths:
+        stat = os.stat(path)
+        file_states.append((path, stat.st_mtime_ns, stat.st_size))
+    return json.dumps(query, sort_keys=True), tuple(file_states)
+
+
+def run_query(query):
+    try:
+        if query['mode'] == 'single':
+            result = run_single_query(query)
+        elif query['mode'] == 'compatible':
+            result = run_compatible_query(query)
+        else:
+            result = run_global_query(query)
+    except Exception as e:
+        return {'ok': False, 'error': '{}: {}'.format(type(e).__name__, e)}
+    return {'ok': True, 'result': result}
+
+
+def run_single_query(query):
+    data = loader.load_data_dir(query['data_dir'],
+                                WORKER_STATE['funghis_path'])
+    if query['filter_out_subset_funghis']:
+        calc.filter_out_subset_funghis(data)
+    total_adventure_capacity = calc.calc_total_adventure_capacity(data)
+    total_funghi_capacity = calc.calc_total_funghi_capacity(data)
+    if query['search'] == 'branch_bound':
+        best_results = branch_bound.calc_best_results(
+            data, total_adventure_capacity, total_funghi_capacity,
+            query['max'])
+    else:
+        funghi_combinations = calc.gen_funghi_combinations(
+            data, total_adventure_capacity, total_funghi_capacity)
+        best_results = calc.calc_best_results(
+            data, funghi_combinations, query['max'], query['engine'])
+    return convert_best_results(data, best_results)
+
+
+def run_compatible_query(query):
+    args = argparse.Namespace(
+        data_dirs=query['data_dirs'],
+        funghis_path=WORKER_STATE['funghis_path'], engine=query['engine'],
+        search=query['search'], workers=1, joint=query['joint'],
+        spec_cache=True)
+    all_data = calc_compatible.load_all_data(args)
+    funghis = all_data[0]['funghis']
+    compatible_combinations = calc_compatible.gen_compatible_best_results(
+        args, all_data)
+    if query['max'] > 0:
+        compatible_combinations = compatible_combinations[:query['max']]
+    return {
+        'combinations': [
+            {
+                'funghis': sorted(combination),
+                'funghi_names': gen_funghi_names(funghis, sorted(combination)),
+            }
+            for combination in compatible_combinations
+        ],
+    }
+
+
+def run_global_query(query):
+    args = argparse.Namespace(
+        data_dirs=query['data_dirs'],
+        funghis_path=WORKER_STATE['funghis_path'], engine=query['engine'],
+        search=query['search'], workers=1, cache_size=query['cache_size'],
+        spec_cache=True)
+    data_list = [loader.load_data_dir(data_dir, args.funghis_path)
+                 for data_dir in args.data_dirs]
+    if query['joint']:
+        all_global_results = joint.gen_joint_best_results(
+            data_list, args.engine)
+    else:
+        all_global_results = calc_global.gen_global_best_results(args)
+    global_allocations = []
+    for global_results in all_global_results:
+        global_allocations.append([
+            convert_best_results(data, results)
+            for data, results in zip(data_list, global_results)])
+        if query['max'] > 0 and len(global_allocations) >= query['max']:
+            break
+    return {'global_allocations': global_allocations}
+
+
+def convert_best_results(data, best_results):
+    """Convert the best results into JSON objects.
+
+    The adventure IDs become the keys of JSON objects, so they are strings.
+    """
+    results = []
+    for combination, success_rate, req_report in best_results['results']:
+        results.append({
+            'allocation': combination,
+            'funghi_names': {
+                adventure_id: gen_funghi_names(data['funghis'], funghi_ids)
+                for adventure_id, funghi_ids in combination.items()},
+            'success_rate': success_rate,
+            'met_requirements': req_report,
+        })
+    return {
+        'max_score': best_results['max_score'],
+        'result_count': best_results.get('result_count', len(results)),
+        'results': results,
+    }
+
+
+def gen_funghi_names(funghis, funghi_ids):
+    names = []
+    for funghi_id in funghi_ids:
+        if funghi_id == calc.EMPTY_ID:
+            names.append(calc.EMPTY_FUNGHI['name'])
+        else:
+            names.append(funghis[funghi_id]['name'])
+    return names
+
+
+async def handle_connection(state, reader, writer):
+    # Each line is a JSON query, and each answer is a JSON line
+    try:
+        while True:
+            line = await reader.readline()
+            if len(line) <= 0:
+                break
+            try:
+                query = json.loads(line)
+            except ValueError as e:
+                answer = {'ok': False, 'error': 'Invalid JSON: {}'.format(e)}
+            else:
+                answer = await answer_query(state, query)
+            writer.write(json.dumps(answer, ensure_ascii=False).encode(
+                'utf8') + b'\n')
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(args, state):
+    async def on_connection(reader, writer):
+        await handle_connection(state, reader, writer)
+    if args.socket is not None:
+        server = await asyncio.start_unix_server(on_connection, args.socket)
+        address = args.socket
+    else:
+        server = await asyncio.start_server(on_connection, args.host,
+                                            args.port)
+        address = '{}:{}'.format(args.host, args.port)
+    # Stop serving on SIGINT or SIGTERM
+    loop = asyncio.get_running_loop()
+    stopped = loop.create_future()
+    for signal_number in [signal.SIGINT, signal.SIGTERM]:
+        try:
+            loop.add_signal_handler(signal_number, stopped.set_result, None)
+        except NotImplementedError:
+            # Only KeyboardInterrupt stops the daemon on Windows
+            pass
+    print('Listening on {}'.format(address), file=sys.stderr, flush=True)
+    async with server:
+        await stopped
+    print('Answered {} queries from the cache, {} coalesced, {} by the'
+          ' workers'.format(state['hits'], state['coalesced'],
+                            state['misses']), file=sys.stderr)
+
+
+def send_query(query, socket_path=None, host='127.0.0.1', port=8765):
+    """Send the query to a running daemon and return the answer."""
+    if socket_path is not None:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(socket_path)
+    else:
+        connection = socket.create_connection((host, port))
+    with connection, connection.makefile('rwb') as stream:
+        stream.write(json.dumps(query).encode('utf8') + b'\n')
+        stream.flush()
+        return json.loads(stream.readline())
+
+
+def main():
+    args = parse_args()
+    if args.query is not None:
+        answer = send_query(json.loads(args.query), args.socket, args.host,
+                            args.port)
+        print(json.dumps(answer, indent=2, ensure_ascii=False))
+        if not answer['ok']:
+            sys.exit(1)
+        return
+    state = gen_daemon_state(args.funghis_path, args.workers, args.cache_size,
+                             list_data_dirs(args.data_root))
+    try:
+        asyncio.run(serve(args, state))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        state['executor'].shutdown()
+        if args.socket is not None and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == '__main__':
+    main()
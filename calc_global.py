@@ -1,12 +1,18 @@
 # Native modules
 import argparse
-import os
-
-# Third-party modules
-import yaml
+import collections
+import sys
 
 # Project modules
+import allocation_calculator.branch_bound as branch_bound
 import allocation_calculator.calc as calc
+import allocation_calculator.checkpoint as ckpt
+import allocation_calculator.estimate as estimate
+import allocation_calculator.joint as joint
+import allocation_calculator.loader as loader
+import allocation_calculator.parallel as parallel
+import allocation_calculator.profiler as profiler
+import allocation_calculator.progress as progress
 
 
 def parse_args():
@@ -17,6 +23,59 @@ def parse_args():
     parser.add_argument('--max', type=int, default=1,
                         help='the maximum number of global allocations'
                         ' (set 0 to be unlimited)')
+    parser.add_argument('--engine', default='python',
+                        choices=['python', 'numpy', 'table'],
+                        help='scoring engine ("numpy" scores the combinations'
+                        ' in batches and requires the "numpy" package,'
+                        ' "table" looks up the scores in the score tables'
+                        ' built in "score_tables")')
+    parser.add_argument('--search', default='exhaustive',
+                        choices=['exhaustive', 'branch_bound'],
+                        help='search mode ("branch_bound" prunes the'
+                        ' allocations which can not reach the best score,'
+                        ' "--engine" is ignored)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='the number of worker processes used by the'
+                        ' "exhaustive" search')
+    parser.add_argument('--no_spec_cache', dest='spec_cache', default=True,
+                        action='store_false',
+                        help='do not read or write the compiled spec cache'
+                        ' files')
+    parser.add_argument('--cache_size', type=int, default=256,
+                        help='the maximum number of best results of single'
+                        ' adventures kept while backtracking (set 0 to'
+                        ' disable)')
+    parser.add_argument('--joint', default=False, action='store_true',
+                        help='maximize the total score of all adventures'
+                        ' jointly instead of allocating the adventures in'
+                        ' order')
+    parser.add_argument('--profile', default=False, action='store_true',
+                        help='print the counters of the hot paths and the'
+                        ' time of each phase to stderr')
+    parser.add_argument('--checkpoint', default=None,
+                        help='path of the file to save the backtracking state'
+                        ' periodically, it is removed when the search'
+                        ' finishes (not available with "--joint")')
+    parser.add_argument('--checkpoint_interval', type=float, default=60.0,
+                        help='the seconds between the saves of the'
+                        ' checkpoint')
+    parser.add_argument('--resume', default=False, action='store_true',
+                        help='continue from the checkpoint if it exists')
+    parser.add_argument('--progress', default=False, action='store_true',
+                        help='report the progress of the "exhaustive" search'
+                        ' in one process to stderr')
+    parser.add_argument('--dry_run', default=False, action='store_true',
+                        help='only print the number of combinations of each'
+                        ' adventure and the estimated time to score them')
+    parser.add_argument('--budget', type=int, default=0,
+                        help='the maximum number of combinations to score'
+                        ' (set 0 to be unlimited)')
+    parser.add_argument('--over_budget', default='refuse',
+                        choices=['refuse', 'branch_bound'],
+                        help='what to do if the combinations exceed the'
+                        ' budget ("branch_bound" switches to the'
+                        ' "branch_bound" search, not available with'
+                        ' "--joint")')
     # Report score
     parser.add_argument('--report_score', dest='report_score',
                         action='store_true', help='report score')
@@ -42,6 +101,10 @@ def parse_args():
                         help='do not report any additional information')
     args = parser.parse_args()
     args.data_dirs = args.data_dirs.split(',')
+    if args.resume and args.checkpoint is None:
+        raise ValueError('Please specify "checkpoint" to resume from')
+    if args.joint and args.checkpoint is not None:
+        raise ValueError('The joint search does not support checkpoints')
     if args.no_additional:
         args.report_score = False
         args.report_success_rate = False
@@ -49,19 +112,54 @@ def parse_args():
     return args
 
 
-def gen_global_best_results(args):
-    allocated_counts = {}
-    data_dir_idx = 0
-    # Generate first best results
-    first_results = gen_single_best_results(
-        args, data_dir_idx, allocated_counts)
-    before_results = [first_results]
-    before_pointers = [0]
+def gen_global_best_results(args, results_cache=None, reporter=None,
+                            checkpoint=None):
+    """Generate the global allocations by backtracking.
+
+    If the checkpoint of ckpt.gen_checkpoint is specified, the backtracking
+    state and the number of outputs are saved to its file periodically. If
+    the checkpoint has a loaded state, the backtracking continues from the
+    saved state, and only the outputs after the saved number of outputs are
+    generated. The outputs generated after the last save are generated again.
+    """
+    if results_cache is None:
+        results_cache = gen_results_cache(args.cache_size)
+    # The worker processes are shared by the searches of all nodes
+    workers = args.workers if args.search != 'branch_bound' else 1
+    with parallel.open_pool(workers) as executor:
+        yield from gen_global_best_results_logic(
+            args, results_cache, reporter, checkpoint, executor)
+
+
+def gen_global_best_results_logic(args, results_cache, reporter, checkpoint,
+                                  executor):
+    if checkpoint is not None and checkpoint['state'] is not None:
+        state = checkpoint['state']
+    else:
+        # Generate first best results
+        first_results = gen_cached_single_best_results(
+            args, 0, {}, results_cache, reporter, executor)
+        state = {
+            'data_dir_idx': 0,
+            'allocated_counts': {},
+            'before_results': [first_results],
+            'before_pointers': [0],
+            'output_count': 0,
+        }
+    data_dir_idx = state['data_dir_idx']
+    allocated_counts = state['allocated_counts']
+    before_results = state['before_results']
+    before_pointers = state['before_pointers']
     while data_dir_idx >= 0:
+        # The state is consistent before each step
+        if checkpoint is not None:
+            state['data_dir_idx'] = data_dir_idx
+            ckpt.save_checkpoint(checkpoint, state)
         # Check whether to generate new best results
         if data_dir_idx >= len(before_pointers):
-            best_results = gen_single_best_results(
-                args, data_dir_idx, allocated_counts)
+            best_results = gen_cached_single_best_results(
+                args, data_dir_idx, allocated_counts, results_cache,
+                reporter, executor)
             before_results.append(best_results)
             before_pointers.append(0)
             # Check whether to yield the output
@@ -74,6 +172,7 @@ def gen_global_best_results(args):
                         'max_score': best_results['max_score'],
                         'results': [results[pointer]],
                     })
+                state['output_count'] += 1
                 yield output
                 before_results.pop()
                 before_pointers.pop()
@@ -105,36 +204,65 @@ def gen_global_best_results(args):
                 data_dir_idx += 1
 
 
-def gen_single_best_results(args, data_dir_idx, allocated_counts):
+def gen_results_cache(max_size):
+    return {
+        'max_size': max_size,
+        'entries': collections.OrderedDict(),
+        'hits': 0,
+        'misses': 0,
+    }
+
+
+def gen_cached_single_best_results(args, data_dir_idx, allocated_counts,
+                                   results_cache, reporter=None,
+                                   executor=None):
+    # The best results only depend on the data directory and the allocated
+    # funghis, no matter which path the backtracking takes
+    key = (data_dir_idx, frozenset(allocated_counts.items()))
+    entries = results_cache['entries']
+    if key in entries:
+        results_cache['hits'] += 1
+        entries.move_to_end(key)
+        return entries[key]
+    results_cache['misses'] += 1
+    best_results = gen_single_best_results(
+        args, data_dir_idx, allocated_counts, reporter, executor)
+    # Remove the least recently used best results if the cache is full
+    max_size = results_cache['max_size']
+    if max_size > 0:
+        entries[key] = best_results
+        if len(entries) > max_size:
+            entries.popitem(last=False)
+    return best_results
+
+
+def gen_single_best_results(args, data_dir_idx, allocated_counts,
+                            reporter=None, executor=None):
     data_dir = args.data_dirs[data_dir_idx]
-    data = load_data(data_dir, args.funghis_path)
-    filter_out_allocated_funghis(data, allocated_counts)
-    calc.normalize_data(data)
-    calc.filter_out_subset_funghis(data)
+    # The specs are parsed once, then a new copy is loaded for each search
+    # node
+    with profiler.phase('load'):
+        data = loader.load_data_dir(data_dir, args.funghis_path,
+                                    args.spec_cache)
+    with profiler.phase('filter'):
+        filter_out_allocated_funghis(data, allocated_counts)
+        calc.filter_out_subset_funghis(data)
     total_adventure_capacity = calc.calc_total_adventure_capacity(data)
     total_funghi_capacity = calc.calc_total_funghi_capacity(data)
+    if args.search == 'branch_bound':
+        return branch_bound.calc_best_results(
+            data, total_adventure_capacity, total_funghi_capacity)
+    if args.workers > 1:
+        return parallel.calc_best_results(
+            data, total_adventure_capacity, total_funghi_capacity,
+            engine=args.engine, workers=args.workers, executor=executor)
+    if reporter is not None:
+        reporter['label'] = 'adventure {}/{}'.format(
+            data_dir_idx + 1, len(args.data_dirs))
     funghi_combinations = calc.gen_funghi_combinations(
         data, total_adventure_capacity, total_funghi_capacity)
-    results = calc.calc_allocations_results(data, funghi_combinations)
-    funghi_combinations = calc.gen_funghi_combinations(
-        data, total_adventure_capacity, total_funghi_capacity)
-    return calc.filter_best_results(data, funghi_combinations, results)
-
-
-def load_data(data_dir, funghis_path):
-    adventures_path = os.path.join(data_dir, 'adventures.yaml')
-    rewards_path = os.path.join(data_dir, 'rewards.yaml')
-    with open(adventures_path, 'r', encoding='utf8') as stream:
-        adventures = yaml.load(stream)
-    with open(funghis_path, 'r', encoding='utf8') as stream:
-        funghis = yaml.load(stream)
-    with open(rewards_path, 'r', encoding='utf8') as stream:
-        rewards = yaml.load(stream)
-    return {
-        'adventures': adventures,
-        'funghis': funghis,
-        'rewards': rewards,
-    }
+    return calc.calc_best_results(
+        data, funghi_combinations, engine=args.engine, reporter=reporter)
 
 
 def filter_out_allocated_funghis(data, allocated_counts):
@@ -164,12 +292,150 @@ def add_combination_to_allocated_counts(combination, allocated_counts):
 
 def main():
     args = parse_args()
-    data_list = [load_data(data_dir, args.funghis_path)
-                 for data_dir in args.data_dirs]
-    print('All global allocations:')
-    has_global = False
-    for idx, global_results in enumerate(gen_global_best_results(args)):
+    if args.profile:
+        profiler.enable()
+    with profiler.phase('load'):
+        data_list = [loader.load_data_dir(data_dir, args.funghis_path,
+                                          args.spec_cache)
+                     for data_dir in args.data_dirs]
+    combination_counts = None
+    if args.dry_run or args.budget > 0:
+        combination_counts = count_global_combinations(args, data_list)
+    if args.dry_run:
+        print_estimate(args, data_list, combination_counts)
+        return
+    # The joint search always scores all combinations
+    if not estimate.check_budget(args, sum(combination_counts or []),
+                                 not args.joint):
+        sys.exit(1)
+    reporter = None
+    if args.progress:
+        # Only the joint search knows the total number of combinations
+        if args.joint:
+            if combination_counts is None:
+                combination_counts = count_global_combinations(
+                    args, data_list)
+            reporter = progress.gen_reporter(sum(combination_counts))
+        else:
+            reporter = progress.gen_reporter()
+    checkpoint = None
+    output_count = 0
+    if args.joint:
+        all_global_results = joint.gen_joint_best_results(
+            data_list, args.engine, reporter)
+    else:
+        results_cache = gen_results_cache(args.cache_size)
+        checkpoint = gen_global_checkpoint(args)
+        if checkpoint is not None and checkpoint['state'] is not None:
+            output_count = checkpoint['state']['output_count']
+        all_global_results = gen_global_best_results(
+            args, results_cache, reporter, checkpoint)
+    # The global allocations are searched while they are printed
+    all_global_results = profiler.gen_timed_items(all_global_results, 'search')
+    with profiler.phase('print'):
+        print_global_results(args, data_list, all_global_results,
+                             output_count)
+    if reporter is not None:
+        progress.finish(reporter)
+    # The search has finished, so there is nothing to resume
+    if checkpoint is not None:
+        ckpt.remove_checkpoint(checkpoint)
+    if not args.joint:
+        print('Best results cache hits: {}, misses: {}'.format(
+            results_cache['hits'], results_cache['misses']), file=sys.stderr)
+    if args.profile:
+        profiler.print_report()
+
+
+def gen_global_checkpoint(args):
+    if args.checkpoint is None:
+        return None
+    # The checkpoint can only be resumed with the same spec files
+    key = [(data_dir, loader.calc_data_dir_hash(data_dir, args.funghis_path))
+           for data_dir in args.data_dirs]
+    checkpoint = ckpt.gen_checkpoint(args.checkpoint, key,
+                                     args.checkpoint_interval)
+    if args.resume and not ckpt.load_checkpoint(checkpoint):
+        print('The checkpoint "{}" does not exist, starting from the'
+              ' beginning'.format(args.checkpoint), file=sys.stderr)
+    return checkpoint
+
+
+def count_global_combinations(args, data_list):
+    """Count the combinations of each adventure with all funghis.
+
+    Without joint, the funghis are filtered like the first search of each
+    adventure, and each adventure is searched again for every allocation of
+    the earlier adventures, so the sum is a lower bound.
+    """
+    if args.joint:
+        return [count_combinations(data) for data in data_list]
+    combination_counts = []
+    for data_dir_idx in range(len(args.data_dirs)):
+        data = load_first_search_data(args, data_dir_idx)
+        combination_counts.append(count_combinations(data))
+    return combination_counts
+
+
+def load_first_search_data(args, data_dir_idx):
+    data = loader.load_data_dir(args.data_dirs[data_dir_idx],
+                                args.funghis_path, args.spec_cache)
+    calc.filter_out_subset_funghis(data)
+    return data
+
+
+def count_combinations(data):
+    total_adventure_capacity = calc.calc_total_adventure_capacity(data)
+    total_funghi_capacity = calc.calc_total_funghi_capacity(data)
+    return estimate.count_funghi_combinations(
+        data, total_adventure_capacity, total_funghi_capacity)
+
+
+def print_estimate(args, data_list, combination_counts):
+    # The search may be switched by the budget
+    refused = not estimate.check_budget(args, sum(combination_counts),
+                                        not args.joint)
+    for data_dir, combination_count in zip(args.data_dirs,
+                                           combination_counts):
+        print('{}: {} combinations'.format(data_dir, combination_count))
+    if args.joint:
+        data = data_list[0]
+    else:
+        data = load_first_search_data(args, 0)
+    throughput = estimate.measure_throughput(
+        data, calc.calc_total_adventure_capacity(data),
+        calc.calc_total_funghi_capacity(data), args.engine)
+    # The combinations are split evenly between the workers
+    if throughput is not None and not args.joint and \
+            args.search != 'branch_bound':
+        throughput *= args.workers
+    estimate.print_estimate(sum(combination_counts), throughput)
+    if not args.joint:
+        print('Each adventure is searched again for every allocation of the'
+              ' earlier adventures, so the ETA is a lower bound')
+    if refused:
+        print('The run would be refused by the budget')
+
+
+def print_global_results(args, data_list, all_global_results,
+                         output_count=0):
+    # The global allocations printed before the resumed checkpoint are not
+    # printed again
+    if output_count > 0:
+        print('Global allocations after #{}:'.format(output_count))
+    else:
+        print('All global allocations:')
+    if args.max > 0 and output_count >= args.max:
+        print('The limit has been reached')
+        return
+    has_global = output_count > 0
+    for idx, global_results in enumerate(all_global_results, output_count):
         print('Global Allocation #{}'.format(idx + 1))
+        # The joint allocations are compared by the total score
+        if args.joint and args.report_score:
+            total_score = sum(results['max_score']
+                              for results in global_results)
+            print('Total score: {}'.format(total_score))
         print()
         for data, results in zip(data_list, global_results):
             calc.list_best_allocations(data, results, args.report_score,
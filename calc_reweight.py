@@ -0,0 +1,86 @@
+# Native modules
+import argparse
+import sys
+import time
+
+# Project modules
+import allocation_calculator.calc as calc
+import allocation_calculator.incremental as incremental
+import allocation_calculator.loader as loader
+import allocation_calculator.reweight as reweight
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--store', required=True,
+                        help='path of the file written by "calc_single.py'
+                        ' --incremental"')
+    parser.add_argument('--rewards_path', required=True,
+                        help='rewards spec path with the new importance'
+                        ' values')
+    parser.add_argument(
+        '--max', type=int, default=10, help='the maximum number of allocations'
+        ' (set 0 to be unlimited)')
+    parser.add_argument('--engine', default='python',
+                        choices=['python', 'numpy'],
+                        help='scoring engine ("numpy" scores all combinations'
+                        ' at once and requires the "numpy" package)')
+    parser.add_argument('--no_spec_cache', dest='spec_cache', default=True,
+                        action='store_false',
+                        help='do not read or write the compiled spec cache'
+                        ' files')
+    # Report score
+    parser.add_argument('--report_score', dest='report_score',
+                        action='store_true', help='report score')
+    parser.add_argument('--no_report_score', dest='report_score',
+                        action='store_false', help='do not report score')
+    parser.set_defaults(report_score=True)
+    # Report success rate
+    parser.add_argument('--report_success_rate', dest='report_success_rate',
+                        action='store_true', help='report success rate')
+    parser.add_argument('--no_report_success_rate', dest='report_success_rate',
+                        action='store_false', help='do not report success rate')
+    parser.set_defaults(report_success_rate=True)
+    # Report failed requirement
+    parser.add_argument('--report_failed_requirement',
+                        dest='report_failed_requirement', action='store_true',
+                        help='report failed requirement')
+    parser.add_argument('--no_report_failed_requirement',
+                        dest='report_failed_requirement', action='store_false',
+                        help='do not report failed requirement')
+    parser.set_defaults(report_failed_requirement=True)
+    # One switch to turn off all additional reports
+    parser.add_argument('--no_additional', default=False, action='store_true',
+                        help='do not report any additional information')
+    args = parser.parse_args()
+    if args.no_additional:
+        args.report_score = False
+        args.report_success_rate = False
+        args.report_failed_requirement = False
+    return args
+
+
+def main():
+    args = parse_args()
+    store = incremental.load_store(args.store)
+    if store is None:
+        raise ValueError('Could not load the store "{}", please run'
+                         ' calc_single.py with "--incremental" first'.format(
+                             args.store))
+    rewards = loader.load_spec(args.rewards_path, 'rewards', args.spec_cache)
+    data = reweight.gen_store_data(store, rewards)
+    start = time.perf_counter()
+    best_results = reweight.calc_best_results(data, store, args.max,
+                                              args.engine)
+    print('Rescored {} combinations from "{}" in {:.3f}s'.format(
+        len(store['bitmaps']), args.store, time.perf_counter() - start),
+        file=sys.stderr)
+    calc.list_best_allocations(data, best_results, args.report_score,
+                               args.report_success_rate,
+                               args.report_failed_requirement)
+    if best_results['result_count'] > len(best_results['results']):
+        print('The limit has been reached')
+
+
+if __name__ == '__main__':
+    main()
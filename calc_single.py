@@ -3,11 +3,16 @@ import argparse
 import os
 import sys
 
-# Third-party modules
-import yaml
-
 # Project modules
+import allocation_calculator.branch_bound as branch_bound
 import allocation_calculator.calc as calc
+import allocation_calculator.estimate as estimate
+import allocation_calculator.incremental as incremental
+import allocation_calculator.loader as loader
+import allocation_calculator.parallel as parallel
+import allocation_calculator.pareto as pareto
+import allocation_calculator.profiler as profiler
+import allocation_calculator.progress as progress
 import allocation_calculator.program_args as p_args
 
 
@@ -25,6 +30,56 @@ def parse_args():
     parser.add_argument(
         '--max', type=int, default=10, help='the maximum number of allocations'
         ' (set 0 to be unlimited)')
+    parser.add_argument('--engine', default='python',
+                        choices=['python', 'numpy', 'table'],
+                        help='scoring engine ("numpy" scores the combinations'
+                        ' in batches and requires the "numpy" package,'
+                        ' "table" looks up the scores in the score tables'
+                        ' built in "score_tables")')
+    parser.add_argument('--search', default='exhaustive',
+                        choices=['exhaustive', 'branch_bound'],
+                        help='search mode ("branch_bound" prunes the'
+                        ' allocations which can not reach the best score,'
+                        ' "--engine" is ignored)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='the number of worker processes used by the'
+                        ' "exhaustive" search')
+    parser.add_argument('--filter_out_subset_funghis', default=False,
+                        action='store_true',
+                        help='filter out the funghis which meet a subset of'
+                        ' the requirements of another funghi and have lower'
+                        ' stats')
+    parser.add_argument('--no_spec_cache', dest='spec_cache', default=True,
+                        action='store_false',
+                        help='do not read or write the compiled spec cache'
+                        ' files')
+    parser.add_argument('--profile', default=False, action='store_true',
+                        help='print the counters of the hot paths and the'
+                        ' time of each phase to stderr')
+    parser.add_argument('--incremental', default=None,
+                        help='path of the file to store the met requirements'
+                        ' of all combinations, the next runs only score the'
+                        ' combinations with added or changed funghis')
+    parser.add_argument('--pareto', default=False, action='store_true',
+                        help='list the allocations on the Pareto frontier of'
+                        ' the reward totals instead of the best score, so'
+                        ' that the importance values of the rewards can be'
+                        ' chosen afterwards ("--max" limits the allocations'
+                        ' of each point)')
+    parser.add_argument('--progress', default=False, action='store_true',
+                        help='report the progress of the "exhaustive" search'
+                        ' in one process to stderr')
+    parser.add_argument('--dry_run', default=False, action='store_true',
+                        help='only print the number of combinations and the'
+                        ' estimated time to score them')
+    parser.add_argument('--budget', type=int, default=0,
+                        help='the maximum number of combinations to score'
+                        ' (set 0 to be unlimited)')
+    parser.add_argument('--over_budget', default='refuse',
+                        choices=['refuse', 'branch_bound'],
+                        help='what to do if the combinations exceed the'
+                        ' budget ("branch_bound" switches to the'
+                        ' "branch_bound" search)')
     # Report score
     parser.add_argument('--report_score', dest='report_score',
                         action='store_true', help='report score')
@@ -50,6 +105,13 @@ def parse_args():
                         help='do not report any additional information')
     args = parser.parse_args()
     p_args.gen_spec_paths(args)
+    if args.incremental is not None and args.search == 'branch_bound':
+        raise ValueError('The "branch_bound" search does not support'
+                         ' "incremental"')
+    if args.pareto and (args.search == 'branch_bound' or
+                        args.incremental is not None or args.workers > 1):
+        raise ValueError('"pareto" only supports the "exhaustive" search in'
+                         ' one process without "incremental"')
     if args.no_additional:
         args.report_score = False
         args.report_success_rate = False
@@ -57,49 +119,121 @@ def parse_args():
     return args
 
 
-def load_data(args):
-    with open(args.adventures_path, 'r', encoding='utf8') as stream:
-        adventures = yaml.load(stream)
-    with open(args.funghis_path, 'r', encoding='utf8') as stream:
-        funghis = yaml.load(stream)
-    with open(args.rewards_path, 'r', encoding='utf8') as stream:
-        rewards = yaml.load(stream)
-    return {
-        'adventures': adventures,
-        'funghis': funghis,
-        'rewards': rewards,
-    }
-
-
-def limit_best_results(best_results, max_results):
-    if max_results <= 0:
-        return
-    results = best_results['results']
-    if len(results) > max_results:
-        best_results['results'] = results[:max_results]
-        return True
-    else:
-        return False
-
-
 def main():
     args = parse_args()
-    data = load_data(args)
-    calc.normalize_data(data)
+    if args.profile:
+        profiler.enable()
+    with profiler.phase('load'):
+        data = loader.load_data(args.adventures_path, args.funghis_path,
+                                args.rewards_path, args.spec_cache)
+    if args.filter_out_subset_funghis:
+        with profiler.phase('filter'):
+            calc.filter_out_subset_funghis(data)
     total_adventure_capacity = calc.calc_total_adventure_capacity(data)
     total_funghi_capacity = calc.calc_total_funghi_capacity(data)
+    combination_count = None
+    if args.dry_run or args.budget > 0:
+        combination_count = estimate.count_funghi_combinations(
+            data, total_adventure_capacity, total_funghi_capacity)
+    if args.dry_run:
+        print_estimate(args, data, combination_count)
+        return
+    if not estimate.check_budget(args, combination_count,
+                                 is_search_switchable(args)):
+        sys.exit(1)
+    if args.pareto:
+        print_frontier(args, data, total_adventure_capacity,
+                       total_funghi_capacity)
+        return
+    if args.search == 'branch_bound':
+        with profiler.phase('search'):
+            best_results = branch_bound.calc_best_results(
+                data, total_adventure_capacity, total_funghi_capacity,
+                args.max)
+    elif args.incremental is not None:
+        with profiler.phase('search'):
+            best_results = calc_incremental_best_results(
+                args, data, total_adventure_capacity, total_funghi_capacity)
+    elif args.workers > 1:
+        with profiler.phase('search'):
+            best_results = parallel.calc_best_results(
+                data, total_adventure_capacity, total_funghi_capacity,
+                args.max, args.engine, args.workers)
+    else:
+        reporter = None
+        if args.progress:
+            if combination_count is None:
+                combination_count = estimate.count_funghi_combinations(
+                    data, total_adventure_capacity, total_funghi_capacity)
+            reporter = progress.gen_reporter(combination_count)
+        funghi_combinations = calc.gen_funghi_combinations(
+            data, total_adventure_capacity, total_funghi_capacity)
+        best_results = calc.calc_best_results(
+            data, funghi_combinations, args.max, args.engine, reporter)
+        if reporter is not None:
+            progress.finish(reporter)
+    limited = best_results['result_count'] > len(best_results['results'])
+    with profiler.phase('print'):
+        calc.list_best_allocations(data, best_results, args.report_score,
+                                   args.report_success_rate,
+                                   args.report_failed_requirement)
+        if limited:
+            print('The limit has been reached')
+    if args.profile:
+        profiler.print_report()
+
+
+def print_frontier(args, data, total_adventure_capacity,
+                   total_funghi_capacity):
     funghi_combinations = calc.gen_funghi_combinations(
         data, total_adventure_capacity, total_funghi_capacity)
-    results = calc.calc_allocations_results(data, funghi_combinations)
+    with profiler.phase('search'):
+        frontier = pareto.calc_frontier(data, funghi_combinations, args.max,
+                                        args.engine)
+    with profiler.phase('print'):
+        pareto.print_frontier(data, frontier, args.report_score,
+                              args.report_success_rate,
+                              args.report_failed_requirement)
+    if args.profile:
+        profiler.print_report()
+
+
+def calc_incremental_best_results(args, data, total_adventure_capacity,
+                                  total_funghi_capacity):
+    store = incremental.load_store(args.incremental)
     funghi_combinations = calc.gen_funghi_combinations(
         data, total_adventure_capacity, total_funghi_capacity)
-    best_results = calc.filter_best_results(data, funghi_combinations, results)
-    limited = limit_best_results(best_results, args.max)
-    calc.list_best_allocations(data, best_results, args.report_score,
-                               args.report_success_rate,
-                               args.report_failed_requirement)
-    if limited:
-        print('The limit has been reached')
+    best_results, new_store, scored_count = incremental.calc_best_results(
+        data, funghi_combinations, store, args.max, args.engine)
+    incremental.save_store(args.incremental, new_store)
+    print('Scored {} of {} combinations, the others are reused from'
+          ' "{}"'.format(scored_count, len(new_store['bitmaps']),
+                         args.incremental), file=sys.stderr)
+    return best_results
+
+
+def is_search_switchable(args):
+    # The "branch_bound" search does not support them, see parse_args
+    return args.incremental is None and not args.pareto
+
+
+def print_estimate(args, data, combination_count):
+    # The search may be switched by the budget
+    refused = not estimate.check_budget(args, combination_count,
+                                        is_search_switchable(args))
+    total_adventure_capacity = calc.calc_total_adventure_capacity(data)
+    total_funghi_capacity = calc.calc_total_funghi_capacity(data)
+    throughput = estimate.measure_throughput(
+        data, total_adventure_capacity, total_funghi_capacity, args.engine)
+    # The combinations are split evenly between the workers
+    if throughput is not None and args.search != 'branch_bound':
+        throughput *= args.workers
+    estimate.print_estimate(combination_count, throughput)
+    if args.search == 'branch_bound':
+        print('The "branch_bound" search skips some of the combinations, so'
+              ' the ETA is an upper bound')
+    if refused:
+        print('The run would be refused by the budget')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,71 @@
+# Native modules
+import argparse
+
+# Project modules
+import allocation_calculator.synthetic as synthetic
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--output_dir', required=True,
+                        help='directory to write the adventures, funghis and'
+                        ' rewards spec files')
+    defaults = synthetic.DEFAULT_OPTIONS
+    parser.add_argument('--funghi_size', type=int,
+                        default=defaults['funghi_size'],
+                        help='the number of funghis')
+    parser.add_argument('--duplicate_ratio', type=float,
+                        default=defaults['duplicate_ratio'],
+                        help='the ratio of funghis with more than one'
+                        ' capacity')
+    parser.add_argument('--max_duplicates', type=int,
+                        default=defaults['max_duplicates'],
+                        help='the maximum capacity of each funghi')
+    parser.add_argument('--adventure_size', type=int,
+                        default=defaults['adventure_size'],
+                        help='the number of adventures')
+    parser.add_argument('--capacity', type=int, default=defaults['capacity'],
+                        help='the capacity of each adventure')
+    parser.add_argument('--requirement_size', type=int,
+                        default=defaults['requirement_size'],
+                        help='the number of requirements of each adventure')
+    parser.add_argument('--reward_size', type=int,
+                        default=defaults['reward_size'],
+                        help='the number of reward items')
+    parser.add_argument('--multi_slot_ratio', type=float,
+                        default=defaults['multi_slot_ratio'],
+                        help='the ratio of requirements with multiple stat'
+                        ' slots')
+    parser.add_argument('--skill_ratio', type=float,
+                        default=defaults['skill_ratio'],
+                        help='the ratio of requirements with skills')
+    parser.add_argument('--boost_ratio', type=float,
+                        default=defaults['boost_ratio'],
+                        help='the ratio of requirements with boosts')
+    parser.add_argument('--reduce_ratio', type=float,
+                        default=defaults['reduce_ratio'],
+                        help='the ratio of requirements checking the sum of'
+                        ' stats')
+    parser.add_argument('--reduce_boost_ratio', type=float,
+                        default=defaults['reduce_boost_ratio'],
+                        help='the ratio of reduce requirements with reduce'
+                        ' boosts')
+    parser.add_argument('--allowed_ratio', type=float,
+                        default=defaults['allowed_ratio'],
+                        help='the ratio of funghis allowed in each adventure'
+                        ' (set 1 to allow all funghis)')
+    parser.add_argument('--seed', type=int, default=defaults['seed'],
+                        help='random seed')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    options = {name: getattr(args, name)
+               for name in synthetic.DEFAULT_OPTIONS}
+    specs = synthetic.gen_specs(**options)
+    synthetic.write_specs(specs, args.output_dir)
+
+
+if __name__ == '__main__':
+    main()